@@ -1,42 +1,25 @@
 import os
-import subprocess
 from typing import Any, Dict, Optional
 
+import click
 from flask import Flask
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
 
 from app.error_handlers import register_error_handlers
+from app.replica import REPLICA_BIND, RoutingSession
+from app.version import get_git_commit_hash
 from config import settings
 
 # Extensions are initialized here but not attached to an app
-db: SQLAlchemy = SQLAlchemy()
-migrate: Migrate = Migrate()
+db: SQLAlchemy = SQLAlchemy(session_options={"class_": RoutingSession})
 login: LoginManager = LoginManager()
 login.login_view = "main.login"
 login.login_message = "Please log in to access this page."
 csrf = CSRFProtect()
 
 
-def get_git_commit_hash() -> Optional[str]:
-    """Function to get the short git commit hash."""
-    try:
-        # Run the git command to get the short hash
-        commit_hash = (
-            subprocess.check_output(
-                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
-            )
-            .decode("utf-8")
-            .strip()
-        )
-        return commit_hash
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        # Handle cases where it's not a git repo or git is not installed
-        return None
-
-
 def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
     # Set instance path to ensure database files are in the right location
     instance_path = os.path.join(
@@ -56,21 +39,61 @@ def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
         for key, value in config_dict.items():
             app.config[key] = value
 
-    app.config["GIT_COMMIT_HASH"] = get_git_commit_hash()
-    if app.config["GIT_COMMIT_HASH"] is None:
-        app.config["GIT_COMMIT_HASH"] = "unknown"
+    app.config["GIT_COMMIT_HASH"] = (
+        app.config.get("GIT_COMMIT_HASH") or get_git_commit_hash() or "unknown"
+    )
+
+    from app.pool import build_engine_options, configure_sqlite
+
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", build_engine_options(app.config))
+
+    if app.config.get("SQLALCHEMY_REPLICA_URI"):
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault(REPLICA_BIND, app.config["SQLALCHEMY_REPLICA_URI"])
+        app.config["SQLALCHEMY_BINDS"] = binds
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    if str(app.config.get("SQLALCHEMY_DATABASE_URI", "")).startswith("sqlite"):
+        with app.app_context():
+            app.extensions["sqlite_write_serializer"] = configure_sqlite(
+                db.engine, app.config
+            )
+    # Alembic takes longer to import than the rest of the app and only the
+    # "flask db" commands use it, so workers started by gunicorn skip it
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
     login.init_app(app)
     csrf.init_app(app)
 
+    from app.identity import identity_cache
+    from app.metrics import request_metrics
+    from app.profiling import request_profiler
+    from app.query_budget import query_budget
+    from app.replica import replica_router
+    from app.response_cache import response_cache
+    from app.search import search_index
+    from app.usage import api_key_usage
+
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    search_index.init_app(app)
+    response_cache.init_app(app)
+    if app.config.get("METRICS_ENABLED", True):
+        request_metrics.init_app(app)
+    query_budget.init_app(app)
+    request_profiler.init_app(app)
+
     # Import and register the blueprints
-    from app.api import api_bp
+    from app.api import api_bp, api_v1_bp
     from app.routes import main_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
+    # The API authenticates with bearer tokens, not session cookies
+    csrf.exempt(api_v1_bp)
 
     # Register error handlers
     register_error_handlers(app)
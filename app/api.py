@@ -1,9 +1,23 @@
-from typing import Any
-
-from flask import Blueprint, jsonify, render_template, request
+from typing import Any, Dict
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+)
 
 from app import db
-from app.api_utils import paginated_response, success_response
+from app.api_utils import (
+    conditional_response,
+    get_include_args,
+    get_pagination_args,
+    paginated_response,
+    success_response,
+)
 from app.auth_utils import encode_auth_token, token_required
 from app.exceptions import (
     AuthenticationException,
@@ -12,34 +26,52 @@ from app.exceptions import (
     NotFoundException,
     ValidationException,
 )
-from app.models import User
+from app.identity import UserIdentity, identity_cache
+from app.models import Liquor, User
+from app.response_cache import response_cache
 from app.services import (
+    EXPORT_FORMATS,
+    batch_belongs_to_user,
     create_api_key,
     create_batch,
     create_batch_formula,
     create_batch_with_ingredients,
     create_ingredient,
     create_liquor,
+    deactivate_api_key,
     delete_api_key,
     delete_batch,
     delete_batch_formula,
     delete_ingredient,
     delete_liquor,
-    get_all_ingredients,
-    get_batch_by_id,
-    get_batch_formula_by_id,
+    export_user_data,
+    get_batch_for_user,
+    get_batch_formula_for_user,
+    get_batch_validator,
+    get_batches_validator,
+    get_formulas_validator,
     get_ingredient_by_id,
+    get_ingredient_catalog,
+    get_ingredient_catalog_validator,
+    get_ingredient_validator,
     get_liquor_by_id,
+    get_liquor_validator,
+    get_liquors_validator,
     get_paginated_api_keys_for_user,
     get_paginated_batches_for_liquor,
     get_paginated_formulas_for_batch,
     get_paginated_liquors_for_user,
+    import_batches,
+    revoke_cached_identities,
+    search_user_data,
+    suggest_ingredients,
     update_batch,
     update_batch_bottles,
     update_batch_formula,
     update_ingredient,
     update_liquor,
 )
+from app.utils import parse_iso_datetime, to_ndjson
 
 # Create a Blueprint object for API endpoints
 api_bp = Blueprint("api", __name__, url_prefix="/api")
@@ -126,7 +158,7 @@ def api_login() -> Any:
 
 @api_v1_bp.route("/auth/api-keys", methods=["POST"])
 @token_required
-def create_api_key_endpoint(current_user: User) -> Any:
+def create_api_key_endpoint(current_user: UserIdentity) -> Any:
     """Create a new API key for the current user"""
     data = request.get_json()
 
@@ -157,16 +189,17 @@ def create_api_key_endpoint(current_user: User) -> Any:
 
 @api_v1_bp.route("/auth/api-keys", methods=["GET"])
 @token_required
-def list_api_keys(current_user: User) -> Any:
+def list_api_keys(current_user: UserIdentity) -> Any:
     """List all API keys for the current user"""
-    # Get pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
+    # Get pagination parameters, max 100 items per page
+    page, per_page, cursor, count = get_pagination_args()
 
-    # Ensure per_page is within reasonable limits
-    per_page = min(per_page, 100)  # Max 100 items per page
-
-    api_keys, total = get_paginated_api_keys_for_user(current_user.id, page, per_page)
+    try:
+        api_keys, total, next_cursor = get_paginated_api_keys_for_user(
+            current_user.id, page, per_page, cursor, count
+        )
+    except ValueError as e:
+        raise ValidationException(str(e))
 
     # Prepare response data
     data = [
@@ -175,18 +208,26 @@ def list_api_keys(current_user: User) -> Any:
             "name": api_key.name,
             "created_at": api_key.created_at.isoformat(),
             "last_used": (api_key.last_used.isoformat() if api_key.last_used else None),
+            "request_count": api_key.request_count,
             "is_active": api_key.is_active,
         }
         for api_key in api_keys
     ]
 
-    response, status_code = paginated_response(data, page, per_page, total)
+    response, status_code = paginated_response(
+        data,
+        None if cursor else page,
+        per_page,
+        total,
+        next_cursor=next_cursor,
+        count=count,
+    )
     return jsonify(response), status_code
 
 
 @api_v1_bp.route("/auth/api-keys/<int:api_key_id>", methods=["DELETE"])
 @token_required
-def delete_api_key_endpoint(current_user: User, api_key_id: int) -> Any:
+def delete_api_key_endpoint(current_user: UserIdentity, api_key_id: int) -> Any:
     """Delete an API key"""
     success, error = delete_api_key(api_key_id, current_user.id)
     if error:
@@ -198,9 +239,34 @@ def delete_api_key_endpoint(current_user: User, api_key_id: int) -> Any:
     return jsonify({}), 204
 
 
+@api_v1_bp.route("/auth/api-keys/<int:api_key_id>/deactivate", methods=["POST"])
+@token_required
+def deactivate_api_key_endpoint(current_user: UserIdentity, api_key_id: int) -> Any:
+    """Deactivate an API key so it can no longer authenticate"""
+    api_key, error = deactivate_api_key(api_key_id, current_user.id)
+    if error:
+        if "not found" in error.lower():
+            raise NotFoundException(error)
+        else:
+            raise InternalServerErrorException(error)
+    if api_key is None:
+        raise NotFoundException("API key not found")
+
+    return (
+        jsonify(
+            {
+                "id": api_key.id,
+                "name": api_key.name,
+                "is_active": api_key.is_active,
+            }
+        ),
+        200,
+    )
+
+
 @api_v1_bp.route("/users/me", methods=["GET"])
 @token_required
-def get_current_user(current_user: User) -> Any:
+def get_current_user(current_user: UserIdentity) -> Any:
     """Get current user profile"""
     return jsonify(
         {
@@ -214,13 +280,18 @@ def get_current_user(current_user: User) -> Any:
 
 @api_v1_bp.route("/users/me", methods=["PUT"])
 @token_required
-def update_current_user(current_user: User) -> Any:
+def update_current_user(current_user: UserIdentity) -> Any:
     """Update current user profile"""
     data = request.get_json()
 
     if not data:
         raise ValidationException("No data provided")
 
+    # The authenticated identity is read-only; load the user row to update it
+    user = db.session.get(User, current_user.id)
+    if not user:
+        raise NotFoundException("User not found")
+
     # Update user fields if provided
     if "username" in data:
         # Check if username is already taken
@@ -231,7 +302,7 @@ def update_current_user(current_user: User) -> Any:
         if existing_user and existing_user.id != current_user.id:
             raise ConflictException("Username already taken")
 
-        current_user.username = data["username"]
+        user.username = data["username"]
 
     if "email" in data:
         # Check if email is already taken
@@ -242,16 +313,18 @@ def update_current_user(current_user: User) -> Any:
         if existing_user and existing_user.id != current_user.id:
             raise ConflictException("Email already taken")
 
-        current_user.email = data["email"]
+        user.email = data["email"]
 
     try:
+        revoke_cached_identities()
         db.session.commit()
+        identity_cache.invalidate_user(user.id)
         return (
             jsonify(
                 {
-                    "id": current_user.id,
-                    "username": current_user.username,
-                    "email": current_user.email,
+                    "id": user.id,
+                    "username": user.username,
+                    "email": user.email,
                     "message": "User updated successfully",
                 }
             ),
@@ -262,37 +335,63 @@ def update_current_user(current_user: User) -> Any:
         raise InternalServerErrorException(f"Failed to update user: {str(e)}")
 
 
+def liquor_stats(liquor: Liquor) -> Dict[str, Any]:
+    """Serialize the batch aggregates of a liquor loaded with stats"""
+    return {
+        "batch_count": liquor.batch_count,
+        "total_bottles": liquor.total_bottles_produced,
+        "total_volume": liquor.total_volume_produced,
+    }
+
+
 @api_v1_bp.route("/liquors", methods=["GET"])
 @token_required
-def get_liquors(current_user: User) -> Any:
+@response_cache.cached("user:{user_id}:liquors", "user:{user_id}:batches")
+def get_liquors(current_user: UserIdentity) -> Any:
     """List all liquors for the current user"""
-    # Get pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
-
-    # Ensure per_page is within reasonable limits
-    per_page = min(per_page, 100)  # Max 100 items per page
-
-    liquors, total = get_paginated_liquors_for_user(current_user.id, page, per_page)
+    # Get pagination parameters, max 100 items per page
+    page, per_page, cursor, count = get_pagination_args()
+    include_stats = "stats" in get_include_args()
 
-    # Prepare response data
-    data = [
-        {
-            "id": liquor.id,
-            "name": liquor.name,
-            "description": liquor.description,
-            "created_at": liquor.created.isoformat(),
-        }
-        for liquor in liquors
-    ]
+    def build() -> Any:
+        try:
+            liquors, total, next_cursor = get_paginated_liquors_for_user(
+                current_user.id, page, per_page, cursor, count, include_stats
+            )
+        except ValueError as e:
+            raise ValidationException(str(e))
+
+        # Prepare response data
+        data = []
+        for liquor in liquors:
+            item = {
+                "id": liquor.id,
+                "name": liquor.name,
+                "description": liquor.description,
+                "created_at": liquor.created.isoformat(),
+            }
+            if include_stats:
+                item["stats"] = liquor_stats(liquor)
+            data.append(item)
+
+        response, status_code = paginated_response(
+            data,
+            None if cursor else page,
+            per_page,
+            total,
+            next_cursor=next_cursor,
+            count=count,
+        )
+        return jsonify(response), status_code
 
-    response, status_code = paginated_response(data, page, per_page, total)
-    return jsonify(response), status_code
+    return conditional_response(
+        get_liquors_validator(current_user.id, include_stats), build
+    )
 
 
 @api_v1_bp.route("/liquors", methods=["POST"])
 @token_required
-def create_liquor_endpoint(current_user: User) -> Any:
+def create_liquor_endpoint(current_user: UserIdentity) -> Any:
     """Create a new liquor"""
     data = request.get_json()
     if not data:
@@ -325,28 +424,35 @@ def create_liquor_endpoint(current_user: User) -> Any:
 
 @api_v1_bp.route("/liquors/<int:liquor_id>", methods=["GET"])
 @token_required
-def get_liquor(current_user: User, liquor_id: int) -> Any:
+@response_cache.cached("user:{user_id}:liquors", "user:{user_id}:batches")
+def get_liquor(current_user: UserIdentity, liquor_id: int) -> Any:
     """Get details of a specific liquor"""
-    liquor = get_liquor_by_id(liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Liquor not found")
+    include_stats = "stats" in get_include_args()
 
-    return (
-        jsonify(
-            {
-                "id": liquor.id,
-                "name": liquor.name,
-                "description": liquor.description,
-                "created_at": liquor.created.isoformat(),
-            }
-        ),
-        200,
+    def build() -> Any:
+        liquor = get_liquor_by_id(liquor_id, current_user.id, include_stats)
+        if not liquor:
+            raise NotFoundException("Liquor not found")
+
+        data = {
+            "id": liquor.id,
+            "name": liquor.name,
+            "description": liquor.description,
+            "created_at": liquor.created.isoformat(),
+        }
+        if include_stats:
+            data["stats"] = liquor_stats(liquor)
+
+        return jsonify(data), 200
+
+    return conditional_response(
+        get_liquor_validator(liquor_id, current_user.id, include_stats), build
     )
 
 
 @api_v1_bp.route("/liquors/<int:liquor_id>", methods=["PUT"])
 @token_required
-def update_liquor_endpoint(current_user: User, liquor_id: int) -> Any:
+def update_liquor_endpoint(current_user: UserIdentity, liquor_id: int) -> Any:
     """Update a specific liquor"""
     data = request.get_json()
     if not data:
@@ -375,7 +481,7 @@ def update_liquor_endpoint(current_user: User, liquor_id: int) -> Any:
 
 @api_v1_bp.route("/liquors/<int:liquor_id>", methods=["DELETE"])
 @token_required
-def delete_liquor_endpoint(current_user: User, liquor_id: int) -> Any:
+def delete_liquor_endpoint(current_user: UserIdentity, liquor_id: int) -> Any:
     """Delete a specific liquor"""
     success = delete_liquor(liquor_id, current_user.id)
     if not success:
@@ -385,18 +491,42 @@ def delete_liquor_endpoint(current_user: User, liquor_id: int) -> Any:
 
 
 @api_v1_bp.route("/ingredients", methods=["GET"])
+@response_cache.cached("ingredients")
 def get_ingredients() -> Any:
     """List all ingredients"""
-    ingredients = get_all_ingredients()
+
+    def build() -> Any:
+        ingredients = get_ingredient_catalog()
+        return (
+            jsonify(
+                [
+                    {
+                        "id": ingredient.id,
+                        "name": ingredient.name,
+                        "description": ingredient.description,
+                        "created_at": ingredient.created_at.isoformat(),
+                    }
+                    for ingredient in ingredients
+                ]
+            ),
+            200,
+        )
+
+    return conditional_response(get_ingredient_catalog_validator(), build)
+
+
+@api_v1_bp.route("/ingredients/suggest", methods=["GET"])
+def suggest_ingredients_endpoint() -> Any:
+    """Autocomplete ingredient names, ignoring case and Polish diacritics"""
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, 50))
+
+    ingredients = suggest_ingredients(query, limit)
     return (
         jsonify(
             [
-                {
-                    "id": ingredient.id,
-                    "name": ingredient.name,
-                    "description": ingredient.description,
-                    "created_at": ingredient.created_at.isoformat(),
-                }
+                {"id": ingredient.id, "name": ingredient.name}
                 for ingredient in ingredients
             ]
         ),
@@ -406,7 +536,7 @@ def get_ingredients() -> Any:
 
 @api_v1_bp.route("/ingredients", methods=["POST"])
 @token_required
-def create_ingredient_endpoint(current_user: User) -> Any:
+def create_ingredient_endpoint(current_user: UserIdentity) -> Any:
     """Create a new ingredient"""
     data = request.get_json()
     if not data:
@@ -416,17 +546,14 @@ def create_ingredient_endpoint(current_user: User) -> Any:
     if not name:
         raise ValidationException("Name is required")
 
-    # Check if ingredient with this name already exists
-    existing_ingredient = get_all_ingredients()
-    for ingredient in existing_ingredient:
-        if ingredient.name.lower() == name.lower():
-            raise ConflictException("Ingredient with this name already exists")
-
     description = data.get("description")
 
+    # Duplicates are found by a probe of the normalized name unique index
     try:
         ingredient = create_ingredient(name=name, description=description)
     except ValueError as e:
+        if "already exists" in str(e):
+            raise ConflictException(str(e))
         raise ValidationException(str(e))
 
     return (
@@ -443,28 +570,33 @@ def create_ingredient_endpoint(current_user: User) -> Any:
 
 
 @api_v1_bp.route("/ingredients/<int:ingredient_id>", methods=["GET"])
+@response_cache.cached("ingredients")
 def get_ingredient(ingredient_id: int) -> Any:
     """Get details of a specific ingredient"""
-    ingredient = get_ingredient_by_id(ingredient_id)
-    if not ingredient:
-        raise NotFoundException("Ingredient not found")
 
-    return (
-        jsonify(
-            {
-                "id": ingredient.id,
-                "name": ingredient.name,
-                "description": ingredient.description,
-                "created_at": ingredient.created_at.isoformat(),
-            }
-        ),
-        200,
-    )
+    def build() -> Any:
+        ingredient = get_ingredient_by_id(ingredient_id)
+        if not ingredient:
+            raise NotFoundException("Ingredient not found")
+
+        return (
+            jsonify(
+                {
+                    "id": ingredient.id,
+                    "name": ingredient.name,
+                    "description": ingredient.description,
+                    "created_at": ingredient.created_at.isoformat(),
+                }
+            ),
+            200,
+        )
+
+    return conditional_response(get_ingredient_validator(ingredient_id), build)
 
 
 @api_v1_bp.route("/ingredients/<int:ingredient_id>", methods=["PUT"])
 @token_required
-def update_ingredient_endpoint(current_user: User, ingredient_id: int) -> Any:
+def update_ingredient_endpoint(current_user: UserIdentity, ingredient_id: int) -> Any:
     """Update a specific ingredient"""
     data = request.get_json()
     if not data:
@@ -473,6 +605,8 @@ def update_ingredient_endpoint(current_user: User, ingredient_id: int) -> Any:
     try:
         ingredient = update_ingredient(ingredient_id, data)
     except ValueError as e:
+        if "already exists" in str(e):
+            raise ConflictException(str(e))
         raise ValidationException(str(e))
 
     if not ingredient:
@@ -493,7 +627,7 @@ def update_ingredient_endpoint(current_user: User, ingredient_id: int) -> Any:
 
 @api_v1_bp.route("/ingredients/<int:ingredient_id>", methods=["DELETE"])
 @token_required
-def delete_ingredient_endpoint(current_user: User, ingredient_id: int) -> Any:
+def delete_ingredient_endpoint(current_user: UserIdentity, ingredient_id: int) -> Any:
     """Delete a specific ingredient"""
     success = delete_ingredient(ingredient_id)
     if not success:
@@ -504,44 +638,56 @@ def delete_ingredient_endpoint(current_user: User, ingredient_id: int) -> Any:
 
 @api_v1_bp.route("/liquors/<int:liquor_id>/batches", methods=["GET"])
 @token_required
-def get_batches(current_user: User, liquor_id: int) -> Any:
+@response_cache.cached("user:{user_id}:batches", "ingredients")
+def get_batches(current_user: UserIdentity, liquor_id: int) -> Any:
     """List all batches for a liquor"""
     # First check if the liquor exists and belongs to the user
     liquor = get_liquor_by_id(liquor_id, current_user.id)
     if not liquor:
         raise NotFoundException("Liquor not found")
 
-    # Get pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
+    # Get pagination parameters, max 100 items per page
+    page, per_page, cursor, count = get_pagination_args()
 
-    # Ensure per_page is within reasonable limits
-    per_page = min(per_page, 100)  # Max 100 items per page
-
-    batches, total = get_paginated_batches_for_liquor(liquor_id, page, per_page)
+    def build() -> Any:
+        try:
+            batches, total, next_cursor = get_paginated_batches_for_liquor(
+                liquor_id, page, per_page, cursor, count
+            )
+        except ValueError as e:
+            raise ValidationException(str(e))
+
+        # Prepare response data
+        data = [
+            {
+                "id": batch.id,
+                "date": batch.date.isoformat(),
+                "description": batch.description,
+                "bottle_count": batch.bottle_count,
+                "bottle_volume": batch.bottle_volume,
+                "bottle_volume_unit": batch.bottle_volume_unit,
+                "total_volume": batch.total_volume,
+                "ingredient_count": batch.ingredient_count,
+            }
+            for batch in batches
+        ]
+
+        response, status_code = paginated_response(
+            data,
+            None if cursor else page,
+            per_page,
+            total,
+            next_cursor=next_cursor,
+            count=count,
+        )
+        return jsonify(response), status_code
 
-    # Prepare response data
-    data = [
-        {
-            "id": batch.id,
-            "date": batch.date.isoformat(),
-            "description": batch.description,
-            "bottle_count": batch.bottle_count,
-            "bottle_volume": batch.bottle_volume,
-            "bottle_volume_unit": batch.bottle_volume_unit,
-            "total_volume": batch.total_volume,
-            "ingredient_count": batch.ingredient_count,
-        }
-        for batch in batches
-    ]
-
-    response, status_code = paginated_response(data, page, per_page, total)
-    return jsonify(response), status_code
+    return conditional_response(get_batches_validator(liquor_id), build)
 
 
 @api_v1_bp.route("/liquors/<int:liquor_id>/batches", methods=["POST"])
 @token_required
-def create_batch_endpoint(current_user: User, liquor_id: int) -> Any:
+def create_batch_endpoint(current_user: UserIdentity, liquor_id: int) -> Any:
     """Create a new batch"""
     # First check if the liquor exists and belongs to the user
     liquor = get_liquor_by_id(liquor_id, current_user.id)
@@ -563,24 +709,12 @@ def create_batch_endpoint(current_user: User, liquor_id: int) -> Any:
 
     # Handle date if provided
     if "date" in data:
-        try:
-            # Parse the date string and convert to datetime
-            from datetime import datetime
-
-            date_str = data["date"]
-            if isinstance(date_str, str):
-                # Try to parse as date first, then as datetime
-                try:
-                    from datetime import date
-
-                    parsed_date = date.fromisoformat(date_str)
-                    batch_data["date"] = datetime.combine(
-                        parsed_date, datetime.min.time()
-                    )
-                except ValueError:
-                    batch_data["date"] = datetime.fromisoformat(date_str)
-        except ValueError:
-            raise ValidationException("Invalid date format")
+        date_str = data["date"]
+        if isinstance(date_str, str):
+            try:
+                batch_data["date"] = parse_iso_datetime(date_str)
+            except ValueError:
+                raise ValidationException("Invalid date format")
 
     # If ingredients are provided, use the create_batch_with_ingredients service
     if "ingredients" in data:
@@ -613,63 +747,99 @@ def create_batch_endpoint(current_user: User, liquor_id: int) -> Any:
     )
 
 
-@api_v1_bp.route("/batches/<int:batch_id>", methods=["GET"])
+@api_v1_bp.route("/batches/bulk", methods=["POST"])
 @token_required
-def get_batch(current_user: User, batch_id: int) -> Any:
-    """Get details of a specific batch"""
-    batch = get_batch_by_id(batch_id)
-    if not batch:
-        raise NotFoundException("Batch not found")
+def bulk_create_batches_endpoint(current_user: UserIdentity) -> Any:
+    """Create many batches with their formulas in one request"""
+    data = request.get_json()
+    if not data or not isinstance(data, dict):
+        raise ValidationException("No data provided")
 
-    # Check if the batch belongs to a liquor that belongs to the user
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Batch not found")
+    batches = data.get("batches")
+    if not isinstance(batches, list) or not batches:
+        raise ValidationException("batches must be a non-empty list")
 
-    # Include formulas data in the response
-    formulas_data = []
-    for formula in batch.formulas:
-        formulas_data.append(
-            {
-                "id": formula.id,
-                "ingredient_id": formula.ingredient_id,
-                "ingredient_name": formula.ingredient.name,
-                "quantity": formula.quantity,
-                "unit": formula.unit,
-            }
+    max_batches = current_app.config.get("BULK_IMPORT_MAX_BATCHES", 1000)
+    if len(batches) > max_batches:
+        raise ValidationException(
+            f"At most {max_batches} batches can be imported at once",
+            details={"max_batches": max_batches},
+        )
+
+    mode = data.get("mode", "all_or_nothing")
+    try:
+        results = import_batches(current_user.id, batches, mode)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+    created = sum(1 for result in results if result["status"] == "created")
+    failed = sum(1 for result in results if result["status"] == "error")
+    if created == 0 and failed:
+        raise ValidationException(
+            "No batches were imported",
+            details={
+                "results": [result for result in results if result["status"] == "error"]
+            },
         )
 
     return (
-        jsonify(
-            {
-                "id": batch.id,
-                "date": batch.date.isoformat(),
-                "description": batch.description,
-                "bottle_count": batch.bottle_count,
-                "bottle_volume": batch.bottle_volume,
-                "bottle_volume_unit": batch.bottle_volume_unit,
-                "total_volume": batch.total_volume,
-                "ingredient_count": batch.ingredient_count,
-                "formulas": formulas_data,
-            }
-        ),
-        200,
+        jsonify({"created": created, "failed": failed, "results": results}),
+        201 if not failed else 200,
     )
 
 
+@api_v1_bp.route("/batches/<int:batch_id>", methods=["GET"])
+@token_required
+@response_cache.cached("user:{user_id}:batches", "ingredients")
+def get_batch(current_user: UserIdentity, batch_id: int) -> Any:
+    """Get details of a specific batch"""
+
+    def build() -> Any:
+        batch = get_batch_for_user(batch_id, current_user.id, with_formulas=True)
+        if not batch:
+            raise NotFoundException("Batch not found")
+
+        # Include formulas data in the response
+        formulas_data = []
+        for formula in batch.formulas:
+            formulas_data.append(
+                {
+                    "id": formula.id,
+                    "ingredient_id": formula.ingredient_id,
+                    "ingredient_name": formula.ingredient.name,
+                    "quantity": formula.quantity,
+                    "unit": formula.unit,
+                }
+            )
+
+        return (
+            jsonify(
+                {
+                    "id": batch.id,
+                    "date": batch.date.isoformat(),
+                    "description": batch.description,
+                    "bottle_count": batch.bottle_count,
+                    "bottle_volume": batch.bottle_volume,
+                    "bottle_volume_unit": batch.bottle_volume_unit,
+                    "total_volume": batch.total_volume,
+                    "ingredient_count": batch.ingredient_count,
+                    "formulas": formulas_data,
+                }
+            ),
+            200,
+        )
+
+    return conditional_response(get_batch_validator(batch_id, current_user.id), build)
+
+
 @api_v1_bp.route("/batches/<int:batch_id>", methods=["PUT"])
 @token_required
-def update_batch_endpoint(current_user: User, batch_id: int) -> Any:
+def update_batch_endpoint(current_user: UserIdentity, batch_id: int) -> Any:
     """Update a specific batch"""
-    batch = get_batch_by_id(batch_id)
+    batch = get_batch_for_user(batch_id, current_user.id)
     if not batch:
         raise NotFoundException("Batch not found")
 
-    # Check if the batch belongs to a liquor that belongs to the user
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Batch not found")
-
     data = request.get_json()
     if not data:
         raise ValidationException("No data provided")
@@ -678,13 +848,10 @@ def update_batch_endpoint(current_user: User, batch_id: int) -> Any:
     data.pop("liquor_id", None)
 
     try:
-        updated_batch = update_batch(batch_id, data)
+        updated_batch = update_batch(batch, data)
     except ValueError as e:
         raise ValidationException(str(e))
 
-    if not updated_batch:
-        raise NotFoundException("Batch not found")
-
     return (
         jsonify(
             {
@@ -704,37 +871,21 @@ def update_batch_endpoint(current_user: User, batch_id: int) -> Any:
 
 @api_v1_bp.route("/batches/<int:batch_id>", methods=["DELETE"])
 @token_required
-def delete_batch_endpoint(current_user: User, batch_id: int) -> Any:
+def delete_batch_endpoint(current_user: UserIdentity, batch_id: int) -> Any:
     """Delete a specific batch"""
-    batch = get_batch_by_id(batch_id)
+    batch = get_batch_for_user(batch_id, current_user.id)
     if not batch:
         raise NotFoundException("Batch not found")
 
-    # Check if the batch belongs to a liquor that belongs to the user
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Batch not found")
-
-    success = delete_batch(batch_id)
-    if not success:
-        raise NotFoundException("Batch not found")
+    delete_batch(batch)
 
     return jsonify({}), 204
 
 
 @api_v1_bp.route("/batches/<int:batch_id>/bottles", methods=["PUT"])
 @token_required
-def update_batch_bottles_endpoint(current_user: User, batch_id: int) -> Any:
+def update_batch_bottles_endpoint(current_user: UserIdentity, batch_id: int) -> Any:
     """Update bottle information for a batch"""
-    batch = get_batch_by_id(batch_id)
-    if not batch:
-        raise NotFoundException("Batch not found")
-
-    # Check if the batch belongs to a liquor that belongs to the user
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Batch not found")
-
     data = request.get_json()
     if not data:
         raise ValidationException("No data provided")
@@ -746,8 +897,12 @@ def update_batch_bottles_endpoint(current_user: User, batch_id: int) -> Any:
         "bottle_volume_unit": data.get("bottle_volume_unit", "ml"),
     }
 
+    # The service loads the batch scoped to the user, so a foreign or missing
+    # batch comes back as "not found"
     updated_batch, error = update_batch_bottles(batch_id, current_user.id, form_data)
     if error:
+        if "not found" in error:
+            raise NotFoundException("Batch not found")
         # Check if it's a conflict error
         if "already exists" in error:
             raise ConflictException(error)
@@ -773,53 +928,55 @@ def update_batch_bottles_endpoint(current_user: User, batch_id: int) -> Any:
 
 @api_v1_bp.route("/batches/<int:batch_id>/formulas", methods=["GET"])
 @token_required
-def get_batch_formulas(current_user: User, batch_id: int) -> Any:
+@response_cache.cached("user:{user_id}:batches", "ingredients")
+def get_batch_formulas(current_user: UserIdentity, batch_id: int) -> Any:
     """List all formulas for a batch"""
     # First check if the batch exists and belongs to a liquor that belongs to the user
-    batch = get_batch_by_id(batch_id)
-    if not batch:
+    if not batch_belongs_to_user(batch_id, current_user.id):
         raise NotFoundException("Batch not found")
 
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Batch not found")
-
-    # Get pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
-
-    # Ensure per_page is within reasonable limits
-    per_page = min(per_page, 100)  # Max 100 items per page
-
-    formulas, total = get_paginated_formulas_for_batch(batch_id, page, per_page)
+    # Get pagination parameters, max 100 items per page
+    page, per_page, cursor, count = get_pagination_args()
 
-    # Prepare response data
-    data = [
-        {
-            "id": formula.id,
-            "ingredient_id": formula.ingredient_id,
-            "ingredient_name": formula.ingredient.name,
-            "quantity": formula.quantity,
-            "unit": formula.unit,
-        }
-        for formula in formulas
-    ]
+    def build() -> Any:
+        try:
+            formulas, total, next_cursor = get_paginated_formulas_for_batch(
+                batch_id, page, per_page, cursor, count
+            )
+        except ValueError as e:
+            raise ValidationException(str(e))
+
+        # Prepare response data
+        data = [
+            {
+                "id": formula.id,
+                "ingredient_id": formula.ingredient_id,
+                "ingredient_name": formula.ingredient.name,
+                "quantity": formula.quantity,
+                "unit": formula.unit,
+            }
+            for formula in formulas
+        ]
+
+        response, status_code = paginated_response(
+            data,
+            None if cursor else page,
+            per_page,
+            total,
+            next_cursor=next_cursor,
+            count=count,
+        )
+        return jsonify(response), status_code
 
-    response, status_code = paginated_response(data, page, per_page, total)
-    return jsonify(response), status_code
+    return conditional_response(get_formulas_validator(batch_id), build)
 
 
 @api_v1_bp.route("/batches/<int:batch_id>/formulas", methods=["POST"])
 @token_required
-def create_batch_formula_endpoint(current_user: User, batch_id: int) -> Any:
+def create_batch_formula_endpoint(current_user: UserIdentity, batch_id: int) -> Any:
     """Add a formula to a batch"""
     # First check if the batch exists and belongs to a liquor that belongs to the user
-    batch = get_batch_by_id(batch_id)
-    if not batch:
-        raise NotFoundException("Batch not found")
-
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
+    if not batch_belongs_to_user(batch_id, current_user.id):
         raise NotFoundException("Batch not found")
 
     data = request.get_json()
@@ -867,22 +1024,14 @@ def create_batch_formula_endpoint(current_user: User, batch_id: int) -> Any:
 
 @api_v1_bp.route("/formulas/<int:formula_id>", methods=["PUT"])
 @token_required
-def update_batch_formula_endpoint(current_user: User, formula_id: int) -> Any:
+def update_batch_formula_endpoint(current_user: UserIdentity, formula_id: int) -> Any:
     """Update a specific formula"""
     # First check if the formula exists and belongs to a batch that belongs to a liquor
     # that belongs to the user
-    formula = get_batch_formula_by_id(formula_id)
+    formula = get_batch_formula_for_user(formula_id, current_user.id)
     if not formula:
         raise NotFoundException("Formula not found")
 
-    batch = get_batch_by_id(formula.batch_id)
-    if not batch:
-        raise NotFoundException("Formula not found")
-
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Formula not found")
-
     data = request.get_json()
     if not data:
         raise ValidationException("No data provided")
@@ -894,7 +1043,7 @@ def update_batch_formula_endpoint(current_user: User, formula_id: int) -> Any:
         except ValueError:
             raise ValidationException("quantity must be a valid number")
 
-    updated_formula, error = update_batch_formula(formula_id, data)
+    updated_formula, error = update_batch_formula(formula, data)
     if error:
         raise ValidationException(error)
 
@@ -914,24 +1063,72 @@ def update_batch_formula_endpoint(current_user: User, formula_id: int) -> Any:
 
 @api_v1_bp.route("/formulas/<int:formula_id>", methods=["DELETE"])
 @token_required
-def delete_batch_formula_endpoint(current_user: User, formula_id: int) -> Any:
+def delete_batch_formula_endpoint(current_user: UserIdentity, formula_id: int) -> Any:
     """Delete a specific formula"""
     # First check if the formula exists and belongs to a batch that belongs to a liquor
     # that belongs to the user
-    formula = get_batch_formula_by_id(formula_id)
+    formula = get_batch_formula_for_user(formula_id, current_user.id)
     if not formula:
         raise NotFoundException("Formula not found")
 
-    batch = get_batch_by_id(formula.batch_id)
-    if not batch:
-        raise NotFoundException("Formula not found")
-
-    liquor = get_liquor_by_id(batch.liquor_id, current_user.id)
-    if not liquor:
-        raise NotFoundException("Formula not found")
-
-    success = delete_batch_formula(formula_id)
+    success = delete_batch_formula(formula)
     if not success:
         raise InternalServerErrorException("Failed to delete formula")
 
     return jsonify({}), 204
+
+
+@api_v1_bp.route("/export", methods=["GET"])
+@token_required
+def export_data(current_user: UserIdentity) -> Any:
+    """Stream all of the user's liquors, batches and formulas"""
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationException(
+            f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+            details={"format": export_format},
+        )
+
+    records = export_user_data(current_user.id)
+    return Response(
+        stream_with_context(to_ndjson(record) for record in records),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="nalewka-export.ndjson"'},
+    )
+
+
+@api_v1_bp.route("/search", methods=["GET"])
+@token_required
+def search_endpoint(current_user: UserIdentity) -> Any:
+    """Full-text search across the user's liquors, batches and ingredients"""
+    query = request.args.get("q", "")
+    page, per_page, cursor, count = get_pagination_args()
+
+    try:
+        rows, total, next_cursor = search_user_data(
+            current_user.id, query, page, per_page, cursor, count
+        )
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+    data = [
+        {
+            "type": row.kind,
+            "id": row.object_id,
+            "liquor_id": row.liquor_id,
+            "title": row.title,
+            # Lower ranks are better on both backends; flip it for clients
+            "score": -row.rank,
+        }
+        for row in rows
+    ]
+
+    response, status_code = paginated_response(
+        data,
+        None if cursor else page,
+        per_page,
+        total,
+        next_cursor=next_cursor,
+        count=count,
+    )
+    return jsonify(response), status_code
@@ -1,4 +1,10 @@
-from typing import Any, Dict, Optional, Tuple
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Sequence, Set, Tuple
+
+from flask import Response, g, make_response, request
+
+from app.exceptions import ValidationException
 
 
 def success_response(
@@ -23,19 +29,92 @@ def error_response(
     return response, status_code
 
 
+def get_pagination_args(
+    default_per_page: int = 10, max_per_page: int = 100
+) -> Tuple[int, int, Optional[str], str]:
+    """
+    Read page, per_page, cursor and count from the query string.
+    Returns (page, per_page, cursor, count).
+    """
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", default_per_page, type=int)
+    per_page = max(1, min(per_page, max_per_page))
+    cursor = request.args.get("cursor") or None
+
+    # Cursor clients usually scroll forward only, so skip the count by default
+    count = request.args.get("count", "none" if cursor else "exact")
+    if count not in ("exact", "estimate", "none"):
+        raise ValidationException(
+            "count must be one of: exact, estimate, none",
+            details={"count": count},
+        )
+    return page, per_page, cursor, count
+
+
+def get_include_args() -> Set[str]:
+    """Read the comma-separated ``include`` query parameter into a set"""
+    include = request.args.get("include", "")
+    return {part.strip() for part in include.split(",") if part.strip()}
+
+
 def paginated_response(
-    data: list, page: int, per_page: int, total: int, message: Optional[str] = None
+    data: list,
+    page: Optional[int],
+    per_page: int,
+    total: Optional[int],
+    message: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    count: str = "exact",
 ) -> Tuple[Dict[str, Any], int]:
     """Create a paginated response"""
+    pagination: Dict[str, Any] = {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": (total + per_page - 1) // per_page if total is not None else None,
+        "next_cursor": next_cursor,
+    }
+    if count != "exact":
+        pagination["count"] = count
     response = {
         "data": data,
-        "pagination": {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "pages": (total + per_page - 1) // per_page,
-        },
+        "pagination": pagination,
     }
     if message:
         response["message"] = message
     return response, 200
+
+
+def conditional_response(
+    validator: Optional[Sequence[Any]], build: Callable[[], Any]
+) -> Response:
+    """
+    Answer a GET with 304 Not Modified when If-None-Match carries the ETag of
+    ``validator``, a cheap summary of the data such as (count,
+    max(updated_at)), without calling ``build``. Otherwise build the response
+    and tag it with ETag and Last-Modified. A None validator (nothing found)
+    always builds, so the usual 404 is returned.
+    """
+    if validator is None:
+        return make_response(build())
+
+    # The URL covers pagination and include options; the user id keeps
+    # validators of different accounts apart
+    raw = repr((request.full_path, g.get("user_id"), tuple(validator)))
+    etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    timestamps = [value for value in validator if isinstance(value, datetime)]
+    last_modified = max(timestamps) if timestamps else None
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Only the client may keep a copy, and it has to revalidate it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -1,13 +1,15 @@
 import datetime
 from functools import wraps
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional, cast
 
 import jwt
-from flask import current_app, jsonify, request
+from flask import current_app, g, jsonify, request
 
 from app import db
+from app.identity import UserIdentity, identity_cache
 from app.models import User
 from app.repositories import ApiKeyRepository
+from app.usage import api_key_usage
 
 api_key_repository = ApiKeyRepository()
 
@@ -32,23 +34,37 @@ def encode_auth_token(user_id: int) -> Optional[str]:
         return None
 
 
-def decode_auth_token(auth_token: str) -> Optional[int]:
+def decode_auth_payload(auth_token: str) -> Optional[Dict[str, Any]]:
     """
-    Decodes the auth token
+    Decodes and verifies the auth token
     :param auth_token: Authentication token
-    :return: user ID or None
+    :return: token payload or None
     """
     try:
-        payload = jwt.decode(
-            auth_token, current_app.config.get("SECRET_KEY"), algorithms=["HS256"]
+        return cast(
+            Dict[str, Any],
+            jwt.decode(
+                auth_token, current_app.config.get("SECRET_KEY"), algorithms=["HS256"]
+            ),
         )
-        return int(payload["sub"])  # Convert back to integer
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
 
+def decode_auth_token(auth_token: str) -> Optional[int]:
+    """
+    Decodes the auth token
+    :param auth_token: Authentication token
+    :return: user ID or None
+    """
+    payload = decode_auth_payload(auth_token)
+    if not payload:
+        return None
+    return int(payload["sub"])  # Convert back to integer
+
+
 def token_required(f: Callable) -> Callable:
     """
     Decorator for requiring token authentication
@@ -66,15 +82,26 @@ def token_required(f: Callable) -> Callable:
         if not token:
             return jsonify({"message": "Token is missing"}), 401
 
-        user_id = decode_auth_token(token)
-        if not user_id:
+        # A cached identity skips both JWT verification and the user lookup
+        cached = identity_cache.get("token", token)
+        if cached:
+            g.user_id = cached.identity.id
+            kwargs["current_user"] = cached.identity
+            return f(*args, **kwargs)
+
+        payload = decode_auth_payload(token)
+        if not payload:
             return jsonify({"message": "Token is invalid or expired"}), 401
 
-        current_user = db.session.get(User, user_id)
-        if not current_user:
+        user = db.session.get(User, int(payload["sub"]))
+        if not user:
             return jsonify({"message": "User not found"}), 401
 
+        current_user = UserIdentity.from_user(user)
+        identity_cache.set("token", token, current_user, expires_at=payload["exp"])
+
         # Add current_user to kwargs so it can be accessed in the route
+        g.user_id = current_user.id
         kwargs["current_user"] = current_user
         return f(*args, **kwargs)
 
@@ -99,17 +126,25 @@ def api_key_required(f: Callable) -> Callable:
         if not api_key:
             return jsonify({"message": "API key is missing"}), 401
 
-        # Look up the API key in the database
-        api_key_obj = api_key_repository.get_by_key(api_key)
-        if not api_key_obj or not api_key_obj.is_active:
-            return jsonify({"message": "Invalid or inactive API key"}), 401
+        cached = identity_cache.get("api_key", api_key)
+        if cached and cached.api_key_id is not None:
+            api_key_id, current_user = cached.api_key_id, cached.identity
+        else:
+            # Look up the API key and its user in the database
+            api_key_obj = api_key_repository.get_by_key_with_user(api_key)
+            if not api_key_obj or not api_key_obj.is_active:
+                return jsonify({"message": "Invalid or inactive API key"}), 401
 
-        # Update last used timestamp
-        api_key_obj.last_used = datetime.datetime.utcnow()
-        db.session.commit()
+            api_key_id = api_key_obj.id
+            current_user = UserIdentity.from_user(api_key_obj.user)
+            identity_cache.set("api_key", api_key, current_user, api_key_id)
+
+        # Record usage; last_used is written behind in batches
+        api_key_usage.record(api_key_id)
 
         # Add current_user to kwargs so it can be accessed in the route
-        kwargs["current_user"] = api_key_obj.user
+        g.user_id = current_user.id
+        kwargs["current_user"] = current_user
         return f(*args, **kwargs)
 
     return decorated
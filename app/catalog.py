@@ -0,0 +1,169 @@
+import bisect
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from flask import has_request_context, request
+
+from app.utils import fold_diacritics, normalize_name
+
+if TYPE_CHECKING:
+    from app.repositories import IngredientRepository
+
+# Marks the current request as having already probed the catalog version
+_CHECKED_KEY = "nalewka.ingredient_catalog_checked"
+
+
+class CatalogEntry(NamedTuple):
+    id: int
+    name: str
+    name_lower: str
+    description: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+class IngredientCatalog:
+    """
+    Process-local copy of the shared ingredient catalog.
+
+    Every ingredient write bumps the "ingredients" row in cache_version in the
+    same transaction. Readers compare that single integer with the version
+    they loaded (at most once per request) and only reload the table when it
+    changed, so each gunicorn worker notices writes made by any other worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._entries: List[CatalogEntry] = []
+        self._by_id: Dict[int, CatalogEntry] = {}
+        self._by_name_lower: Dict[str, CatalogEntry] = {}
+        self._ids: FrozenSet[int] = frozenset()
+        self._validator: Tuple[int, Optional[datetime]] = (0, None)
+        # Sorted (folded key, entry id) pairs searched with bisect for prefixes:
+        # whole names first, then names from their second word onwards
+        self._name_keys: List[Tuple[str, int]] = []
+        self._word_keys: List[Tuple[str, int]] = []
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def entries(self) -> List[CatalogEntry]:
+        """All ingredients ordered by id"""
+        self._refresh()
+        return self._entries
+
+    def get(self, ingredient_id: int) -> Optional[CatalogEntry]:
+        self._refresh()
+        return self._by_id.get(ingredient_id)
+
+    def find_by_name(self, name: str) -> Optional[CatalogEntry]:
+        """Case-insensitive lookup by name"""
+        self._refresh()
+        return self._by_name_lower.get(normalize_name(name))
+
+    def ids(self) -> FrozenSet[int]:
+        """Ids of all ingredients, for O(1) membership checks"""
+        self._refresh()
+        return self._ids
+
+    def validator(self) -> Tuple[int, Optional[datetime]]:
+        """(count, latest updated_at) of the catalog, for conditional requests"""
+        self._refresh()
+        return self._validator
+
+    def suggest(self, query: str, limit: int = 10) -> List[CatalogEntry]:
+        """
+        Ingredients whose name, or any later word in it, starts with ``query``,
+        ignoring case and diacritics. Whole-name matches come first.
+        """
+        prefix = " ".join(fold_diacritics(query).split())
+        if not prefix or limit <= 0:
+            return []
+        self._refresh()
+
+        matches: List[CatalogEntry] = []
+        seen = set()
+        for keys in (self._name_keys, self._word_keys):
+            index = bisect.bisect_left(keys, (prefix,))
+            while index < len(keys) and len(matches) < limit:
+                key, entry_id = keys[index]
+                if not key.startswith(prefix):
+                    break
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    matches.append(self._by_id[entry_id])
+                index += 1
+        return matches
+
+    def choices(self) -> List[Tuple[int, str]]:
+        """(id, name) pairs for select fields"""
+        return [(entry.id, entry.name) for entry in self.entries()]
+
+    def invalidate(self) -> None:
+        """Force a reload on the next read, including later in this request"""
+        with self._lock:
+            self._version = None
+        if has_request_context():
+            request.environ.pop(_CHECKED_KEY, None)
+
+    def _refresh(self) -> None:
+        # One version probe per request is enough; outside requests always probe
+        if has_request_context() and request.environ.get(_CHECKED_KEY):
+            return
+
+        from app.repositories import IngredientRepository
+
+        repository = IngredientRepository()
+        version = repository.get_catalog_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._load(repository, version)
+
+        if has_request_context():
+            request.environ[_CHECKED_KEY] = True
+
+    def _load(self, repository: "IngredientRepository", version: int) -> None:
+        rows = repository.get_catalog_rows()
+        entries = [
+            CatalogEntry(
+                id=row.id,
+                name=row.name,
+                name_lower=normalize_name(row.name),
+                description=row.description,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in rows
+        ]
+        self._entries = entries
+        self._by_id = {entry.id: entry for entry in entries}
+        self._by_name_lower = {entry.name_lower: entry for entry in entries}
+        self._ids = frozenset(self._by_id)
+        self._validator = (
+            len(entries),
+            max((entry.updated_at for entry in entries), default=None),
+        )
+        self._name_keys, self._word_keys = self._build_prefix_index(entries)
+        self._version = version
+
+    @staticmethod
+    def _build_prefix_index(
+        entries: List[CatalogEntry],
+    ) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        name_keys = []
+        word_keys = []
+        for entry in entries:
+            words = fold_diacritics(entry.name).split()
+            name_keys.append((" ".join(words), entry.id))
+            for position in range(1, len(words)):
+                word_keys.append((" ".join(words[position:]), entry.id))
+        name_keys.sort()
+        word_keys.sort()
+        return name_keys, word_keys
+
+
+ingredient_catalog = IngredientCatalog()
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional, Tuple
+from typing import Any, Collection, List, Optional, Tuple
 
 from flask_wtf import FlaskForm
 from wtforms import (
@@ -77,13 +77,31 @@ class LiquorForm(FlaskForm):
     submit = SubmitField("Create Liquor")
 
 
+class IngredientSelectField(SelectField):
+    """
+    SelectField that validates against a set of ids when one is given,
+    instead of scanning every (id, name) choice.
+    """
+
+    valid_ids: Optional[Collection[int]] = None
+
+    def pre_validate(self, form: Any) -> None:
+        if self.valid_ids is None:
+            super().pre_validate(form)
+        elif self.data not in self.valid_ids:
+            raise ValidationError(self.gettext("Not a valid choice."))
+
+
 class IngredientEntryForm(Form):
-    ingredient = SelectField("Ingredient", coerce=int, validators=[DataRequired()])
+    ingredient = IngredientSelectField(
+        "Ingredient", coerce=int, validators=[DataRequired()]
+    )
 
     def __init__(
         self,
         *args: Any,
         ingredient_choices: Optional[List[Tuple[int, str]]] = None,
+        ingredient_ids: Optional[Collection[int]] = None,
         **kwargs: Any
     ) -> None:
         super().__init__(*args, **kwargs)
@@ -91,6 +109,7 @@ class IngredientEntryForm(Form):
             self.ingredient.choices = ingredient_choices
         else:
             self.ingredient.choices = []
+        self.ingredient.valid_ids = ingredient_ids
 
     quantity = FloatField(
         "Quantity",
@@ -162,12 +181,11 @@ class BatchFormulaForm(FlaskForm):
             (liquor.id, liquor.name)
             for liquor in liquor_repository.get_all_for_user(user_id)
         ]
-        ingredient_choices = [
-            (ingredient.id, ingredient.name)
-            for ingredient in ingredient_repository.get_all()
-        ]
+        ingredient_choices = ingredient_repository.get_choices()
+        ingredient_ids = ingredient_repository.get_ids()
         for entry in self.ingredients:
             entry.form.ingredient.choices = ingredient_choices
+            entry.form.ingredient.valid_ids = ingredient_ids
 
 
 class EditBottlesForm(FlaskForm):
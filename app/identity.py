@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+from flask import Flask, has_request_context, request
+
+# Marks the current request as having already probed the identity version
+_CHECKED_KEY = "nalewka.identity_cache_checked"
+
+
+class UserIdentity(NamedTuple):
+    """Lightweight, session-independent view of an authenticated user"""
+
+    id: int
+    username: str
+    email: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: Any) -> "UserIdentity":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+        )
+
+
+class CachedIdentity(NamedTuple):
+    identity: UserIdentity
+    api_key_id: Optional[int]
+    expires_at: float
+
+
+class IdentityCache:
+    """
+    Bounded LRU cache of resolved credentials with a TTL.
+
+    Entries are keyed by a SHA-256 of the JWT or API key, so raw credentials
+    are never kept in memory longer than the request. Deactivating or deleting
+    an API key and updating a user bump the "identities" row in cache_version;
+    each worker compares it with the version its entries were cached under (at
+    most once per request) and drops them all when another worker revoked
+    something. A TTL of 0 disables the cache.
+    """
+
+    # cache_version row bumped whenever a cached identity may have gone stale
+    VERSION = "identities"
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[str, CachedIdentity]" = OrderedDict()
+
+    def init_app(self, app: Flask) -> None:
+        self.max_size = int(app.config.get("IDENTITY_CACHE_SIZE", self.max_size))
+        self.ttl = float(app.config.get("IDENTITY_CACHE_TTL", self.ttl))
+        self.clear()
+        app.extensions["identity_cache"] = self
+
+    @staticmethod
+    def cache_key(kind: str, credential: str) -> str:
+        digest = hashlib.sha256(credential.encode("utf-8")).hexdigest()
+        return f"{kind}:{digest}"
+
+    def get(self, kind: str, credential: str) -> Optional[CachedIdentity]:
+        if self.ttl <= 0:
+            return None
+        key = self.cache_key(kind, credential)
+        if key not in self._entries and self._version is not None:
+            # A miss reads the database anyway, so only hits probe the version,
+            # plus the first lookup that sets the version entries are cached at
+            return None
+        self._check_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(
+        self,
+        kind: str,
+        credential: str,
+        identity: UserIdentity,
+        api_key_id: Optional[int] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Cache an identity. ``expires_at`` (a time.time() timestamp, such as a
+        JWT exp claim) caps the TTL so an entry never outlives the credential.
+        """
+        if self.ttl <= 0:
+            return
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+            if ttl <= 0:
+                return
+        key = self.cache_key(kind, credential)
+        with self._lock:
+            self._entries[key] = CachedIdentity(
+                identity, api_key_id, time.monotonic() + ttl
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached credential that resolves to ``user_id``"""
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if entry.identity.id == user_id
+            ]:
+                del self._entries[key]
+
+    def invalidate_api_key(self, api_key_id: int) -> None:
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if entry.api_key_id == api_key_id
+            ]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def _check_version(self) -> None:
+        # Only requests resolve credentials, and one probe per request is enough
+        if not has_request_context() or request.environ.get(_CHECKED_KEY):
+            return
+        request.environ[_CHECKED_KEY] = True
+
+        from app.repositories import CacheVersionRepository
+
+        version = CacheVersionRepository().get_version(self.VERSION)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+identity_cache = IdentityCache()
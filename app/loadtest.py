@@ -0,0 +1,381 @@
+import http.client
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Protocol, Tuple
+from urllib.parse import urlsplit
+
+from flask import Flask
+
+from app.metrics import LATENCY_BUCKETS
+
+API_PREFIX = "/api/v1"
+
+# Relative weight of each operation in the default mix
+DEFAULT_MIX: Dict[str, int] = {
+    "login": 1,
+    "list_liquors": 30,
+    "list_batches": 25,
+    "get_batch": 30,
+    "create_batch": 5,
+    "update_bottles": 9,
+}
+
+
+class Sample(NamedTuple):
+    """One timed request."""
+
+    operation: str
+    status: int
+    seconds: float
+
+
+class Result(NamedTuple):
+    """Response of a transport: status code and decoded JSON body."""
+
+    status: int
+    body: Any
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """
+    Parse "list_liquors=30,get_batch=10" into a mix. Operations that are not
+    named keep no weight, so the string describes the whole mix.
+    """
+    mix: Dict[str, int] = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(
+                f"Unknown operation '{name}', expected one of {', '.join(DEFAULT_MIX)}"
+            )
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"Weight of '{name}' must be an integer")
+        if mix[name] < 0:
+            raise ValueError(f"Weight of '{name}' must not be negative")
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one operation with a weight")
+    return mix
+
+
+class Transport(Protocol):
+    """What a Worker needs to send its requests"""
+
+    def request(
+        self, method: str, path: str, body: Any = None, headers: Optional[dict] = None
+    ) -> Result: ...
+
+    def close(self) -> None: ...
+
+
+class ClientTransport:
+    """Sends requests through the Flask test client, in this process."""
+
+    def __init__(self, app: Flask) -> None:
+        self.client = app.test_client()
+
+    def request(
+        self, method: str, path: str, body: Any = None, headers: Optional[dict] = None
+    ) -> Result:
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return Result(response.status_code, response.get_json(silent=True))
+
+    def close(self) -> None:
+        pass
+
+
+class HTTPTransport:
+    """Sends requests to a running server over one keep-alive connection."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Expected an http(s) URL, got '{base_url}'")
+        self.scheme, self.netloc = url.scheme, url.netloc
+        self.root = url.path.rstrip("/")
+        self.timeout = timeout
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.connection is None:
+            connection_class = (
+                http.client.HTTPSConnection
+                if self.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self.connection = connection_class(self.netloc, timeout=self.timeout)
+        return self.connection
+
+    def request(
+        self, method: str, path: str, body: Any = None, headers: Optional[dict] = None
+    ) -> Result:
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        connection = self._connect()
+        try:
+            connection.request(method, self.root + path, payload, headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request instead of reusing a broken socket
+            self.close()
+            raise
+        try:
+            return Result(response.status, json.loads(data) if data else None)
+        except ValueError:
+            return Result(response.status, None)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Worker:
+    """
+    Replays the mix as one API client: logs in, discovers its liquors and
+    batches and then picks a weighted random operation until told to stop.
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        mix: Dict[str, int],
+        rng: random.Random,
+        username: str = "",
+        password: str = "",
+        token: Optional[str] = None,
+    ) -> None:
+        self.transport = transport
+        self.operations = [name for name, weight in mix.items() if weight]
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = rng
+        self.username = username
+        self.password = password
+        self.token = token
+        self.liquor_ids: List[int] = []
+        self.batch_ids: List[int] = []
+        self.samples: List[Sample] = []
+
+    def _call(self, operation: str, method: str, path: str, body: Any = None) -> Result:
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else None
+        started = time.perf_counter()
+        try:
+            result = self.transport.request(method, API_PREFIX + path, body, headers)
+        except (OSError, http.client.HTTPException):
+            # Connection failures count as errors without a status code
+            result = Result(0, None)
+        self.samples.append(
+            Sample(operation, result.status, time.perf_counter() - started)
+        )
+        return result
+
+    def login(self) -> None:
+        result = self._call(
+            "login",
+            "POST",
+            "/auth/login",
+            {"username": self.username, "password": self.password},
+        )
+        if result.status == 200:
+            self.token = result.body["auth_token"]
+
+    def list_liquors(self) -> None:
+        result = self._call("list_liquors", "GET", "/liquors?per_page=50")
+        if result.status == 200:
+            self.liquor_ids = [liquor["id"] for liquor in result.body["data"]]
+
+    def list_batches(self) -> None:
+        if not self.liquor_ids:
+            return self.list_liquors()
+        liquor_id = self.rng.choice(self.liquor_ids)
+        result = self._call(
+            "list_batches", "GET", f"/liquors/{liquor_id}/batches?per_page=50"
+        )
+        if result.status == 200:
+            # Merge with earlier pages so batches of other liquors stay in play
+            self.batch_ids = list(
+                dict.fromkeys(
+                    self.batch_ids + [batch["id"] for batch in result.body["data"]]
+                )
+            )
+
+    def get_batch(self) -> None:
+        if not self.batch_ids:
+            return self.list_batches()
+        self._call("get_batch", "GET", f"/batches/{self.rng.choice(self.batch_ids)}")
+
+    def create_batch(self) -> None:
+        if not self.liquor_ids:
+            return self.list_liquors()
+        liquor_id = self.rng.choice(self.liquor_ids)
+        result = self._call(
+            "create_batch",
+            "POST",
+            f"/liquors/{liquor_id}/batches",
+            {
+                "description": "Load test batch",
+                "bottle_count": self.rng.randrange(0, 25),
+                "bottle_volume": 500,
+            },
+        )
+        if result.status == 201:
+            self.batch_ids.append(result.body["id"])
+
+    def update_bottles(self) -> None:
+        if not self.batch_ids:
+            return self.list_batches()
+        self._call(
+            "update_bottles",
+            "PUT",
+            f"/batches/{self.rng.choice(self.batch_ids)}/bottles",
+            {"bottle_count": self.rng.randrange(0, 25), "bottle_volume": 500},
+        )
+
+    def run(self, should_stop: Callable[[], bool]) -> None:
+        if self.token is None:
+            self.login()
+        self.list_liquors()
+        while not should_stop():
+            getattr(self, self.rng.choices(self.operations, self.weights)[0])()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    # Nearest rank on values sorted by the caller
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+def summarize(samples: List[Sample], seconds: float) -> Dict[str, Any]:
+    """
+    Aggregate samples into throughput, error rates and latency percentiles
+    and cumulative histograms (in seconds, on the /metrics buckets) per
+    operation and overall. Status 0 and codes of 400 and up are errors.
+    """
+
+    def stats(group: List[Sample]) -> Dict[str, Any]:
+        latencies = sorted(sample.seconds for sample in group)
+        errors = sum(1 for sample in group if not 0 < sample.status < 400)
+        statuses: Dict[str, int] = {}
+        for sample in group:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": errors / len(group) if group else 0.0,
+            "throughput": len(group) / seconds if seconds else 0.0,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+            "statuses": dict(sorted(statuses.items())),
+            "histogram": {
+                str(bound): sum(1 for latency in latencies if latency <= bound)
+                for bound in LATENCY_BUCKETS
+            },
+        }
+
+    operations: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        operations.setdefault(sample.operation, []).append(sample)
+    return {
+        "seconds": seconds,
+        "total": stats(samples),
+        "operations": {
+            name: stats(group) for name, group in sorted(operations.items())
+        },
+    }
+
+
+def run_load(
+    make_transport: Callable[[], Transport],
+    workers: int,
+    duration: float,
+    mix: Optional[Dict[str, int]] = None,
+    max_requests: Optional[int] = None,
+    users: Optional[List[Tuple[str, str]]] = None,
+    token: Optional[str] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run ``workers`` concurrent clients for ``duration`` seconds, or until
+    they sent ``max_requests`` in total, and return the ``summarize`` report.
+    Worker n logs in as ``users[n % len(users)]`` unless a bearer ``token``
+    is shared by all of them.
+    """
+    if token is None and not users:
+        raise ValueError("Either users or a token are required")
+    mix = dict(mix or DEFAULT_MIX)
+    if not users:
+        # Without credentials there is nothing to log in with
+        mix.pop("login", None)
+        if not any(mix.values()):
+            raise ValueError("The mix needs an operation other than login")
+    deadline = time.monotonic() + duration
+    pool = [
+        Worker(
+            make_transport(),
+            mix,
+            random.Random(seed + n),
+            *(users[n % len(users)] if users else ("", "")),
+            token=token,
+        )
+        for n in range(workers)
+    ]
+
+    def should_stop() -> bool:
+        if max_requests is not None:
+            # Reading the other workers' list lengths needs no lock
+            if sum(len(worker.samples) for worker in pool) >= max_requests:
+                return True
+        return time.monotonic() >= deadline
+
+    threads = [
+        threading.Thread(target=worker.run, args=(should_stop,), daemon=True)
+        for worker in pool
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for worker in pool:
+        worker.transport.close()
+    return summarize([sample for worker in pool for sample in worker.samples], elapsed)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as a plain-text table."""
+    lines = [
+        f"{'operation':<16}{'requests':>10}{'req/s':>10}{'errors':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    ]
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, row in rows:
+        lines.append(
+            f"{name:<16}{row['requests']:>10}{row['throughput']:>10.1f}"
+            f"{row['error_rate']:>9.1%}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    total = report["total"]
+    lines.append("")
+    lines.append(f"Latency histogram ({total['requests']} requests):")
+    previous = 0
+    for bound, count in total["histogram"].items():
+        lines.append(f"  <= {float(bound) * 1000:>7g} ms {count - previous:>8}")
+        previous = count
+    lines.append(
+        f"  >  {LATENCY_BUCKETS[-1] * 1000:>7g} ms {total['requests'] - previous:>8}"
+    )
+    if total["errors"]:
+        lines.append("")
+        lines.append(f"Status codes: {total['statuses']}")
+    return "\n".join(lines)
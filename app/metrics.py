@@ -0,0 +1,305 @@
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from flask import Flask, Response, g, has_request_context, request
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request buckets; high counts on one endpoint point at N+1 queries
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_HELP = {
+    "nalewka_http_requests_total": ("counter", "HTTP requests handled"),
+    "nalewka_http_request_duration_seconds": (
+        "histogram",
+        "Time spent handling a request",
+    ),
+    "nalewka_sql_statements_per_request": (
+        "histogram",
+        "SQL statements executed while handling a request",
+    ),
+    "nalewka_sql_statements_total": ("counter", "SQL statements executed"),
+    "nalewka_sql_duration_seconds_total": (
+        "counter",
+        "Time spent executing SQL statements",
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of one process, as plain dictionaries that can
+    be written to disk and merged with the snapshots of other workers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(
+        self,
+        name: str,
+        labels: Dict[str, str],
+        value: float,
+        buckets: Sequence[float],
+    ) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._buckets[name] = buckets
+            counts = self._histograms.setdefault(key, [0.0] * (len(buckets) + 2))
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(counts)]
+                    for (name, labels), counts in self._histograms.items()
+                ],
+                "buckets": {
+                    name: list(buckets) for name, buckets in self._buckets.items()
+                },
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._buckets.clear()
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> MetricsRegistry:
+    """Add up the snapshots of several workers into one registry"""
+    merged = MetricsRegistry()
+    for snapshot in snapshots:
+        merged._buckets.update(snapshot.get("buckets", {}))
+        for name, labels, value in snapshot.get("counters", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged._counters[key] = merged._counters.get(key, 0.0) + value
+        for name, labels, counts in snapshot.get("histograms", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = merged._histograms.setdefault(key, [0.0] * len(counts))
+            for index, count in enumerate(counts):
+                current[index] += count
+    return merged
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    ]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render_prometheus(registry: MetricsRegistry) -> str:
+    """Render a registry in the Prometheus text exposition format"""
+    lines: List[str] = []
+    by_name: Dict[str, List[str]] = {}
+
+    for (name, labels), value in sorted(registry._counters.items()):
+        by_name.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), counts in sorted(registry._histograms.items()):
+        buckets = registry._buckets.get(name, ())
+        samples = by_name.setdefault(name, [])
+        cumulative = 0.0
+        for bound, count in zip(list(buckets) + ["+Inf"], counts[:-1]):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            samples.append(
+                f"{name}_bucket{_format_labels(list(labels) + [('le', le)])} "
+                f"{cumulative:g}"
+            )
+        samples.append(f"{name}_sum{_format_labels(labels)} {counts[-1]:g}")
+        samples.append(f"{name}_count{_format_labels(labels)} {cumulative:g}")
+
+    for name in sorted(by_name):
+        kind, description = _HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(by_name[name])
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency, SQL statement counts and SQL time.
+
+    SQLAlchemy cursor hooks count statements and time them into flask.g;
+    request hooks turn that into metrics labelled by endpoint. With
+    METRICS_DIR set, every worker writes its snapshot there at most every
+    METRICS_FLUSH_INTERVAL seconds, and /metrics adds up all the files, so
+    the numbers cover every gunicorn worker. Clear the directory on deploy.
+    """
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        self.directory: Optional[str] = None
+        self.flush_interval = 5.0
+        self.server_timing = False
+        self._last_flush = 0.0
+        self._atexit_registered = False
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def init_app(self, app: Flask) -> None:
+        self.directory = app.config.get("METRICS_DIR") or None
+        self.flush_interval = float(
+            app.config.get("METRICS_FLUSH_INTERVAL", self.flush_interval)
+        )
+        self.server_timing = bool(app.config.get("METRICS_SERVER_TIMING", False))
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+        if not sa.event.contains(
+            sa.engine.Engine, "before_cursor_execute", _before_cursor_execute
+        ):
+            sa.event.listen(
+                sa.engine.Engine, "before_cursor_execute", _before_cursor_execute
+            )
+            sa.event.listen(
+                sa.engine.Engine, "after_cursor_execute", _after_cursor_execute
+            )
+        if "request_metrics" not in app.extensions:
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+        app.extensions["request_metrics"] = self
+
+    def _start_request(self) -> None:
+        g._metrics_started = time.perf_counter()
+        g._sql_statements = 0
+        g._sql_seconds = 0.0
+
+    def _finish_request(self, response: Response) -> Response:
+        started = g.get("_metrics_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        statements = g.get("_sql_statements", 0)
+        sql_seconds = g.get("_sql_seconds", 0.0)
+        endpoint = request.endpoint or "unmatched"
+
+        self.registry.inc(
+            "nalewka_http_requests_total",
+            {
+                "endpoint": endpoint,
+                "method": request.method,
+                "status": str(response.status_code),
+            },
+        )
+        labels = {"endpoint": endpoint}
+        self.registry.observe(
+            "nalewka_http_request_duration_seconds", labels, elapsed, LATENCY_BUCKETS
+        )
+        self.registry.observe(
+            "nalewka_sql_statements_per_request",
+            labels,
+            statements,
+            STATEMENT_BUCKETS,
+        )
+        self.registry.inc("nalewka_sql_statements_total", labels, statements)
+        self.registry.inc("nalewka_sql_duration_seconds_total", labels, sql_seconds)
+
+        if self.server_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'sql;dur={sql_seconds * 1000:.1f};desc="{statements} statements", '
+                f"app;dur={elapsed * 1000:.1f}",
+            )
+        if self.directory and time.monotonic() - self._last_flush >= (
+            self.flush_interval
+        ):
+            self.flush()
+        return response
+
+    def _path(self) -> str:
+        return os.path.join(str(self.directory), f"worker-{os.getpid()}.json")
+
+    def flush(self) -> None:
+        """Write this worker's snapshot to METRICS_DIR"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, self._path())
+
+    def collect(self) -> MetricsRegistry:
+        """Metrics of all workers, or of this process without METRICS_DIR"""
+        if not self.directory:
+            return merge_snapshots([self.registry.snapshot()])
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+    def _reset_after_fork(self) -> None:
+        # Each worker reports under its own pid, starting from zero
+        self.registry = MetricsRegistry()
+        self._last_flush = 0.0
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if context is not None:
+        context._nalewka_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    started = getattr(context, "_nalewka_started", None)
+    if started is None or not has_request_context():
+        return
+    g._sql_statements = g.get("_sql_statements", 0) + 1
+    g._sql_seconds = g.get("_sql_seconds", 0.0) + time.perf_counter() - started
+
+
+request_metrics = RequestMetrics()
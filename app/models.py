@@ -7,11 +7,20 @@ from flask_login import UserMixin
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db, login
-from app.utils import VolumeConverter
+from app.utils import VolumeConverter, normalize_name
 
 BaseModel: TypeAlias = db.Model
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def updated_at_column() -> so.MappedColumn[datetime]:
+    """Timestamp refreshed on every ORM or Core UPDATE of the row"""
+    return so.mapped_column(default=_utcnow, onupdate=_utcnow)
+
+
 class User(UserMixin, BaseModel):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     username: so.Mapped[str] = so.mapped_column(sa.String(64), index=True, unique=True)
@@ -50,6 +59,9 @@ class ApiKey(BaseModel):
         sa.DateTime(), nullable=True
     )
     is_active: so.Mapped[bool] = so.mapped_column(sa.Boolean(), default=True)
+    request_count: so.Mapped[int] = so.mapped_column(
+        sa.Integer(), default=0, server_default="0"
+    )
 
     user: so.Mapped[User] = so.relationship(back_populates="api_keys")
 
@@ -65,31 +77,63 @@ class Liquor(BaseModel):
     )
     description: so.Mapped[Optional[str]] = so.mapped_column(sa.Text())
     user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(User.id), index=True)
+    updated_at: so.Mapped[datetime] = updated_at_column()
 
     user: so.Mapped[User] = so.relationship(back_populates="liquors")
     batches: so.Mapped[list["Batch"]] = so.relationship(
         back_populates="liquor", cascade="all, delete-orphan"
     )
 
+    # Aggregates filled in by LiquorRepository queries "with stats"; None otherwise
+    _batch_count: so.Mapped[Optional[int]] = so.query_expression()
+    _total_bottles: so.Mapped[Optional[int]] = so.query_expression()
+    _total_volume: so.Mapped[Optional[float]] = so.query_expression()
+
     def __repr__(self) -> str:
         return f"<Liquor {self.name}>"
 
     @property
     def batch_count(self) -> int:
         """Return the number of batches for this liquor"""
+        if self._batch_count is not None:
+            return self._batch_count
         return len(self.batches)
 
     @property
     def total_bottles_produced(self) -> int:
         """Calculate total bottles produced across all batches"""
+        if self._total_bottles is not None:
+            return self._total_bottles
         return sum(batch.bottle_count or 0 for batch in self.batches)
 
     @property
     def total_volume_produced(self) -> float:
         """Calculate total volume produced in milliliters"""
+        if self._total_volume is not None:
+            return self._total_volume
         return sum(batch.total_volume for batch in self.batches)
 
 
+class CacheVersion(BaseModel):
+    """Write counter per cached dataset, checked by workers to detect changes"""
+
+    name: so.Mapped[str] = so.mapped_column(sa.String(64), primary_key=True)
+    version: so.Mapped[int] = so.mapped_column(sa.Integer(), default=0)
+
+    def __repr__(self) -> str:
+        return f"<CacheVersion {self.name}={self.version}>"
+
+
+class PrimaryReadDeadline(BaseModel):
+    """Time until which a token client's reads stay on the primary database"""
+
+    user_id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    until: so.Mapped[float] = so.mapped_column(sa.Float())
+
+    def __repr__(self) -> str:
+        return f"<PrimaryReadDeadline {self.user_id} until {self.until}>"
+
+
 @login.user_loader
 def load_user(id: int) -> Optional["User"]:
     return db.session.get(User, int(id))
@@ -98,10 +142,15 @@ def load_user(id: int) -> Optional["User"]:
 class Ingredient(BaseModel):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     name: so.Mapped[str] = so.mapped_column(sa.String(128), index=True, unique=True)
+    # Case-folded name; its unique index enforces case-insensitive uniqueness
+    name_normalized: so.Mapped[str] = so.mapped_column(
+        sa.String(128), index=True, unique=True
+    )
     description: so.Mapped[Optional[str]] = so.mapped_column(sa.Text())
     created_at: so.Mapped[datetime] = so.mapped_column(
         index=True, default=lambda: datetime.now(timezone.utc)
     )
+    updated_at: so.Mapped[datetime] = updated_at_column()
 
     # Relationship to BatchFormula
     batch_formulas: so.Mapped[list["BatchFormula"]] = so.relationship(
@@ -111,6 +160,11 @@ class Ingredient(BaseModel):
     def __repr__(self) -> str:
         return f"<Ingredient {self.name}>"
 
+    @so.validates("name")
+    def validate_name(self, key: str, name: str) -> str:
+        self.name_normalized = normalize_name(name)
+        return name
+
     @property
     def usage_count(self) -> int:
         """Return how many batches use this ingredient"""
@@ -131,12 +185,16 @@ class Batch(BaseModel):
         sa.Float(), default=0.0
     )  # in milliliters
     bottle_volume_unit: so.Mapped[str] = so.mapped_column(sa.String(10), default="ml")
+    updated_at: so.Mapped[datetime] = updated_at_column()
 
     liquor: so.Mapped[Liquor] = so.relationship(back_populates="batches")
     formulas: so.Mapped[list["BatchFormula"]] = so.relationship(
         back_populates="batch", cascade="all, delete-orphan"
     )
 
+    # Filled in by BatchRepository listing queries; None otherwise
+    _ingredient_count: so.Mapped[Optional[int]] = so.query_expression()
+
     # Add composite index for better query performance
     __table_args__ = (db.Index("idx_batch_liquor_date", "liquor_id", "date"),)
 
@@ -165,6 +223,8 @@ class Batch(BaseModel):
     @property
     def ingredient_count(self) -> int:
         """Return the number of ingredients in this batch"""
+        if self._ingredient_count is not None:
+            return self._ingredient_count
         return len(self.formulas)
 
     def get_volume_in_unit(self, unit: str = "ml") -> float:
@@ -181,6 +241,7 @@ class BatchFormula(BaseModel):
     )
     quantity: so.Mapped[float] = so.mapped_column(sa.Float())
     unit: so.Mapped[str] = so.mapped_column(sa.String(20))
+    updated_at: so.Mapped[datetime] = updated_at_column()
 
     batch: so.Mapped[Batch] = so.relationship(back_populates="formulas")
     ingredient: so.Mapped[Ingredient] = so.relationship(back_populates="batch_formulas")
@@ -206,3 +267,71 @@ class BatchFormula(BaseModel):
             ml_value = VolumeConverter.to_ml(self.quantity, self.unit)
             return VolumeConverter.from_ml(ml_value, target_unit)
         return self.quantity  # Return as-is for non-volume units
+
+
+class SearchDocument(BaseModel):
+    """
+    Full-text search entry for one liquor, batch or ingredient.
+
+    ``body`` holds the searchable text already folded with fold_diacritics,
+    so matching ignores case and Polish diacritics on every backend. Rows are
+    kept in sync by app.search; SQLite indexes them in the search_document_fts
+    FTS5 table and PostgreSQL through a GIN index on their tsvector.
+    """
+
+    __tablename__ = "search_document"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    kind: so.Mapped[str] = so.mapped_column(sa.String(16))
+    object_id: so.Mapped[int] = so.mapped_column(sa.Integer())
+    # None for ingredients, which are shared by all users
+    user_id: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer(), index=True)
+    liquor_id: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer())
+    title: so.Mapped[str] = so.mapped_column(sa.String(255))
+    body: so.Mapped[str] = so.mapped_column(sa.Text())
+
+    __table_args__ = (
+        db.Index("ix_search_document_kind_object", "kind", "object_id", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SearchDocument {self.kind} {self.object_id}>"
+
+
+# The full-text index itself lives outside the ORM: an external-content FTS5
+# table kept in step by triggers on SQLite, a tsvector GIN index on PostgreSQL
+_SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE search_document_fts USING fts5("
+    "body, content='search_document', content_rowid='id')",
+    "CREATE TRIGGER search_document_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER search_document_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER search_document_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); "
+    "INSERT INTO search_document_fts(rowid, body) VALUES (new.id, new.body); END",
+)
+_POSTGRESQL_SEARCH_DDL = (
+    "CREATE INDEX ix_search_document_tsv ON search_document "
+    "USING gin (to_tsvector('simple', body))",
+)
+
+for _statement in _SQLITE_SEARCH_DDL:
+    sa.event.listen(
+        SearchDocument.__table__,
+        "after_create",
+        sa.DDL(_statement).execute_if(dialect="sqlite"),
+    )
+for _statement in _POSTGRESQL_SEARCH_DDL:
+    sa.event.listen(
+        SearchDocument.__table__,
+        "after_create",
+        sa.DDL(_statement).execute_if(dialect="postgresql"),
+    )
+sa.event.listen(
+    SearchDocument.__table__,
+    "before_drop",
+    sa.DDL("DROP TABLE IF EXISTS search_document_fts").execute_if(dialect="sqlite"),
+)
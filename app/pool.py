@@ -0,0 +1,189 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Statements that take SQLite's write lock
+_WRITE_STATEMENT = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE
+)
+# connection.info key marking a connection that holds the write serializer
+_HOLDS_WRITE_LOCK = "nalewka.holds_write_lock"
+
+
+def build_engine_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings.
+
+    DB_POOL_DISABLED switches to NullPool, which opens a connection per
+    checkout and is the safe choice behind PgBouncer in transaction mode.
+    Sizing options only apply to server databases; SQLite keeps the pool
+    SQLAlchemy picks for it.
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+    if config.get("DB_POOL_DISABLED", False):
+        options["poolclass"] = NullPool
+        return options
+
+    uri = str(config.get("SQLALCHEMY_DATABASE_URI", ""))
+    if uri.startswith("sqlite"):
+        return options
+
+    options.update(
+        pool_size=config.get("DB_POOL_SIZE", 5),
+        max_overflow=config.get("DB_MAX_OVERFLOW", 10),
+        pool_timeout=config.get("DB_POOL_TIMEOUT", 30.0),
+        pool_recycle=config.get("DB_POOL_RECYCLE", 1800),
+    )
+    return options
+
+
+def pool_status(engine: sa.engine.Engine) -> Dict[str, Any]:
+    """Snapshot of the engine's connection pool"""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return status
+
+
+def probe(engine: sa.engine.Engine) -> Dict[str, Any]:
+    """
+    Acquire a connection and run a trivial query, timing both steps.
+    The acquire time includes any wait for a free pooled connection.
+    """
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        acquired = time.perf_counter()
+        connection.execute(sa.text("SELECT 1"))
+        finished = time.perf_counter()
+    return {
+        "acquire_ms": round((acquired - started) * 1000, 3),
+        "query_ms": round((finished - acquired) * 1000, 3),
+    }
+
+
+class WriteSerializer:
+    """
+    Per-process queue for SQLite writes.
+
+    A connection takes the lock before its first write statement and gives
+    it back when it returns to the pool, which sessions do right after each
+    commit. The engine's commit event fires before COMMIT runs, so it is too
+    early to release on. Threads in one worker then wait their turn instead
+    of racing for SQLite's file lock. Waiting is capped at ``timeout``
+    seconds, after which the write fails as SQLite's own "database is
+    locked" would; other processes are only coordinated by busy_timeout.
+
+    A thread that writes on a second connection while its first still holds
+    the lock (a nested app context, say) takes the lock over if the first
+    has committed. If the first is still in a transaction, the second would
+    wait for SQLite's file lock that its own thread holds, so it fails at
+    once instead.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # (thread id, connection info, DBAPI connection) of the current holder
+        self._holder: Optional[Tuple[int, Dict[str, Any], Any]] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def install(self, engine: sa.engine.Engine) -> None:
+        sa.event.listen(engine, "before_cursor_execute", self._before_execute)
+        sa.event.listen(engine.pool, "checkin", self._release)
+
+    def _before_execute(
+        self,
+        conn: sa.engine.Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        *args: Any,
+    ) -> None:
+        if conn.info.get(_HOLDS_WRITE_LOCK) or not _WRITE_STATEMENT.match(statement):
+            return
+        holder = self._holder
+        if holder is not None and holder[0] == threading.get_ident():
+            _, info, dbapi_connection = holder
+            if dbapi_connection.in_transaction:
+                raise sa.exc.OperationalError(
+                    statement,
+                    parameters,
+                    sqlite3.OperationalError(
+                        "database is locked: another connection of this thread "
+                        "has an uncommitted write"
+                    ),
+                )
+            # Hand the committed connection's turn to this one
+            info.pop(_HOLDS_WRITE_LOCK, None)
+        elif not self._lock.acquire(timeout=self.timeout):
+            raise sa.exc.OperationalError(
+                statement,
+                parameters,
+                sqlite3.OperationalError(
+                    f"database is locked: waited {self.timeout:g}s for the "
+                    "write serializer"
+                ),
+            )
+        conn.info[_HOLDS_WRITE_LOCK] = True
+        self._holder = (
+            threading.get_ident(),
+            conn.info,
+            conn.connection.dbapi_connection,
+        )
+
+    def _release(self, dbapi_connection: Any, record: Any) -> None:
+        # A plain Lock, so a connection checked in by another thread (the
+        # garbage collector, say) can still give it back
+        if record is not None and record.info.pop(_HOLDS_WRITE_LOCK, False):
+            self._holder = None
+            self._lock.release()
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._holder = None
+
+
+def configure_sqlite(
+    engine: sa.engine.Engine, config: Mapping[str, Any]
+) -> Optional[WriteSerializer]:
+    """
+    Apply the SQLITE_* settings to every new connection and, if enabled,
+    install a write serializer. Returns the serializer, if any.
+    """
+    pragmas = [f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT', 5000))}"]
+    if config.get("SQLITE_WAL", True):
+        pragmas += ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+    mmap_size = int(config.get("SQLITE_MMAP_SIZE", 0))
+    if mmap_size > 0:
+        pragmas.append(f"PRAGMA mmap_size = {mmap_size}")
+
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    sa.event.listen(engine, "connect", set_pragmas)
+
+    if not config.get("SQLITE_SERIALIZE_WRITES", False):
+        return None
+    serializer = WriteSerializer(int(config.get("SQLITE_BUSY_TIMEOUT", 5000)) / 1000)
+    serializer.install(engine)
+    return serializer
@@ -0,0 +1,210 @@
+import cProfile
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Optional
+
+import sqlalchemy as sa
+from flask import (
+    Flask,
+    Response,
+    before_render_template,
+    current_app,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+from flask_login import current_user
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestProfiler:
+    """
+    Profile single requests on demand.
+
+    A request sent with an ``X-Profile: 1`` header or a ``_profile=1`` query
+    argument by one of PROFILE_USERS runs under cProfile: a .pstats file
+    (open it with snakeviz or ``python -m pstats``) and a .json summary
+    splitting the time into SQL, template rendering and the rest of the
+    Python code are written to PROFILE_DIR. The caller is identified from its
+    bearer token, API key or login session before the profiler starts, so
+    nobody else can make a request run under it. With no PROFILE_USERS
+    nothing is hooked in.
+    """
+
+    def __init__(self) -> None:
+        self.users: FrozenSet[str] = frozenset()
+        self.directory: Optional[str] = None
+
+    def init_app(self, app: Flask) -> None:
+        self.users = frozenset(
+            name.strip()
+            for name in str(app.config.get("PROFILE_USERS") or "").split(",")
+            if name.strip()
+        )
+        if not self.users:
+            return
+        self.directory = app.config.get("PROFILE_DIR") or os.path.join(
+            app.instance_path, "profiles"
+        )
+
+        if not sa.event.contains(
+            sa.engine.Engine, "before_cursor_execute", _before_cursor_execute
+        ):
+            sa.event.listen(
+                sa.engine.Engine, "before_cursor_execute", _before_cursor_execute
+            )
+            sa.event.listen(
+                sa.engine.Engine, "after_cursor_execute", _after_cursor_execute
+            )
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        if "request_profiler" not in app.extensions:
+            app.before_request(self._start)
+            app.after_request(self._finish)
+        app.extensions["request_profiler"] = self
+
+    @staticmethod
+    def requested() -> bool:
+        return (
+            request.headers.get("X-Profile") == "1"
+            or request.args.get("_profile") == "1"
+        )
+
+    def _start(self) -> None:
+        if not self.requested() or not self._allowed():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request of this process is being profiled
+            return
+        g._profile = {
+            "profiler": profiler,
+            "started": time.perf_counter(),
+            "sql_seconds": 0.0,
+            "sql_statements": 0,
+            "template_seconds": 0.0,
+            "template_sql_seconds": 0.0,
+        }
+
+    def _finish(self, response: Response) -> Response:
+        state = g.pop("_profile", None)
+        if state is None:
+            return response
+        state["profiler"].disable()
+        total = time.perf_counter() - state["started"]
+
+        # SQL run while rendering (lazy loads) counts as SQL, not template time
+        template = state["template_seconds"] - state["template_sql_seconds"]
+        breakdown = {
+            "total_ms": round(total * 1000, 3),
+            "sql_ms": round(state["sql_seconds"] * 1000, 3),
+            "sql_statements": state["sql_statements"],
+            "template_ms": round(template * 1000, 3),
+            "python_ms": round((total - state["sql_seconds"] - template) * 1000, 3),
+        }
+        name = self._write(state["profiler"], breakdown, response.status_code)
+        response.headers["X-Profile"] = name
+        response.headers.add(
+            "Server-Timing",
+            ", ".join(
+                f"{part};dur={breakdown[part + '_ms']}"
+                for part in ("sql", "template", "python")
+            ),
+        )
+        return response
+
+    def _allowed(self) -> bool:
+        # Runs before the view, so the API decorators have not authenticated
+        # the request yet; resolve its credentials the way they would
+        from app.auth_utils import api_key_repository, decode_auth_token
+        from app.repositories import UserRepository
+
+        scheme, _, credential = request.headers.get("Authorization", "").partition(" ")
+        if scheme == "Bearer" and credential:
+            user_id = decode_auth_token(credential)
+            user = UserRepository().get(user_id) if user_id is not None else None
+        elif scheme == "ApiKey" and credential:
+            api_key = api_key_repository.get_by_key_with_user(credential)
+            user = api_key.user if api_key and api_key.is_active else None
+        elif current_user.is_authenticated:
+            user = current_user
+        else:
+            return False
+        return user is not None and user.username in self.users
+
+    def _write(
+        self, profiler: cProfile.Profile, breakdown: Dict[str, Any], status: int
+    ) -> str:
+        directory = str(self.directory)
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        name = _UNSAFE.sub("_", f"{stamp}-{request.endpoint or 'unmatched'}")
+        profiler.dump_stats(os.path.join(directory, f"{name}.pstats"))
+        summary = {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": status,
+            **breakdown,
+        }
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        current_app.logger.info(f"Profiled {request.method} {request.path}: {name}")
+        return name
+
+
+def _state() -> Optional[Dict[str, Any]]:
+    return g.get("_profile") if has_request_context() else None
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if context is not None and _state() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    state = _state()
+    started = getattr(context, "_profile_started", None)
+    if state is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    state["sql_seconds"] += elapsed
+    state["sql_statements"] += 1
+    if state.get("rendering"):
+        state["template_sql_seconds"] += elapsed
+
+
+def _before_render(sender: Any, **extra: Any) -> None:
+    state = _state()
+    if state is not None:
+        state["rendering"] = time.perf_counter()
+
+
+def _after_render(sender: Any, **extra: Any) -> None:
+    state = _state()
+    if state is not None and state.get("rendering"):
+        state["template_seconds"] += time.perf_counter() - state.pop("rendering")
+
+
+request_profiler = RequestProfiler()
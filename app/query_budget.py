@@ -0,0 +1,102 @@
+from collections import Counter
+from typing import Any, List, Optional
+
+import sqlalchemy as sa
+from flask import Flask, Response, current_app, g, has_request_context, request
+
+from app.replica import RoutingSession
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more SQL than its budget allows"""
+
+
+class QueryBudget:
+    """
+    Development guard against N+1 queries.
+
+    Counts the SQL statements of every request and the lazy loads of each
+    relationship (e.g. BatchFormula.ingredient read in a template loop).
+    When a request runs more than QUERY_BUDGET statements, or lazy-loads one
+    relationship more than LAZY_LOAD_LIMIT times, it is logged, or raised
+    once the response is built when QUERY_BUDGET_RAISE is set. Both limits
+    are off by default.
+    """
+
+    def __init__(self) -> None:
+        self.max_statements: Optional[int] = None
+        self.lazy_load_limit: Optional[int] = None
+        self.raise_on_violation = False
+
+    def init_app(self, app: Flask) -> None:
+        self.max_statements = app.config.get("QUERY_BUDGET")
+        self.lazy_load_limit = app.config.get("LAZY_LOAD_LIMIT")
+        self.raise_on_violation = bool(app.config.get("QUERY_BUDGET_RAISE", False))
+
+        if not sa.event.contains(
+            sa.engine.Engine, "after_cursor_execute", _count_statement
+        ):
+            sa.event.listen(sa.engine.Engine, "after_cursor_execute", _count_statement)
+        if not sa.event.contains(RoutingSession, "do_orm_execute", _count_lazy_load):
+            sa.event.listen(RoutingSession, "do_orm_execute", _count_lazy_load)
+        if "query_budget" not in app.extensions:
+            app.before_request(self._start_request)
+            app.after_request(self._check_request)
+        app.extensions["query_budget"] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_statements is not None or self.lazy_load_limit is not None
+
+    def _start_request(self) -> None:
+        if self.enabled:
+            g._budget_statements = 0
+            g._budget_lazy_loads = Counter()
+
+    def _check_request(self, response: Response) -> Response:
+        if not self.enabled or "_budget_statements" not in g:
+            return response
+        problems = self.violations(g._budget_statements, g._budget_lazy_loads)
+        if problems:
+            message = f"{request.method} {request.path}: " + "; ".join(problems)
+            if self.raise_on_violation:
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning(f"Query budget exceeded: {message}")
+        return response
+
+    def violations(self, statements: int, lazy_loads: Counter) -> List[str]:
+        """Describe every limit the counts go over"""
+        problems = []
+        if self.max_statements is not None and statements > self.max_statements:
+            problems.append(
+                f"{statements} SQL statements (budget {self.max_statements})"
+            )
+        if self.lazy_load_limit is not None:
+            problems.extend(
+                f"{relationship} lazy-loaded {count} times "
+                f"(limit {self.lazy_load_limit})"
+                for relationship, count in sorted(lazy_loads.items())
+                if count > self.lazy_load_limit
+            )
+        return problems
+
+
+def _count_statement(*args: Any) -> None:
+    if has_request_context() and "_budget_statements" in g:
+        g._budget_statements += 1
+
+
+def _count_lazy_load(orm_execute_state: Any) -> None:
+    if not has_request_context() or "_budget_lazy_loads" not in g:
+        return
+    # Selectin loads have no lazy_loaded_from; they are not N+1
+    if (
+        not orm_execute_state.is_relationship_load
+        or orm_execute_state.lazy_loaded_from is None
+    ):
+        return
+    prop = orm_execute_state.loader_strategy_path.path[-1]
+    g._budget_lazy_loads[f"{prop.parent.class_.__name__}.{prop.key}"] += 1
+
+
+query_budget = QueryBudget()
@@ -0,0 +1,153 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, TypeVar
+
+import sqlalchemy as sa
+from flask import (
+    Flask,
+    Response,
+    current_app,
+    g,
+    has_request_context,
+    request,
+    session,
+)
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+REPLICA_BIND = "replica"
+
+# Set while a repository read method runs; only those reads may use the replica
+_replica_reads: ContextVar[bool] = ContextVar("nalewka_replica_reads", default=False)
+# g flag for a request that has written through the primary
+_WROTE_KEY = "_nalewka_db_wrote"
+# Flask session key holding the time.time() until which reads stay on the primary
+_PRIMARY_UNTIL_KEY = "_primary_until"
+# g key caching a token client's deadline from the primary_read_deadline table
+_DEADLINE_KEY = "_nalewka_primary_until"
+
+
+def reads_from_replica(method: F) -> F:
+    """Let SELECTs issued by a repository read method go to the replica"""
+
+    @wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _replica_reads.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class ReplicaRouter:
+    """
+    Decides whether a read may go to the read-only replica bind.
+
+    Only SELECTs from repository methods marked with reads_from_replica,
+    made while serving a GET or HEAD request, are routed to the replica.
+    After a request writes, the client sticks to the primary for
+    REPLICA_STICKY_SECONDS. Browsers keep that deadline in their Flask
+    session cookie. Token-authenticated API requests never get a cookie;
+    their deadline is stored per user in the primary_read_deadline table,
+    so every worker sees it, and read once per GET request. Without a
+    replica bind nothing is recorded at all.
+    """
+
+    def __init__(self, sticky_seconds: float = 5.0) -> None:
+        self.sticky_seconds = sticky_seconds
+
+    def init_app(self, app: Flask) -> None:
+        self.sticky_seconds = float(
+            app.config.get("REPLICA_STICKY_SECONDS", self.sticky_seconds)
+        )
+        binds = app.config.get("SQLALCHEMY_BINDS") or {}
+        if REPLICA_BIND in binds and "replica_router" not in app.extensions:
+            app.after_request(self._remember_write)
+        app.extensions["replica_router"] = self
+
+    def mark_write(self) -> None:
+        if has_request_context():
+            setattr(g, _WROTE_KEY, True)
+
+    def use_replica(self) -> bool:
+        if not _replica_reads.get() or not has_request_context():
+            return False
+        if request.method not in ("GET", "HEAD") or g.get(_WROTE_KEY):
+            return False
+
+        now = time.time()
+        user_id = g.get("user_id")
+        if user_id:
+            # Token requests skip the session so their responses do not vary on it
+            return self._shared_deadline(int(user_id)) <= now
+        return bool(session.get(_PRIMARY_UNTIL_KEY, 0) <= now)
+
+    def _remember_write(self, response: Response) -> Response:
+        if not g.get(_WROTE_KEY):
+            return response
+        until = time.time() + self.sticky_seconds
+        user_id = g.get("user_id")
+        if user_id:
+            self._share_deadline(int(user_id), until)
+        elif session:
+            session[_PRIMARY_UNTIL_KEY] = until
+        return response
+
+    @staticmethod
+    def _shared_deadline(user_id: int) -> float:
+        # This runs inside get_bind: the lookup is not a replica read, so it
+        # goes to the primary and does not come back here
+        if _DEADLINE_KEY not in g:
+            from app.repositories import PrimaryReadDeadlineRepository
+
+            token = _replica_reads.set(False)
+            try:
+                setattr(
+                    g, _DEADLINE_KEY, PrimaryReadDeadlineRepository().get_until(user_id)
+                )
+            finally:
+                _replica_reads.reset(token)
+        return float(g.get(_DEADLINE_KEY))
+
+    @staticmethod
+    def _share_deadline(user_id: int, until: float) -> None:
+        from app import db
+        from app.repositories import PrimaryReadDeadlineRepository
+
+        try:
+            PrimaryReadDeadlineRepository().set_until(user_id, until)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            # The write itself succeeded; the next reads may just be stale
+            db.session.rollback()
+            current_app.logger.warning(
+                f"Failed to store the primary read deadline: {str(e)}"
+            )
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session that sends eligible reads to the replica bind when one is set"""
+
+    def get_bind(
+        self,
+        mapper: Any = None,
+        clause: Any = None,
+        bind: Any = None,
+        **kwargs: Any,
+    ) -> Any:
+        if bind is None:
+            if self._flushing or isinstance(clause, sa.sql.dml.UpdateBase):
+                replica_router.mark_write()
+            elif isinstance(clause, sa.Select):
+                engine = self._db.engines.get(REPLICA_BIND)
+                if engine is not None and replica_router.use_replica():
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -1,18 +1,67 @@
-from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, cast
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 
 import sqlalchemy as sa
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload, with_expression
 
 from app import db
-from app.models import ApiKey, Batch, BatchFormula, Ingredient, Liquor, User
+from app.models import (
+    ApiKey,
+    Batch,
+    BatchFormula,
+    CacheVersion,
+    Ingredient,
+    Liquor,
+    PrimaryReadDeadline,
+    SearchDocument,
+    User,
+)
+from app.replica import reads_from_replica
+from app.utils import KeysetCursor, normalize_name
 
 T = TypeVar("T")
 
+# Supported ways of computing the ``total`` of a paginated listing
+COUNT_MODES = ("exact", "estimate", "none")
+# "estimate" counts at most this many rows, so it stays cheap on large tables
+COUNT_ESTIMATE_CAP = 1000
+# Rows fetched per round trip when streaming a whole account
+EXPORT_YIELD_PER = 500
+
+
+def stream_rows(query: sa.Select, yield_per: int = EXPORT_YIELD_PER) -> Iterator[Any]:
+    """
+    Iterate over a column query in chunks of ``yield_per`` rows using a
+    server-side cursor where the driver supports one. Selecting columns
+    rather than entities keeps rows out of the session's identity map.
+    """
+    result = db.session.execute(query.execution_options(yield_per=yield_per))
+    try:
+        yield from result.mappings()
+    finally:
+        result.close()
+
 
 class BaseRepository:
     def __init__(self, model: Type[T]) -> None:
         self.model = model
 
+    @reads_from_replica
     def get(self, model_id: int) -> Optional[T]:
         result = db.session.get(self.model, model_id)
         return cast(Optional[T], result)
@@ -29,6 +78,70 @@ class BaseRepository:
     def flush(self) -> None:
         db.session.flush()
 
+    def count(self, query: sa.Select, count: str = "exact") -> Optional[int]:
+        """
+        Count the rows matched by a query.
+        "exact" runs a full COUNT(*), "estimate" stops counting at
+        COUNT_ESTIMATE_CAP rows and "none" skips the count entirely.
+        """
+        if count not in COUNT_MODES:
+            raise ValueError(f"Unsupported count mode: {count}")
+        if count == "none":
+            return None
+        query = query.order_by(None)
+        if count == "estimate":
+            query = query.limit(COUNT_ESTIMATE_CAP)
+        count_query = sa.select(sa.func.count()).select_from(query.subquery())
+        return db.session.scalar(count_query) or 0
+
+    @reads_from_replica
+    def get_validator(self, query: sa.Select) -> Optional[Tuple[Any, ...]]:
+        """
+        Run a query of aggregates such as (count, max(updated_at)) and return
+        its row: a cheap validator that changes whenever a matching row is
+        added, removed or updated. None when the query matches nothing.
+        """
+        row = db.session.execute(query).first()
+        return tuple(row) if row is not None else None
+
+    @reads_from_replica
+    def paginate(
+        self,
+        query: sa.Select,
+        keys: Sequence[Any],
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        descending: bool = False,
+    ) -> Tuple[List[Any], Optional[int], Optional[str]]:
+        """
+        Paginate a query ordered by ``keys``, which must be unique per row.
+
+        Without a cursor the page is selected with OFFSET. With a cursor the
+        query seeks past the encoded key instead, so deep pages cost the same
+        as the first one. Returns (items, total, next_cursor).
+        """
+        total = self.count(query, count)
+
+        query = query.order_by(*[key.desc() if descending else key for key in keys])
+        if cursor:
+            values = KeysetCursor.decode(cursor, keys)
+            row_key, after = sa.tuple_(*keys), sa.tuple_(*values)
+            query = query.where(row_key < after if descending else row_key > after)
+        else:
+            query = query.offset((max(page, 1) - 1) * per_page)
+
+        # Fetch one extra row to find out whether there is a next page
+        items = list(db.session.scalars(query.limit(per_page + 1)).unique().all())
+        next_cursor = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            next_cursor = KeysetCursor.encode(
+                [getattr(items[-1], key.key) for key in keys]
+            )
+        return items, total, next_cursor
+
 
 class ApiKeyRepository(BaseRepository):
     def __init__(self) -> None:
@@ -38,6 +151,13 @@ class ApiKeyRepository(BaseRepository):
         result = db.session.scalar(db.select(ApiKey).where(ApiKey.key == key))
         return cast(Optional[ApiKey], result)
 
+    def get_by_key_with_user(self, key: str) -> Optional[ApiKey]:
+        result = db.session.scalar(
+            db.select(ApiKey).where(ApiKey.key == key).options(joinedload(ApiKey.user))
+        )
+        return cast(Optional[ApiKey], result)
+
+    @reads_from_replica
     def get_all_for_user(self, user_id: int) -> List[ApiKey]:
         result = db.session.scalars(
             db.select(ApiKey).where(ApiKey.user_id == user_id)
@@ -45,22 +165,18 @@ class ApiKeyRepository(BaseRepository):
         return list(result)
 
     def get_paginated_for_user(
-        self, user_id: int, page: int = 1, per_page: int = 10
-    ) -> Tuple[List[ApiKey], int]:
+        self,
+        user_id: int,
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+    ) -> Tuple[List[ApiKey], Optional[int], Optional[str]]:
         """Get paginated API keys for a user"""
         query = db.select(ApiKey).where(ApiKey.user_id == user_id)
+        return self.paginate(query, [ApiKey.id], page, per_page, cursor, count)
 
-        # Get total count
-        count_query = sa.select(sa.func.count()).select_from(query.subquery())
-        total = db.session.scalar(count_query) or 0
-
-        # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-
-        result = db.session.scalars(query).all()
-        return list(result), total
-
+    @reads_from_replica
     def get_by_id_and_user(self, api_key_id: int, user_id: int) -> Optional[ApiKey]:
         result = db.session.scalar(
             db.select(ApiKey).where(ApiKey.id == api_key_id, ApiKey.user_id == user_id)
@@ -71,33 +187,146 @@ class ApiKeyRepository(BaseRepository):
         db.session.delete(api_key)
         db.session.commit()
 
+    def deactivate(self, api_key: ApiKey) -> None:
+        api_key.is_active = False
+        db.session.commit()
+
+    def record_usage(self, usage: Sequence[Tuple[int, datetime, int]]) -> None:
+        """
+        Apply accumulated (api_key_id, last_used, request_count) usage in one
+        executemany UPDATE. last_used only moves forward, so concurrent
+        flushes from several workers cannot make it go back in time.
+        """
+        last_used = sa.bindparam("b_last_used", type_=sa.DateTime())
+        stmt = (
+            sa.update(ApiKey.__table__)
+            .where(ApiKey.__table__.c.id == sa.bindparam("b_id"))
+            .values(
+                last_used=sa.case(
+                    (
+                        sa.or_(
+                            ApiKey.__table__.c.last_used.is_(None),
+                            ApiKey.__table__.c.last_used < last_used,
+                        ),
+                        last_used,
+                    ),
+                    else_=ApiKey.__table__.c.last_used,
+                ),
+                request_count=sa.func.coalesce(ApiKey.__table__.c.request_count, 0)
+                + sa.bindparam("b_count"),
+            )
+        )
+        db.session.execute(
+            stmt,
+            [
+                {"b_id": api_key_id, "b_last_used": used_at, "b_count": count}
+                for api_key_id, used_at, count in usage
+            ],
+        )
+        self.commit()
+
 
 class LiquorRepository(BaseRepository):
     def __init__(self) -> None:
         super().__init__(Liquor)
 
+    @staticmethod
+    def with_stats(query: sa.Select) -> sa.Select:
+        """
+        Attach batch aggregates to a Liquor query in the same round trip.
+        The aggregates come from a grouped subquery, so no batches are loaded.
+        """
+        stats = (
+            sa.select(
+                Batch.liquor_id,
+                sa.func.count(Batch.id).label("batch_count"),
+                sa.func.coalesce(sa.func.sum(Batch.bottle_count), 0).label(
+                    "total_bottles"
+                ),
+                sa.func.coalesce(
+                    sa.func.sum(
+                        sa.func.coalesce(Batch.bottle_count, 0)
+                        * sa.func.coalesce(Batch.bottle_volume, 0)
+                    ),
+                    0,
+                ).label("total_volume"),
+            )
+            .group_by(Batch.liquor_id)
+            .subquery()
+        )
+        return (
+            query.outerjoin(stats, stats.c.liquor_id == Liquor.id).options(
+                with_expression(
+                    Liquor._batch_count, sa.func.coalesce(stats.c.batch_count, 0)
+                ),
+                with_expression(
+                    Liquor._total_bottles, sa.func.coalesce(stats.c.total_bottles, 0)
+                ),
+                with_expression(
+                    Liquor._total_volume,
+                    sa.cast(sa.func.coalesce(stats.c.total_volume, 0), sa.Float),
+                ),
+            )
+            # Refresh the aggregates on liquors already in the identity map
+            .execution_options(populate_existing=True)
+        )
+
+    @reads_from_replica
     def get_all_for_user(self, user_id: int) -> List[Liquor]:
         result = db.session.scalars(
             db.select(Liquor).where(Liquor.user_id == user_id)
         ).all()
         return list(result)
 
+    @reads_from_replica
+    def get_all_with_stats_for_user(self, user_id: int) -> List[Liquor]:
+        """Get all liquors for a user with batch aggregates preloaded"""
+        query = self.with_stats(db.select(Liquor).where(Liquor.user_id == user_id))
+        result = db.session.scalars(query.order_by(Liquor.id)).all()
+        return list(result)
+
     def get_paginated_for_user(
-        self, user_id: int, page: int = 1, per_page: int = 10
-    ) -> Tuple[List[Liquor], int]:
+        self,
+        user_id: int,
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        include_stats: bool = False,
+    ) -> Tuple[List[Liquor], Optional[int], Optional[str]]:
         """Get paginated liquors for a user"""
         query = db.select(Liquor).where(Liquor.user_id == user_id)
-
-        # Get total count
-        count_query = sa.select(sa.func.count()).select_from(query.subquery())
-        total = db.session.scalar(count_query) or 0
-
-        # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-
-        result = db.session.scalars(query).all()
-        return list(result), total
+        if include_stats:
+            query = self.with_stats(query)
+        return self.paginate(query, [Liquor.id], page, per_page, cursor, count)
+
+    def get_validator_for_user(
+        self, user_id: int, include_stats: bool = False
+    ) -> Optional[Tuple[Any, ...]]:
+        """Validator for a user's liquors, and their batches when stats are shown"""
+        query = sa.select(
+            sa.func.count(sa.distinct(Liquor.id)), sa.func.max(Liquor.updated_at)
+        ).where(Liquor.user_id == user_id)
+        if include_stats:
+            query = query.outerjoin(Batch, Batch.liquor_id == Liquor.id).add_columns(
+                sa.func.count(Batch.id), sa.func.max(Batch.updated_at)
+            )
+        return self.get_validator(query)
+
+    def get_validator_for_liquor(
+        self, liquor_id: int, user_id: int, include_stats: bool = False
+    ) -> Optional[Tuple[Any, ...]]:
+        """Validator for one of the user's liquors, with its batches for stats"""
+        query = sa.select(Liquor.updated_at).where(
+            Liquor.id == liquor_id, Liquor.user_id == user_id
+        )
+        if include_stats:
+            query = (
+                query.outerjoin(Batch, Batch.liquor_id == Liquor.id)
+                .add_columns(sa.func.count(Batch.id), sa.func.max(Batch.updated_at))
+                .group_by(Liquor.id)
+            )
+        return self.get_validator(query)
 
     def user_owns_liquor(self, liquor_id: int, user_id: int) -> bool:
         return (
@@ -105,6 +334,41 @@ class LiquorRepository(BaseRepository):
             is not None
         )
 
+    def stream_for_user(
+        self, user_id: int, yield_per: int = EXPORT_YIELD_PER
+    ) -> Iterator[Any]:
+        """Stream the user's liquors as row mappings, oldest first"""
+        query = (
+            db.select(
+                Liquor.id,
+                Liquor.name,
+                Liquor.description,
+                Liquor.created,
+            )
+            .where(Liquor.user_id == user_id)
+            .order_by(Liquor.id)
+        )
+        return stream_rows(query, yield_per)
+
+    def get_owners(self, liquor_ids: Iterable[int]) -> Dict[int, int]:
+        """Map liquor ids to their owners' user ids"""
+        liquor_ids = set(liquor_ids)
+        if not liquor_ids:
+            return {}
+        rows = db.session.execute(
+            sa.select(Liquor.id, Liquor.user_id).where(Liquor.id.in_(liquor_ids))
+        )
+        return {row.id: row.user_id for row in rows}
+
+    def get_owned_ids(self, liquor_ids: Iterable[int], user_id: int) -> Set[int]:
+        """Return the subset of ``liquor_ids`` that belong to the user"""
+        result = db.session.scalars(
+            db.select(Liquor.id).where(
+                Liquor.id.in_(set(liquor_ids)), Liquor.user_id == user_id
+            )
+        ).all()
+        return set(result)
+
     def create(
         self, name: str, user_id: int, description: Optional[str] = None
     ) -> Liquor:
@@ -113,10 +377,16 @@ class LiquorRepository(BaseRepository):
         self.commit()
         return liquor
 
-    def get_by_id_and_user(self, liquor_id: int, user_id: int) -> Optional[Liquor]:
-        result = db.session.scalar(
-            db.select(Liquor).where(Liquor.id == liquor_id, Liquor.user_id == user_id)
+    @reads_from_replica
+    def get_by_id_and_user(
+        self, liquor_id: int, user_id: int, include_stats: bool = False
+    ) -> Optional[Liquor]:
+        query = db.select(Liquor).where(
+            Liquor.id == liquor_id, Liquor.user_id == user_id
         )
+        if include_stats:
+            query = self.with_stats(query)
+        result = db.session.scalar(query)
         return cast(Optional[Liquor], result)
 
     def update(self, liquor: Liquor, data: Dict[str, Any]) -> None:
@@ -133,6 +403,7 @@ class BatchRepository(BaseRepository):
     def __init__(self) -> None:
         super().__init__(Batch)
 
+    @reads_from_replica
     def get(self, model_id: int) -> Optional[Batch]:
         result = (
             db.session.query(Batch)
@@ -145,6 +416,109 @@ class BatchRepository(BaseRepository):
         )
         return cast(Optional[Batch], result)
 
+    @staticmethod
+    def _owned_by(query: sa.Select, user_id: int) -> sa.Select:
+        return query.join(Liquor, Liquor.id == Batch.liquor_id).where(
+            Liquor.user_id == user_id
+        )
+
+    @reads_from_replica
+    def get_for_user(
+        self, batch_id: int, user_id: int, with_formulas: bool = False
+    ) -> Optional[Batch]:
+        """
+        Get a batch only if its liquor belongs to the user, in one statement.
+        Formulas and their ingredients are joined in only when asked for;
+        otherwise ingredient_count comes from a subquery column.
+        """
+        query = self._owned_by(db.select(Batch).where(Batch.id == batch_id), user_id)
+        if with_formulas:
+            query = query.options(
+                joinedload(Batch.formulas).joinedload(BatchFormula.ingredient)
+            )
+        else:
+            query = self.with_ingredient_count(query)
+        result = db.session.scalars(query).unique().first()
+        return cast(Optional[Batch], result)
+
+    def stream_for_user(
+        self, user_id: int, yield_per: int = EXPORT_YIELD_PER
+    ) -> Iterator[Any]:
+        """Stream the batches of all the user's liquors as row mappings"""
+        query = self._owned_by(
+            db.select(
+                Batch.id,
+                Batch.liquor_id,
+                Batch.date,
+                Batch.description,
+                Batch.bottle_count,
+                Batch.bottle_volume,
+                Batch.bottle_volume_unit,
+            ),
+            user_id,
+        ).order_by(Batch.liquor_id, Batch.id)
+        return stream_rows(query, yield_per)
+
+    def get_validator_for_liquor(self, liquor_id: int) -> Optional[Tuple[Any, ...]]:
+        """
+        Validator for a liquor's batch list, including ingredient counts.
+        Formulas moved between batches keep the total count, so their latest
+        updated_at is part of it too.
+        """
+        query = (
+            sa.select(
+                sa.func.count(sa.distinct(Batch.id)),
+                sa.func.max(Batch.updated_at),
+                sa.func.count(BatchFormula.id),
+                sa.func.max(BatchFormula.updated_at),
+            )
+            .outerjoin(BatchFormula, BatchFormula.batch_id == Batch.id)
+            .where(Batch.liquor_id == liquor_id)
+        )
+        return self.get_validator(query)
+
+    def get_validator_with_formulas(
+        self, batch_id: int, user_id: int
+    ) -> Optional[Tuple[Any, ...]]:
+        """Validator for a user's batch with its formulas and ingredient names"""
+        query = self._owned_by(
+            sa.select(
+                Batch.updated_at,
+                sa.func.count(BatchFormula.id),
+                sa.func.max(BatchFormula.updated_at),
+                sa.func.max(Ingredient.updated_at),
+            )
+            .outerjoin(BatchFormula, BatchFormula.batch_id == Batch.id)
+            .outerjoin(Ingredient, Ingredient.id == BatchFormula.ingredient_id)
+            .where(Batch.id == batch_id),
+            user_id,
+        ).group_by(Batch.id)
+        return self.get_validator(query)
+
+    def get_owners(self, batch_ids: Iterable[int]) -> Dict[int, int]:
+        """Map batch ids to the user ids owning their liquors"""
+        batch_ids = set(batch_ids)
+        if not batch_ids:
+            return {}
+        rows = db.session.execute(
+            sa.select(Batch.id, Liquor.user_id)
+            .join(Liquor, Liquor.id == Batch.liquor_id)
+            .where(Batch.id.in_(batch_ids))
+        )
+        return {row.id: row.user_id for row in rows}
+
+    def exists(self, batch_id: int) -> bool:
+        return (
+            db.session.scalar(db.select(Batch.id).where(Batch.id == batch_id))
+            is not None
+        )
+
+    def exists_for_user(self, batch_id: int, user_id: int) -> bool:
+        """Check that a batch exists and belongs to the user, selecting only its id"""
+        query = self._owned_by(db.select(Batch.id).where(Batch.id == batch_id), user_id)
+        return db.session.scalar(query) is not None
+
+    @reads_from_replica
     def get_all_for_liquor(self, liquor_id: int) -> List[Batch]:
         result = db.session.scalars(
             db.select(Batch)
@@ -153,26 +527,55 @@ class BatchRepository(BaseRepository):
         ).all()
         return list(result)
 
-    def get_paginated_for_liquor(
-        self, liquor_id: int, page: int = 1, per_page: int = 10
-    ) -> Tuple[List[Batch], int]:
-        """Get paginated batches for a liquor"""
-        query = (
+    @reads_from_replica
+    def get_all_with_formulas_for_liquor(self, liquor_id: int) -> List[Batch]:
+        """
+        Get all batches for a liquor with formulas and ingredients eager-loaded.
+        Runs a fixed number of queries however many batches the liquor has.
+        """
+        result = db.session.scalars(
             db.select(Batch)
             .where(Batch.liquor_id == liquor_id)
-            .order_by(Batch.date.desc())
-        )
-
-        # Get total count
-        count_query = sa.select(sa.func.count()).select_from(query.subquery())
-        total = db.session.scalar(count_query) or 0
+            .options(selectinload(Batch.formulas).joinedload(BatchFormula.ingredient))
+            .order_by(Batch.date.desc(), Batch.id.desc())
+        ).all()
+        return list(result)
 
-        # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
+    @staticmethod
+    def with_ingredient_count(query: sa.Select) -> sa.Select:
+        """Attach ingredient_count as a correlated subquery column"""
+        ingredient_count = (
+            sa.select(sa.func.count(BatchFormula.id))
+            .where(BatchFormula.batch_id == Batch.id)
+            .correlate(Batch)
+            .scalar_subquery()
+        )
+        return query.options(
+            with_expression(Batch._ingredient_count, ingredient_count)
+        ).execution_options(populate_existing=True)
 
-        result = db.session.scalars(query).all()
-        return list(result), total
+    def get_paginated_for_liquor(
+        self,
+        liquor_id: int,
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+    ) -> Tuple[List[Batch], Optional[int], Optional[str]]:
+        """Get paginated batches for a liquor, newest first"""
+        query = self.with_ingredient_count(
+            db.select(Batch).where(Batch.liquor_id == liquor_id)
+        )
+        # (date, id) follows the idx_batch_liquor_date index; id breaks ties
+        return self.paginate(
+            query,
+            [Batch.date, Batch.id],
+            page,
+            per_page,
+            cursor,
+            count,
+            descending=True,
+        )
 
     def create_with_formulas(
         self, batch_data: dict, formulas_data: List[dict]
@@ -180,19 +583,45 @@ class BatchRepository(BaseRepository):
         try:
             batch = Batch(**batch_data)
             batch.validate_bottle_data()
+            # Formulas go in with the batch; the flush inserts them as one batch
+            batch.formulas = [
+                BatchFormula(**formula_data) for formula_data in formulas_data
+            ]
             self.add(batch)
-            self.flush()
-
-            for formula_data in formulas_data:
-                formula = BatchFormula(batch_id=batch.id, **formula_data)
-                self.add(formula)
-
             self.commit()
             return batch, None
         except Exception as e:
             self.rollback()
             return None, str(e)
 
+    def bulk_create_with_formulas(
+        self,
+        batches_data: Sequence[Mapping[str, Any]],
+        formulas_data: Sequence[Sequence[Mapping[str, Any]]],
+    ) -> List[int]:
+        """
+        Insert many batches and their formulas with multi-row INSERTs.
+        ``formulas_data[i]`` belongs to ``batches_data[i]``. Returns the new
+        batch ids in input order. Does not commit.
+        """
+        if not batches_data:
+            return []
+        # Asking for RETURNING in parameter order makes SQLAlchemy fall back to
+        # one INSERT per row on SQLite, which has no implicit sentinel. Ids are
+        # handed out in VALUES order within the transaction, so sorting the
+        # returned ids restores input order without giving up multi-row VALUES.
+        batch_ids = sorted(
+            db.session.scalars(sa.insert(Batch).returning(Batch.id), batches_data)
+        )
+        formula_rows = [
+            {"batch_id": batch_id, **formula_data}
+            for batch_id, formulas in zip(batch_ids, formulas_data)
+            for formula_data in formulas
+        ]
+        if formula_rows:
+            db.session.execute(sa.insert(BatchFormula), formula_rows)
+        return batch_ids
+
     def create(self, batch_data: dict) -> Tuple[Optional[Batch], Optional[str]]:
         try:
             batch = Batch(**batch_data)
@@ -228,24 +657,115 @@ class UserRepository(BaseRepository):
         return cast(Optional[User], result)
 
 
+class CacheVersionRepository(BaseRepository):
+    def __init__(self) -> None:
+        super().__init__(CacheVersion)
+
+    def get_version(self, name: str) -> int:
+        result = db.session.scalar(
+            db.select(CacheVersion.version).where(CacheVersion.name == name)
+        )
+        return result or 0
+
+    def bump(self, name: str) -> None:
+        """Increment a version in the current transaction; the caller commits"""
+        result = db.session.execute(
+            sa.update(CacheVersion)
+            .where(CacheVersion.name == name)
+            .values(version=CacheVersion.version + 1)
+        )
+        if not result.rowcount:
+            self.add(CacheVersion(name=name, version=1))
+
+
+class PrimaryReadDeadlineRepository(BaseRepository):
+    def __init__(self) -> None:
+        super().__init__(PrimaryReadDeadline)
+
+    def get_until(self, user_id: int) -> float:
+        result = db.session.scalar(
+            db.select(PrimaryReadDeadline.until).where(
+                PrimaryReadDeadline.user_id == user_id
+            )
+        )
+        return result or 0.0
+
+    def set_until(self, user_id: int, until: float) -> None:
+        """Store a deadline in the current transaction; the caller commits"""
+        result = db.session.execute(
+            sa.update(PrimaryReadDeadline)
+            .where(PrimaryReadDeadline.user_id == user_id)
+            .values(until=until)
+        )
+        if not result.rowcount:
+            self.add(PrimaryReadDeadline(user_id=user_id, until=until))
+
+
 class IngredientRepository(BaseRepository):
+    # cache_version row bumped on every write so workers reload their catalog
+    CATALOG_VERSION = "ingredients"
+
     def __init__(self) -> None:
         super().__init__(Ingredient)
+        self.cache_versions = CacheVersionRepository()
 
+    @reads_from_replica
     def get_all(self) -> List[Ingredient]:
         result = db.session.scalars(sa.select(Ingredient)).all()
         return list(result)
 
+    def get_catalog_rows(self) -> List[sa.Row]:
+        """Get the columns the ingredient catalog caches, without ORM objects"""
+        result = db.session.execute(
+            sa.select(
+                Ingredient.id,
+                Ingredient.name,
+                Ingredient.description,
+                Ingredient.created_at,
+                Ingredient.updated_at,
+            ).order_by(Ingredient.id)
+        ).all()
+        return list(result)
+
+    def get_catalog_version(self) -> int:
+        return self.cache_versions.get_version(self.CATALOG_VERSION)
+
+    def get_validator_for_ingredient(
+        self, ingredient_id: int
+    ) -> Optional[Tuple[Any, ...]]:
+        return self.get_validator(
+            sa.select(Ingredient.updated_at).where(Ingredient.id == ingredient_id)
+        )
+
+    def get_choices(self) -> List[Tuple[int, str]]:
+        """(id, name) choices served from the process-local catalog"""
+        from app.catalog import ingredient_catalog
+
+        return ingredient_catalog.choices()
+
+    def get_ids(self) -> FrozenSet[int]:
+        """Ids of all ingredients served from the process-local catalog"""
+        from app.catalog import ingredient_catalog
+
+        return ingredient_catalog.ids()
+
     def get_by_name(self, name: str) -> Optional[Ingredient]:
-        result = db.session.scalar(db.select(Ingredient).where(Ingredient.name == name))
+        """Case-insensitive lookup, a single probe of the normalized name index"""
+        result = db.session.scalar(
+            db.select(Ingredient).where(
+                Ingredient.name_normalized == normalize_name(name)
+            )
+        )
         return cast(Optional[Ingredient], result)
 
     def create(self, name: str, description: Optional[str] = None) -> Ingredient:
         ingredient = Ingredient(name=name, description=description)
         self.add(ingredient)
+        self.cache_versions.bump(self.CATALOG_VERSION)
         self.commit()
         return ingredient
 
+    @reads_from_replica
     def get(self, ingredient_id: int) -> Optional[Ingredient]:
         result = db.session.get(Ingredient, ingredient_id)
         return cast(Optional[Ingredient], result)
@@ -253,10 +773,12 @@ class IngredientRepository(BaseRepository):
     def update(self, ingredient: Ingredient, data: Dict[str, Any]) -> None:
         for key, value in data.items():
             setattr(ingredient, key, value)
+        self.cache_versions.bump(self.CATALOG_VERSION)
         self.commit()
 
     def delete(self, ingredient: Ingredient) -> None:
         db.session.delete(ingredient)
+        self.cache_versions.bump(self.CATALOG_VERSION)
         db.session.commit()
 
 
@@ -264,6 +786,7 @@ class BatchFormulaRepository(BaseRepository):
     def __init__(self) -> None:
         super().__init__(BatchFormula)
 
+    @reads_from_replica
     def get_all_for_batch(self, batch_id: int) -> List[BatchFormula]:
         result = db.session.scalars(
             db.select(BatchFormula)
@@ -273,26 +796,68 @@ class BatchFormulaRepository(BaseRepository):
         return list(result)
 
     def get_paginated_for_batch(
-        self, batch_id: int, page: int = 1, per_page: int = 10
-    ) -> Tuple[List[BatchFormula], int]:
+        self,
+        batch_id: int,
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+    ) -> Tuple[List[BatchFormula], Optional[int], Optional[str]]:
         """Get paginated formulas for a batch"""
         query = (
             db.select(BatchFormula)
             .where(BatchFormula.batch_id == batch_id)
             .options(joinedload(BatchFormula.ingredient))
         )
+        return self.paginate(query, [BatchFormula.id], page, per_page, cursor, count)
 
-        # Get total count
-        count_query = sa.select(sa.func.count()).select_from(query.subquery())
-        total = db.session.scalar(count_query) or 0
+    def get_validator_for_batch(self, batch_id: int) -> Optional[Tuple[Any, ...]]:
+        """Validator for a batch's formulas and their ingredient names"""
+        query = (
+            sa.select(
+                sa.func.count(BatchFormula.id),
+                sa.func.max(BatchFormula.updated_at),
+                sa.func.max(Ingredient.updated_at),
+            )
+            .join(Ingredient, Ingredient.id == BatchFormula.ingredient_id)
+            .where(BatchFormula.batch_id == batch_id)
+        )
+        return self.get_validator(query)
 
-        # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
+    def stream_for_user(
+        self, user_id: int, yield_per: int = EXPORT_YIELD_PER
+    ) -> Iterator[Any]:
+        """Stream the formulas of all the user's batches as row mappings"""
+        query = (
+            db.select(
+                BatchFormula.id,
+                BatchFormula.batch_id,
+                BatchFormula.ingredient_id,
+                Ingredient.name.label("ingredient_name"),
+                BatchFormula.quantity,
+                BatchFormula.unit,
+            )
+            .join(Ingredient, Ingredient.id == BatchFormula.ingredient_id)
+            .join(Batch, Batch.id == BatchFormula.batch_id)
+            .join(Liquor, Liquor.id == Batch.liquor_id)
+            .where(Liquor.user_id == user_id)
+            .order_by(BatchFormula.batch_id, BatchFormula.id)
+        )
+        return stream_rows(query, yield_per)
 
-        result = db.session.scalars(query).all()
-        return list(result), total
+    @reads_from_replica
+    def get_for_user(self, formula_id: int, user_id: int) -> Optional[BatchFormula]:
+        """Get a formula only if its batch's liquor belongs to the user"""
+        result = db.session.scalar(
+            db.select(BatchFormula)
+            .join(Batch, Batch.id == BatchFormula.batch_id)
+            .join(Liquor, Liquor.id == Batch.liquor_id)
+            .where(BatchFormula.id == formula_id, Liquor.user_id == user_id)
+            .options(joinedload(BatchFormula.ingredient))
+        )
+        return cast(Optional[BatchFormula], result)
 
+    @reads_from_replica
     def get(self, formula_id: int) -> Optional[BatchFormula]:
         result = (
             db.session.query(BatchFormula)
@@ -341,3 +906,124 @@ class BatchFormulaRepository(BaseRepository):
         except Exception:
             self.rollback()
             return False
+
+
+class SearchRepository(BaseRepository):
+    def __init__(self) -> None:
+        super().__init__(SearchDocument)
+
+    def replace_documents(self, documents: List[dict]) -> None:
+        """Insert or replace documents keyed by (kind, object_id); no commit"""
+        if not documents:
+            return
+        self.delete_documents(
+            [(document["kind"], document["object_id"]) for document in documents]
+        )
+        self.add_documents(documents)
+
+    def add_documents(self, documents: List[dict]) -> None:
+        """Insert documents of objects that have none yet; no commit"""
+        if not documents:
+            return
+        # Core statements: this also runs inside after_flush, where the ORM
+        # unit of work must not be re-entered
+        db.session.execute(sa.insert(SearchDocument.__table__), documents)
+
+    def delete_documents(self, keys: Sequence[Tuple[str, int]]) -> None:
+        table = SearchDocument.__table__
+        by_kind: Dict[str, Set[int]] = {}
+        for kind, object_id in keys:
+            by_kind.setdefault(kind, set()).add(object_id)
+        for kind, object_ids in by_kind.items():
+            db.session.execute(
+                sa.delete(table).where(
+                    table.c.kind == kind, table.c.object_id.in_(object_ids)
+                )
+            )
+
+    def get_batch_rows(self, batch_ids: Iterable[int]) -> List[sa.Row]:
+        """The batch columns a search document is built from, with the owner"""
+        result = db.session.execute(
+            sa.select(
+                Batch.id,
+                Batch.liquor_id,
+                Batch.description,
+                Batch.date,
+                Liquor.user_id,
+            )
+            .join(Liquor, Liquor.id == Batch.liquor_id)
+            .where(Batch.id.in_(set(batch_ids)))
+        ).all()
+        return list(result)
+
+    def _ranked(self, user_id: int, terms: Sequence[str]) -> sa.Subquery:
+        """Matching documents visible to the user, with rank (lower is better)"""
+        documents = SearchDocument.__table__
+        visible = sa.or_(documents.c.user_id == user_id, documents.c.user_id.is_(None))
+
+        if db.engine.dialect.name == "postgresql":
+            vector = sa.func.to_tsvector(
+                sa.literal_column("'simple'"), documents.c.body
+            )
+            tsquery = sa.func.to_tsquery(
+                sa.literal_column("'simple'"),
+                " & ".join(f"{term}:*" for term in terms),
+            )
+            return (
+                sa.select(
+                    documents,
+                    (-sa.func.ts_rank(vector, tsquery, type_=sa.Float)).label("rank"),
+                )
+                .where(vector.op("@@")(tsquery), visible)
+                .subquery()
+            )
+
+        # SQLite FTS5: every quoted term must match as a prefix
+        fts = sa.table("search_document_fts", sa.column("rowid"))
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            sa.select(
+                documents,
+                sa.func.bm25(sa.literal_column(fts.name), type_=sa.Float).label("rank"),
+            )
+            .select_from(fts)
+            .join(documents, documents.c.id == fts.c.rowid)
+            .where(sa.literal_column(fts.name).op("MATCH")(match), visible)
+            .subquery()
+        )
+
+    @reads_from_replica
+    def search(
+        self,
+        user_id: int,
+        terms: Sequence[str],
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+    ) -> Tuple[List[sa.Row], Optional[int], Optional[str]]:
+        """
+        Rank documents matching every term as a prefix, best first. Without
+        a cursor the page is selected with OFFSET; with one, the query seeks
+        past the (rank, id) of the previous page's last row.
+        Returns (rows, total, next_cursor).
+        """
+        if not terms:
+            return [], (None if count == "none" else 0), None
+        ranked = self._ranked(user_id, terms)
+        keys = [ranked.c.rank, ranked.c.id]
+        total = self.count(sa.select(ranked), count)
+
+        query = sa.select(ranked).order_by(*keys)
+        if cursor:
+            values = KeysetCursor.decode(cursor, keys)
+            query = query.where(sa.tuple_(*keys) > sa.tuple_(*values))
+        else:
+            query = query.offset((max(page, 1) - 1) * per_page)
+
+        rows = list(db.session.execute(query.limit(per_page + 1)).all())
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = KeysetCursor.encode([rows[-1].rank, rows[-1].id])
+        return rows, total, next_cursor
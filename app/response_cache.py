@@ -0,0 +1,417 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import sqlalchemy as sa
+from flask import Flask, Response, g, make_response, request
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor
+from app.replica import RoutingSession
+
+# Supported RESPONSE_CACHE_BACKEND values
+RESPONSE_CACHE_BACKENDS = ("none", "memory", "filesystem", "shared")
+# Response headers replayed on a cache hit
+_CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+# session.info key collecting tags to invalidate once the transaction commits
+_PENDING_TAGS = "nalewka.response_cache_tags"
+
+
+class CacheBackend(Protocol):
+    """What ResponseCache needs from the place it keeps entries"""
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]: ...
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None: ...
+
+
+class NullBackend:
+    """Backend of a disabled cache; it keeps nothing"""
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return [None] * len(keys)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        pass
+
+
+class MemoryBackend:
+    """Bounded in-process LRU; each worker has its own copy"""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        now = time.monotonic()
+        values: List[Optional[str]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or (entry[1] is not None and entry[1] <= now):
+                    self._entries.pop(key, None)
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+        return values
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class FileSystemBackend:
+    """
+    One file per key, shared by the workers of a host. Expired files are
+    deleted when read, and every ``sweep_interval`` writes a worker deletes
+    all expired files and then the oldest ones beyond ``max_entries``.
+    """
+
+    def __init__(
+        self, directory: str, max_entries: int = 1024, sweep_interval: int = 100
+    ) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()
+        )
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            # Another worker got there first
+            pass
+
+    @staticmethod
+    def _expires_at(line: str) -> Optional[float]:
+        # The first line of a file holds its expiry time, empty for none
+        return float(line) if line.strip() else None
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        values: List[Optional[str]] = []
+        for key in keys:
+            path = self._path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    expires_at = self._expires_at(f.readline())
+                    value = f.read()
+            except (OSError, ValueError):
+                values.append(None)
+                continue
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(path)
+                values.append(None)
+                continue
+            values.append(value)
+        return values
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        # Write then rename, so readers never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{expires_at if expires_at is not None else ''}\n{value}")
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % self.sweep_interval == 0
+        if sweep:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Delete expired files, then the oldest beyond ``max_entries``"""
+        now = time.time()
+        entries: List[Tuple[float, str]] = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                # Files still being written start with a dot
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                try:
+                    with open(entry.path, encoding="utf-8") as f:
+                        expires_at = self._expires_at(f.readline())
+                    written_at = entry.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                if expires_at is not None and expires_at <= now:
+                    self._remove(entry.path)
+                else:
+                    entries.append((written_at, entry.path))
+        entries.sort()
+        # Evicted tag tokens are recreated, so their entries just miss
+        for _, path in entries[: max(0, len(entries) - self.max_entries)]:
+            self._remove(path)
+
+
+class LocalSharedClient:
+    """
+    In-process stand-in for the small part of the Redis API the shared
+    backend uses, selected with RESPONSE_CACHE_URL=local:// in development
+    and tests.
+    """
+
+    def __init__(self) -> None:
+        self._memory = MemoryBackend(max_entries=1 << 20)
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return self._memory.get_many(keys)
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        self._memory.set(key, value, ex)
+
+
+class SharedBackend:
+    """Backend on a Redis-compatible server, shared by every worker and host"""
+
+    def __init__(self, client: Any, prefix: str = "nalewka:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "SharedBackend":
+        if url.startswith("local://"):
+            return cls(LocalSharedClient())
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=shared needs the redis package "
+                "(pip install redis)"
+            )
+        return cls(redis.Redis.from_url(url, decode_responses=True))
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return list(self.client.mget([self.prefix + key for key in keys]))
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        # Redis rejects an expiry of 0 seconds
+        self.client.set(
+            self.prefix + key, value, ex=max(1, math.ceil(ttl)) if ttl else None
+        )
+
+
+class ResponseCache:
+    """
+    Cache of whole GET responses for api_v1_bp routes.
+
+    Entries are keyed by endpoint, path, user id and query arguments, and
+    carry tags such as "user:<id>:liquors" or "ingredients". Each tag has a
+    token stored in the backend. Invalidating a tag replaces its token, so
+    every entry stored under the old token misses from then on, in all
+    workers sharing the backend. Tags are invalidated after each commit
+    that changes liquors, batches, formulas or ingredients.
+    """
+
+    def __init__(self) -> None:
+        self.backend: CacheBackend = NullBackend()
+        self.ttl: float = 60.0
+
+    def init_app(self, app: Flask) -> None:
+        name = app.config.get("RESPONSE_CACHE_BACKEND", "none")
+        if name not in RESPONSE_CACHE_BACKENDS:
+            raise ValueError(
+                f"RESPONSE_CACHE_BACKEND must be one of: "
+                f"{', '.join(RESPONSE_CACHE_BACKENDS)}"
+            )
+        self.ttl = float(app.config.get("RESPONSE_CACHE_TTL", self.ttl))
+        if name == "memory":
+            self.backend = MemoryBackend(
+                int(app.config.get("RESPONSE_CACHE_SIZE", 1024))
+            )
+        elif name == "filesystem":
+            self.backend = FileSystemBackend(
+                app.config.get("RESPONSE_CACHE_DIR")
+                or os.path.join(app.instance_path, "response-cache"),
+                int(app.config.get("RESPONSE_CACHE_SIZE", 1024)),
+            )
+        elif name == "shared":
+            self.backend = SharedBackend.from_url(
+                app.config.get("RESPONSE_CACHE_URL") or "local://"
+            )
+        else:
+            self.backend = NullBackend()
+
+        for event, listener in (
+            ("after_flush", self._collect_tags),
+            ("after_commit", self._invalidate_pending),
+            ("after_rollback", self._discard_pending),
+        ):
+            if not sa.event.contains(RoutingSession, event, listener):
+                sa.event.listen(RoutingSession, event, listener)
+        app.extensions["response_cache"] = self
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, NullBackend)
+
+    def cached(self, *tags: str) -> Callable:
+        """
+        Cache a GET view's 200 responses under ``tags``. Tags are formatted
+        with the current user_id and the view's URL arguments, e.g.
+        "user:{user_id}:liquors". Apply it below token_required.
+        """
+
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled or request.method != "GET":
+                    return view(*args, **kwargs)
+
+                user_id = g.get("user_id")
+                entry_tags = [
+                    tag.format(user_id=user_id, **(request.view_args or {}))
+                    for tag in tags
+                ]
+                key = self._key(user_id)
+                response = self._load(key)
+                if response is not None:
+                    response.headers["X-Cache"] = "HIT"
+                    return response.make_conditional(request)
+
+                # Tokens are read before the view runs: a write committed while
+                # it reads replaces them, so the entry is already stale
+                tokens = self._current_tokens(entry_tags)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    self._store(key, response, dict(zip(entry_tags, tokens)))
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str) -> None:
+        """Make every entry stored under any of ``tags`` miss"""
+        if not self.enabled:
+            return
+        for tag in set(tags):
+            self.backend.set(self._tag_key(tag), uuid.uuid4().hex)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        args = sorted(request.args.items(multi=True))
+        raw = json.dumps([request.endpoint, request.path, user_id, args])
+        return "response:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _tag_tokens(self, tags: Sequence[str]) -> List[Optional[str]]:
+        return self.backend.get_many([self._tag_key(tag) for tag in tags])
+
+    def _load(self, key: str) -> Optional[Response]:
+        (raw,) = self.backend.get_many([key])
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        tags = list(entry["tags"])
+        if tags and self._tag_tokens(tags) != [entry["tags"][tag] for tag in tags]:
+            return None
+        return Response(entry["body"], status=200, headers=entry["headers"])
+
+    def _current_tokens(self, tags: Sequence[str]) -> List[str]:
+        """Tokens of ``tags``, creating the ones never set or evicted"""
+        tokens = self._tag_tokens(tags)
+        current: List[str] = []
+        for tag, token in zip(tags, tokens):
+            if token is None:
+                token = uuid.uuid4().hex
+                self.backend.set(self._tag_key(tag), token)
+            current.append(token)
+        return current
+
+    def _store(self, key: str, response: Response, tags: Dict[str, str]) -> None:
+        entry = {
+            "body": response.get_data(as_text=True),
+            "headers": {
+                name: response.headers[name]
+                for name in _CACHED_HEADERS
+                if name in response.headers
+            },
+            "tags": tags,
+        }
+        self.backend.set(key, json.dumps(entry), self.ttl)
+
+    # Session hooks: tags are collected at flush time, while the changed
+    # objects are still at hand, and invalidated only once the data is visible
+
+    def _collect_tags(self, session: Any, flush_context: Any) -> None:
+        if not self.enabled:
+            return
+        objects = list(session.new) + list(session.dirty) + list(session.deleted)
+        tags = session.info.setdefault(_PENDING_TAGS, set())
+        tags.update(self.tags_for(objects))
+
+    def _invalidate_pending(self, session: Any) -> None:
+        tags = session.info.pop(_PENDING_TAGS, None)
+        if tags:
+            self.invalidate(*tags)
+
+    @staticmethod
+    def _discard_pending(session: Any) -> None:
+        session.info.pop(_PENDING_TAGS, None)
+
+    @staticmethod
+    def tags_for(objects: Iterable[Any]) -> Set[str]:
+        """Tags of the cached responses that show any of ``objects``"""
+        from app.repositories import BatchRepository, LiquorRepository
+
+        tags: Set[str] = set()
+        user_ids: Set[int] = set()
+        liquor_ids: Set[int] = set()
+        batch_ids: Set[int] = set()
+        for obj in objects:
+            if isinstance(obj, Liquor):
+                # Deleting a liquor also removes its batches
+                user_ids.add(obj.user_id)
+                tags.add(f"user:{obj.user_id}:liquors")
+            elif isinstance(obj, Batch):
+                liquor_ids.add(obj.liquor_id)
+            elif isinstance(obj, BatchFormula):
+                batch_ids.add(obj.batch_id)
+            elif isinstance(obj, Ingredient):
+                tags.add("ingredients")
+
+        if liquor_ids:
+            user_ids.update(LiquorRepository().get_owners(liquor_ids).values())
+        if batch_ids:
+            user_ids.update(BatchRepository().get_owners(batch_ids).values())
+        tags.update(f"user:{user_id}:batches" for user_id in user_ids)
+        return tags
+
+
+response_cache = ResponseCache()
@@ -1,8 +1,12 @@
+import hmac
 from functools import wraps
 from typing import Any, Callable
 
 from flask import (
     Blueprint,
+    Response,
+    abort,
+    current_app,
     flash,
     jsonify,
     redirect,
@@ -11,7 +15,9 @@ from flask import (
     url_for,
 )
 from flask_login import current_user, login_required, login_user, logout_user
+from sqlalchemy.exc import SQLAlchemyError
 
+from app import db
 from app.forms import (
     BatchFormulaForm,
     EditBottlesForm,
@@ -20,14 +26,19 @@ from app.forms import (
     LoginForm,
     RegistrationForm,
 )
-from app.models import Ingredient, Liquor, User
+from app.models import Liquor, User
+from app.pool import pool_status, probe
 from app.repositories import (
     BatchRepository,
     IngredientRepository,
     LiquorRepository,
     UserRepository,
 )
-from app.services import create_batch_with_ingredients, update_batch_bottles
+from app.services import (
+    create_batch_with_ingredients,
+    create_ingredient,
+    update_batch_bottles,
+)
 
 user_repository = UserRepository()
 liquor_repository = LiquorRepository()
@@ -67,7 +78,7 @@ def index() -> Any:
     liquors = []
     if current_user.is_authenticated:
         try:
-            liquors = liquor_repository.get_all_for_user(current_user.id)
+            liquors = liquor_repository.get_all_with_stats_for_user(current_user.id)
         except Exception as e:
             flash(f"Error loading liquors: {str(e)}", "error")
     return render_template("index.html", liquors=liquors)
@@ -194,7 +205,7 @@ def liquor_batches(liquor_id: int) -> Any:
         flash("Liquor not found or access denied.", "error")
         return redirect(url_for("main.index"))
 
-    batches = batch_repository.get_all_for_liquor(liquor_id)
+    batches = batch_repository.get_all_with_formulas_for_liquor(liquor_id)
     return render_template("liquor_batches.html", liquor=liquor, batches=batches)
 
 
@@ -254,22 +265,12 @@ def add_ingredient() -> Any:
     """API endpoint to add a new ingredient"""
     form = IngredientForm()
     if form.validate_on_submit():
-        # Check if ingredient already exists
-        existing_ingredient = ingredient_repository.get_by_name(form.name.data)
-        if existing_ingredient:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "error": "An ingredient with this name already exists.",
-                    }
-                ),
-                400,
+        try:
+            ingredient = create_ingredient(
+                name=form.name.data, description=form.description.data
             )
-
-        ingredient = Ingredient(name=form.name.data, description=form.description.data)
-        ingredient_repository.add(ingredient)
-        ingredient_repository.commit()
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
 
         # Return the new ingredient data
         return jsonify(
@@ -281,3 +282,40 @@ def add_ingredient() -> Any:
 
     # Return form errors
     return jsonify({"success": False, "errors": form.errors}), 400
+
+
+@main_bp.route("/healthz/db")
+def healthz_db() -> Any:
+    """Report database reachability and connection pool usage"""
+    status = pool_status(db.engine)
+    try:
+        status.update(probe(db.engine))
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database health check failed: {str(e)}")
+        status["status"] = "error"
+        return jsonify(status), 503
+
+    status["status"] = "ok"
+    return jsonify(status), 200
+
+
+@main_bp.route("/metrics")
+def metrics() -> Any:
+    """
+    Expose request and SQL metrics in the Prometheus text format to scrapers
+    sending METRICS_TOKEN as a bearer token; without a token it is not served
+    """
+    from app.metrics import render_prometheus
+
+    request_metrics = current_app.extensions.get("request_metrics")
+    token = current_app.config.get("METRICS_TOKEN")
+    if request_metrics is None or not token:
+        abort(404)
+    if not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        abort(401)
+    return Response(
+        render_prometheus(request_metrics.collect()),
+        mimetype="text/plain; version=0.0.4",
+    )
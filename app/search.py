@@ -0,0 +1,167 @@
+import re
+from typing import Any, List, Optional
+
+import sqlalchemy as sa
+from flask import Flask
+
+from app.models import Batch, Ingredient, Liquor
+from app.replica import RoutingSession
+from app.utils import fold_diacritics
+
+# Longer queries are cut to this many terms
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+_TITLE_LENGTH = 255
+
+# Attributes that feed a document; changing any other column skips the reindex
+_INDEXED_ATTRIBUTES = {
+    Liquor: ("name", "description"),
+    Batch: ("description", "date", "liquor_id"),
+    Ingredient: ("name",),
+}
+_KINDS = {Liquor: "liquor", Batch: "batch", Ingredient: "ingredient"}
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a query into folded, de-duplicated terms ("Wiśnie 2023" -> [...])"""
+    terms: List[str] = []
+    for term in _TERM.findall(fold_diacritics(query)):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def _title(text: Optional[str]) -> str:
+    text = " ".join((text or "").split())
+    return text[:_TITLE_LENGTH]
+
+
+def liquor_document(liquor_id: int, user_id: int, name: str, description: Any) -> dict:
+    return {
+        "kind": "liquor",
+        "object_id": liquor_id,
+        "user_id": user_id,
+        "liquor_id": liquor_id,
+        "title": _title(name),
+        "body": fold_diacritics(f"{name} {description or ''}"),
+    }
+
+
+def batch_document(
+    batch_id: int, user_id: int, liquor_id: int, description: Any, date: Any
+) -> dict:
+    # The year lets "cherries 2023" find that season's batches
+    year = str(date.year) if date is not None else ""
+    return {
+        "kind": "batch",
+        "object_id": batch_id,
+        "user_id": user_id,
+        "liquor_id": liquor_id,
+        "title": _title(description),
+        "body": fold_diacritics(f"{description or ''} {year}"),
+    }
+
+
+def ingredient_document(ingredient_id: int, name: str) -> dict:
+    return {
+        "kind": "ingredient",
+        "object_id": ingredient_id,
+        "user_id": None,
+        "liquor_id": None,
+        "title": _title(name),
+        "body": fold_diacritics(name),
+    }
+
+
+class SearchIndex:
+    """
+    Keeps search_document rows in step with liquors, batches and ingredients.
+
+    ORM writes are picked up after every flush, in the same transaction, and
+    only when an indexed attribute changed. Writes made with Core statements
+    (such as bulk imports) bypass the ORM and call index_batches themselves.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        if not sa.event.contains(RoutingSession, "after_flush", self._after_flush):
+            sa.event.listen(RoutingSession, "after_flush", self._after_flush)
+        app.extensions["search_index"] = self
+
+    def index_batches(self, batch_ids: List[int]) -> None:
+        """(Re)index batches written without the ORM; the caller commits"""
+        from app.repositories import SearchRepository
+
+        repository = SearchRepository()
+        repository.replace_documents(
+            [
+                batch_document(
+                    row.id, row.user_id, row.liquor_id, row.description, row.date
+                )
+                for row in repository.get_batch_rows(batch_ids)
+            ]
+        )
+
+    def _after_flush(self, session: Any, flush_context: Any) -> None:
+        # History is still in place here, so untouched indexed columns show up
+        changed = [obj for obj in session.new if type(obj) in _INDEXED_ATTRIBUTES]
+        changed += [
+            obj
+            for obj in session.dirty
+            if type(obj) in _INDEXED_ATTRIBUTES and self._indexed_changed(obj)
+        ]
+        deleted = [
+            (_KINDS[type(obj)], obj.id)
+            for obj in session.deleted
+            if type(obj) in _INDEXED_ATTRIBUTES
+        ]
+        if not changed and not deleted:
+            return
+
+        from app.repositories import SearchRepository
+
+        repository = SearchRepository()
+        repository.delete_documents(deleted)
+        repository.replace_documents(self._documents(changed))
+
+    @staticmethod
+    def _indexed_changed(obj: Any) -> bool:
+        state = sa.inspect(obj)
+        return any(
+            state.attrs[key].history.has_changes()
+            for key in _INDEXED_ATTRIBUTES[type(obj)]
+        )
+
+    @staticmethod
+    def _documents(objects: List[Any]) -> List[dict]:
+        from app.repositories import LiquorRepository
+
+        owners = LiquorRepository().get_owners(
+            {obj.liquor_id for obj in objects if isinstance(obj, Batch)}
+        )
+        documents = []
+        for obj in objects:
+            if isinstance(obj, Liquor):
+                documents.append(
+                    liquor_document(obj.id, obj.user_id, obj.name, obj.description)
+                )
+            elif isinstance(obj, Batch):
+                owner_id = owners.get(obj.liquor_id)
+                if owner_id is None:
+                    # A NULL user_id would show the batch to every user
+                    continue
+                documents.append(
+                    batch_document(
+                        obj.id,
+                        owner_id,
+                        obj.liquor_id,
+                        obj.description,
+                        obj.date,
+                    )
+                )
+            else:
+                documents.append(ingredient_document(obj.id, obj.name))
+        return documents
+
+
+search_index = SearchIndex()
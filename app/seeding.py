@@ -0,0 +1,199 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, TypedDict
+
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import Ingredient, Liquor, User
+from app.repositories import (
+    BatchRepository,
+    CacheVersionRepository,
+    IngredientRepository,
+    SearchRepository,
+)
+from app.response_cache import response_cache
+from app.search import batch_document, ingredient_document, liquor_document
+from app.utils import normalize_name
+
+# Password of every generated user
+SEED_PASSWORD = "password123"
+# Aim for about this many formulas per transaction
+SEED_CHUNK_FORMULAS = 50_000
+
+_FRUITS = (
+    "Wiśnie", "Maliny", "Cytryny", "Pigwa", "Aronia", "Porzeczki", "Jeżyny",
+    "Śliwki", "Orzechy", "Dereń", "Tarnina", "Czarny bez", "Miód", "Imbir",
+)  # fmt: skip
+_LIQUORS = (
+    "Wiśniówka", "Malinówka", "Cytrynówka", "Pigwówka", "Aroniówka",
+    "Orzechówka", "Śliwowica", "Dereniówka", "Tarninówka", "Miodówka",
+)  # fmt: skip
+_BASES = ("Wódka", "Spirytus", "Cukier", "Goździki", "Wanilia", "Cynamon")
+_UNITS = ("g", "kg", "ml", "l", "pcs")
+_FIRST_BATCH = datetime(2018, 1, 1)
+
+
+class _IngredientRow(TypedDict):
+    name: str
+    name_normalized: str
+    description: str
+
+
+class _LiquorRow(TypedDict):
+    user_id: int
+    name: str
+    description: str
+
+
+class _BatchRow(TypedDict):
+    liquor_id: int
+    description: str
+    date: datetime
+    bottle_count: int
+    bottle_volume: float
+
+
+class _FormulaRow(TypedDict):
+    ingredient_id: int
+    quantity: float
+    unit: str
+
+
+def _chunks(count: int, size: int) -> Iterator[range]:
+    for start in range(0, count, size):
+        yield range(start, min(start + size, count))
+
+
+def _insert_returning_ids(model: Any, rows: Sequence[Mapping[str, Any]]) -> List[int]:
+    # Ids come back in VALUES order within the transaction; see
+    # BatchRepository.bulk_create_with_formulas
+    return sorted(db.session.scalars(sa.insert(model).returning(model.id), rows))
+
+
+def seed_scale(
+    users: int,
+    liquors_per_user: int,
+    batches_per_liquor: int,
+    formulas_per_batch: int,
+    catalog_size: int,
+    seed: int = 0,
+    prefix: str = "seed",
+) -> Dict[str, int]:
+    """
+    Generate a production-shaped dataset with multi-row Core INSERTs, one
+    transaction per group of users. The same seed always produces the same
+    names, dates and quantities. Usernames are "<prefix>_<n>"; the prefix
+    must not be in use yet. Returns the number of rows created per table.
+    """
+    if formulas_per_batch and not catalog_size:
+        raise ValueError("Formulas need a catalog size of at least 1")
+    rng = random.Random(seed)
+    batch_repository = BatchRepository()
+    search_repository = SearchRepository()
+    created = {"users": 0, "liquors": 0, "batches": 0, "formulas": 0}
+
+    ingredient_rows: List[_IngredientRow] = []
+    for n in range(catalog_size):
+        name = f"{_FRUITS[n % len(_FRUITS)]} {prefix} {n}"
+        if n % 3 == 0:
+            name = f"{_BASES[n % len(_BASES)]} {prefix} {n}"
+        ingredient_rows.append(
+            {
+                "name": name,
+                "name_normalized": normalize_name(name),
+                "description": f"Generated ingredient {n}",
+            }
+        )
+    ingredient_ids = _insert_returning_ids(Ingredient, ingredient_rows)
+    search_repository.add_documents(
+        [
+            ingredient_document(ingredient_id, row["name"])
+            for ingredient_id, row in zip(ingredient_ids, ingredient_rows)
+        ]
+    )
+    # Let running workers know the ingredient catalog changed
+    CacheVersionRepository().bump(IngredientRepository.CATALOG_VERSION)
+    db.session.commit()
+    # Core INSERTs skip the session hooks that invalidate cached responses
+    response_cache.invalidate("ingredients")
+
+    # Hashing is deliberately slow, so every user shares one hash
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    per_user = max(liquors_per_user * batches_per_liquor * formulas_per_batch, 1)
+    for user_numbers in _chunks(users, max(SEED_CHUNK_FORMULAS // per_user, 1)):
+        user_ids = _insert_returning_ids(
+            User,
+            [
+                {
+                    "username": f"{prefix}_{n}",
+                    "email": f"{prefix}_{n}@example.com",
+                    "password_hash": password_hash,
+                }
+                for n in user_numbers
+            ],
+        )
+        liquor_rows: List[_LiquorRow] = [
+            {
+                "user_id": user_id,
+                "name": f"{rng.choice(_LIQUORS)} {n}",
+                "description": f"Generated liquor {n} of {prefix}_{user_number}",
+            }
+            for user_id, user_number in zip(user_ids, user_numbers)
+            for n in range(liquors_per_user)
+        ]
+        liquor_ids = _insert_returning_ids(Liquor, liquor_rows)
+
+        batch_rows: List[_BatchRow] = []
+        formula_rows: List[List[_FormulaRow]] = []
+        owners: List[int] = []
+        for liquor_id, liquor in zip(liquor_ids, liquor_rows):
+            for n in range(batches_per_liquor):
+                batch_rows.append(
+                    {
+                        "liquor_id": liquor_id,
+                        "description": f"Batch {n} of {liquor['name']}",
+                        "date": _FIRST_BATCH + timedelta(days=rng.randrange(2920)),
+                        "bottle_count": rng.randrange(0, 25),
+                        "bottle_volume": rng.choice((250.0, 500.0, 700.0)),
+                    }
+                )
+                formula_rows.append(
+                    [
+                        {
+                            "ingredient_id": ingredient_id,
+                            "quantity": round(rng.uniform(0.1, 2000.0), 1),
+                            "unit": rng.choice(_UNITS),
+                        }
+                        for ingredient_id in rng.sample(
+                            ingredient_ids, min(formulas_per_batch, len(ingredient_ids))
+                        )
+                    ]
+                )
+                owners.append(liquor["user_id"])
+        batch_ids = batch_repository.bulk_create_with_formulas(batch_rows, formula_rows)
+
+        search_repository.add_documents(
+            [
+                liquor_document(
+                    liquor_id, row["user_id"], row["name"], row["description"]
+                )
+                for liquor_id, row in zip(liquor_ids, liquor_rows)
+            ]
+            + [
+                batch_document(
+                    batch_id, user_id, row["liquor_id"], row["description"], row["date"]
+                )
+                for batch_id, user_id, row in zip(batch_ids, owners, batch_rows)
+            ]
+        )
+        db.session.commit()
+
+        created["users"] += len(user_ids)
+        created["liquors"] += len(liquor_ids)
+        created["batches"] += len(batch_ids)
+        created["formulas"] += sum(len(formulas) for formulas in formula_rows)
+
+    created["ingredients"] = len(ingredient_ids)
+    return created
@@ -1,22 +1,45 @@
 import secrets
 import string
-from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy.exc import IntegrityError
 
 from app import db
-from app.models import ApiKey, Batch, BatchFormula, Ingredient, Liquor
+from app.catalog import CatalogEntry, ingredient_catalog
+from app.identity import IdentityCache, identity_cache
+from app.models import ApiKey, Batch, BatchFormula, Ingredient, Liquor, User
 from app.repositories import (
     ApiKeyRepository,
     BatchFormulaRepository,
     BatchRepository,
+    CacheVersionRepository,
     IngredientRepository,
     LiquorRepository,
+    SearchRepository,
 )
+from app.response_cache import response_cache
+from app.search import search_index, search_terms
+from app.usage import api_key_usage
+from app.utils import parse_iso_datetime
 
 liquor_repository = LiquorRepository()
 batch_repository = BatchRepository()
 api_key_repository = ApiKeyRepository()
 ingredient_repository = IngredientRepository()
 batch_formula_repository = BatchFormulaRepository()
+search_repository = SearchRepository()
+cache_version_repository = CacheVersionRepository()
 
 
 def create_batch_with_ingredients(
@@ -88,11 +111,9 @@ def update_batch_bottles(
     Service to update the bottle information for a batch.
     Returns (batch_object, None) on success or (None, error_message) on failure.
     """
-    batch = batch_repository.get(batch_id)
+    batch = batch_repository.get_for_user(batch_id, user_id)
     if not batch:
         return None, "Batch not found."
-    if batch.liquor.user_id != user_id:
-        return None, "You do not have permission to edit this batch."
 
     try:
         # Validate bottle count
@@ -161,10 +182,18 @@ def get_api_keys_for_user(user_id: int) -> List[ApiKey]:
 
 
 def get_paginated_api_keys_for_user(
-    user_id: int, page: int = 1, per_page: int = 10
-) -> Tuple[List[ApiKey], int]:
+    user_id: int,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> Tuple[List[ApiKey], Optional[int], Optional[str]]:
     """Service to get paginated API keys for a user"""
-    return api_key_repository.get_paginated_for_user(user_id, page, per_page)
+    # Write pending usage first so last_used and request_count are current
+    api_key_usage.flush()
+    return api_key_repository.get_paginated_for_user(
+        user_id, page, per_page, cursor, count
+    )
 
 
 def get_api_key_by_id_and_user(api_key_id: int, user_id: int) -> Optional[ApiKey]:
@@ -172,6 +201,14 @@ def get_api_key_by_id_and_user(api_key_id: int, user_id: int) -> Optional[ApiKey
     return api_key_repository.get_by_id_and_user(api_key_id, user_id)
 
 
+def revoke_cached_identities() -> None:
+    """
+    Make every worker drop its cached identities once the caller's transaction
+    commits, so a revoked key or changed user is not served from another cache.
+    """
+    cache_version_repository.bump(IdentityCache.VERSION)
+
+
 def delete_api_key(api_key_id: int, user_id: int) -> Tuple[bool, Optional[str]]:
     """
     Service to delete an API key.
@@ -182,22 +219,71 @@ def delete_api_key(api_key_id: int, user_id: int) -> Tuple[bool, Optional[str]]:
         if not api_key:
             return False, "API key not found."
 
+        revoke_cached_identities()
         api_key_repository.delete(api_key)
+        identity_cache.invalidate_api_key(api_key_id)
         return True, None
     except Exception as e:
         return False, f"An unexpected error occurred: {str(e)}"
 
 
+def deactivate_api_key(
+    api_key_id: int, user_id: int
+) -> Tuple[Optional[ApiKey], Optional[str]]:
+    """
+    Service to deactivate an API key without deleting it.
+    Returns (api_key_object, None) on success or (None, error_message) on failure.
+    """
+    try:
+        api_key = api_key_repository.get_by_id_and_user(api_key_id, user_id)
+        if not api_key:
+            return None, "API key not found."
+
+        revoke_cached_identities()
+        api_key_repository.deactivate(api_key)
+        identity_cache.invalidate_api_key(api_key_id)
+        return api_key, None
+    except Exception as e:
+        api_key_repository.rollback()
+        return None, f"An unexpected error occurred: {str(e)}"
+
+
 def get_liquors_for_user(user_id: int) -> List[Liquor]:
     """Service to get all liquors for a user"""
     return liquor_repository.get_all_for_user(user_id)
 
 
+def get_liquors_with_stats_for_user(user_id: int) -> List[Liquor]:
+    """Service to get all liquors for a user with batch aggregates"""
+    return liquor_repository.get_all_with_stats_for_user(user_id)
+
+
 def get_paginated_liquors_for_user(
-    user_id: int, page: int = 1, per_page: int = 10
-) -> Tuple[List[Liquor], int]:
+    user_id: int,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    include_stats: bool = False,
+) -> Tuple[List[Liquor], Optional[int], Optional[str]]:
     """Service to get paginated liquors for a user"""
-    return liquor_repository.get_paginated_for_user(user_id, page, per_page)
+    return liquor_repository.get_paginated_for_user(
+        user_id, page, per_page, cursor, count, include_stats
+    )
+
+
+def get_liquors_validator(
+    user_id: int, include_stats: bool = False
+) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for the user's liquor list"""
+    return liquor_repository.get_validator_for_user(user_id, include_stats)
+
+
+def get_liquor_validator(
+    liquor_id: int, user_id: int, include_stats: bool = False
+) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for one of the user's liquors"""
+    return liquor_repository.get_validator_for_liquor(liquor_id, user_id, include_stats)
 
 
 def create_liquor(user_id: int, name: str, description: Optional[str] = None) -> Liquor:
@@ -218,9 +304,11 @@ def create_liquor(user_id: int, name: str, description: Optional[str] = None) ->
     )
 
 
-def get_liquor_by_id(liquor_id: int, user_id: int) -> Optional[Liquor]:
+def get_liquor_by_id(
+    liquor_id: int, user_id: int, include_stats: bool = False
+) -> Optional[Liquor]:
     """Service to get a liquor by ID for a specific user"""
-    return liquor_repository.get_by_id_and_user(liquor_id, user_id)
+    return liquor_repository.get_by_id_and_user(liquor_id, user_id, include_stats)
 
 
 def update_liquor(
@@ -269,6 +357,26 @@ def get_all_ingredients() -> List[Ingredient]:
     return ingredient_repository.get_all()
 
 
+def get_ingredient_catalog() -> List[CatalogEntry]:
+    """Service to get all ingredients from the process-local catalog"""
+    return ingredient_catalog.entries()
+
+
+def suggest_ingredients(query: str, limit: int = 10) -> List[CatalogEntry]:
+    """Service to autocomplete ingredient names from the process-local catalog"""
+    return ingredient_catalog.suggest(query, limit)
+
+
+def get_ingredient_catalog_validator() -> Tuple[int, Optional[datetime]]:
+    """Service to get the ingredient catalog validator without a query"""
+    return ingredient_catalog.validator()
+
+
+def get_ingredient_validator(ingredient_id: int) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for one ingredient"""
+    return ingredient_repository.get_validator_for_ingredient(ingredient_id)
+
+
 def create_ingredient(name: str, description: Optional[str] = None) -> Ingredient:
     """Service to create a new ingredient"""
     # Validate name
@@ -280,7 +388,16 @@ def create_ingredient(name: str, description: Optional[str] = None) -> Ingredien
     if existing_ingredient:
         raise ValueError("Ingredient with this name already exists")
 
-    return ingredient_repository.create(name=name.strip(), description=description)
+    try:
+        ingredient = ingredient_repository.create(
+            name=name.strip(), description=description
+        )
+    except IntegrityError:
+        # A concurrent request created the same name after our probe
+        ingredient_repository.rollback()
+        raise ValueError("Ingredient with this name already exists")
+    ingredient_catalog.invalidate()
+    return ingredient
 
 
 def get_ingredient_by_id(ingredient_id: int) -> Optional[Ingredient]:
@@ -305,7 +422,12 @@ def update_ingredient(ingredient_id: int, data: Dict[str, Any]) -> Optional[Ingr
         if existing_ingredient and existing_ingredient.id != ingredient_id:
             raise ValueError("Ingredient with this name already exists")
 
-    ingredient_repository.update(ingredient, data)
+    try:
+        ingredient_repository.update(ingredient, data)
+    except IntegrityError:
+        ingredient_repository.rollback()
+        raise ValueError("Ingredient with this name already exists")
+    ingredient_catalog.invalidate()
     return ingredient
 
 
@@ -316,6 +438,7 @@ def delete_ingredient(ingredient_id: int) -> bool:
         return False
 
     ingredient_repository.delete(ingredient)
+    ingredient_catalog.invalidate()
     return True
 
 
@@ -325,10 +448,26 @@ def get_batches_for_liquor(liquor_id: int) -> List[Batch]:
 
 
 def get_paginated_batches_for_liquor(
-    liquor_id: int, page: int = 1, per_page: int = 10
-) -> Tuple[List[Batch], int]:
+    liquor_id: int,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> Tuple[List[Batch], Optional[int], Optional[str]]:
     """Service to get paginated batches for a liquor"""
-    return batch_repository.get_paginated_for_liquor(liquor_id, page, per_page)
+    return batch_repository.get_paginated_for_liquor(
+        liquor_id, page, per_page, cursor, count
+    )
+
+
+def get_batches_validator(liquor_id: int) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for a liquor's batch list"""
+    return batch_repository.get_validator_for_liquor(liquor_id)
+
+
+def get_batch_validator(batch_id: int, user_id: int) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for one of the user's batches"""
+    return batch_repository.get_validator_with_formulas(batch_id, user_id)
 
 
 def create_batch(batch_data: dict) -> Tuple[Optional[Batch], Optional[str]]:
@@ -357,17 +496,225 @@ def create_batch(batch_data: dict) -> Tuple[Optional[Batch], Optional[str]]:
     return batch_repository.create(batch_data)
 
 
+BULK_IMPORT_MODES = ("all_or_nothing", "best_effort")
+
+
+def _validate_bulk_batch(
+    item: Any, owned_liquor_ids: Set[int], ingredient_ids: FrozenSet[int]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[str]]:
+    """Turn one bulk import item into (batch row, formula rows, errors)"""
+    if not isinstance(item, dict):
+        return {}, [], ["Batch must be an object"]
+
+    errors: List[str] = []
+    liquor_id = item.get("liquor_id")
+    if not isinstance(liquor_id, int) or liquor_id not in owned_liquor_ids:
+        errors.append("Liquor not found")
+
+    description = item.get("description")
+    if not isinstance(description, str) or not description.strip():
+        errors.append("description is required")
+
+    batch_date = datetime.now(timezone.utc)
+    if item.get("date") is not None:
+        try:
+            batch_date = parse_iso_datetime(str(item["date"]))
+        except ValueError:
+            errors.append("Invalid date format")
+
+    bottle_count: Any = item.get("bottle_count") or 0
+    try:
+        bottle_count = int(bottle_count)
+        if bottle_count < 0:
+            errors.append("Bottle count must be non-negative")
+    except (ValueError, TypeError):
+        errors.append("Bottle count must be a valid integer")
+
+    bottle_volume: Any = item.get("bottle_volume") or 0.0
+    try:
+        bottle_volume = float(bottle_volume)
+        if bottle_volume < 0:
+            errors.append("Bottle volume must be non-negative")
+    except (ValueError, TypeError):
+        errors.append("Bottle volume must be a valid number")
+
+    bottle_volume_unit = item.get("bottle_volume_unit")
+    if bottle_volume_unit is None:
+        bottle_volume_unit = "ml"
+    elif (
+        not isinstance(bottle_volume_unit, str)
+        or not bottle_volume_unit
+        or len(bottle_volume_unit) > 10
+    ):
+        errors.append("bottle_volume_unit is invalid")
+
+    formulas: List[Dict[str, Any]] = []
+    formulas_data = item.get("formulas") or []
+    if not isinstance(formulas_data, list):
+        errors.append("formulas must be a list")
+        formulas_data = []
+    for position, formula in enumerate(formulas_data):
+        if not isinstance(formula, dict):
+            errors.append(f"formulas[{position}]: must be an object")
+            continue
+        ingredient_id = formula.get("ingredient_id")
+        if not isinstance(ingredient_id, int) or ingredient_id not in ingredient_ids:
+            errors.append(f"formulas[{position}]: Ingredient not found")
+        raw_quantity = formula.get("quantity")
+        try:
+            if raw_quantity is None:
+                raise TypeError("quantity is required")
+            quantity = float(raw_quantity)
+            if quantity <= 0:
+                errors.append(f"formulas[{position}]: Quantity must be positive")
+        except (ValueError, TypeError):
+            errors.append(f"formulas[{position}]: Quantity must be a valid number")
+            continue
+        unit = formula.get("unit")
+        if not isinstance(unit, str) or not unit or len(unit) > 20:
+            errors.append(f"formulas[{position}]: unit is required")
+            continue
+        formulas.append(
+            {
+                "ingredient_id": ingredient_id,
+                "quantity": quantity,
+                "unit": unit,
+            }
+        )
+
+    batch = {
+        "liquor_id": liquor_id,
+        "date": batch_date,
+        "description": description,
+        "bottle_count": bottle_count,
+        "bottle_volume": bottle_volume,
+        "bottle_volume_unit": bottle_volume_unit,
+    }
+    return batch, formulas, errors
+
+
+def import_batches(
+    user_id: int, items: List[Any], mode: str = "all_or_nothing"
+) -> List[Dict[str, Any]]:
+    """
+    Service to validate and create many batches with their formulas at once.
+    Every item is validated before anything is written. In all_or_nothing
+    mode one invalid item skips the whole import; in best_effort mode the
+    valid items are still created. Returns one result per item, in order.
+    """
+    if mode not in BULK_IMPORT_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(BULK_IMPORT_MODES)}")
+
+    owned_liquor_ids = liquor_repository.get_owned_ids(
+        (
+            item["liquor_id"]
+            for item in items
+            if isinstance(item, dict) and isinstance(item.get("liquor_id"), int)
+        ),
+        user_id,
+    )
+    ingredient_ids = ingredient_catalog.ids()
+
+    results: List[Dict[str, Any]] = []
+    valid: List[Tuple[int, Dict[str, Any], List[Dict[str, Any]]]] = []
+    for index, item in enumerate(items):
+        batch, formulas, errors = _validate_bulk_batch(
+            item, owned_liquor_ids, ingredient_ids
+        )
+        if errors:
+            results.append({"index": index, "status": "error", "errors": errors})
+        else:
+            results.append({"index": index, "status": "skipped"})
+            valid.append((index, batch, formulas))
+
+    if mode == "all_or_nothing" and len(valid) < len(items):
+        return results
+
+    try:
+        batch_ids = batch_repository.bulk_create_with_formulas(
+            [batch for _, batch, _ in valid], [formulas for _, _, formulas in valid]
+        )
+        # Core inserts skip the ORM flush that keeps the search index in sync
+        search_index.index_batches(batch_ids)
+        batch_repository.commit()
+    except Exception:
+        batch_repository.rollback()
+        raise
+    # Likewise for the response cache, which otherwise learns of writes on flush
+    response_cache.invalidate(f"user:{user_id}:batches")
+
+    for (index, _, _), batch_id in zip(valid, batch_ids):
+        results[index] = {"index": index, "status": "created", "id": batch_id}
+    return results
+
+
+def search_user_data(
+    user_id: int,
+    query: str,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """
+    Service to full-text search the user's liquors and batches and the shared
+    ingredients. Matching ignores case and Polish diacritics, and every word
+    of the query must match the start of a word.
+    Returns (rows, total, next_cursor).
+    """
+    terms = search_terms(query)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return search_repository.search(user_id, terms, page, per_page, cursor, count)
+
+
+EXPORT_FORMATS = ("ndjson",)
+
+
+def export_user_data(user_id: int) -> Iterator[Dict[str, Any]]:
+    """
+    Service to stream everything a user owns as records tagged with a "type":
+    the user, then liquors, batches and formulas. Rows are read in chunks,
+    so memory use stays flat however large the account is.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        return
+    yield {
+        "type": "user",
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "created_at": user.created_at,
+    }
+
+    for row in liquor_repository.stream_for_user(user_id):
+        yield {"type": "liquor", **row}
+    for row in batch_repository.stream_for_user(user_id):
+        yield {"type": "batch", **row}
+    for row in batch_formula_repository.stream_for_user(user_id):
+        yield {"type": "formula", **row}
+
+
 def get_batch_by_id(batch_id: int) -> Optional[Batch]:
     """Service to get a batch by ID"""
     return batch_repository.get(batch_id)
 
 
-def update_batch(batch_id: int, data: Dict[str, Any]) -> Optional[Batch]:
-    """Service to update a batch"""
-    batch = get_batch_by_id(batch_id)
-    if not batch:
-        return None
+def get_batch_for_user(
+    batch_id: int, user_id: int, with_formulas: bool = False
+) -> Optional[Batch]:
+    """Service to get a batch that belongs to one of the user's liquors"""
+    return batch_repository.get_for_user(batch_id, user_id, with_formulas)
+
 
+def batch_belongs_to_user(batch_id: int, user_id: int) -> bool:
+    """Service to check that a batch exists and belongs to the user"""
+    return batch_repository.exists_for_user(batch_id, user_id)
+
+
+def update_batch(batch: Batch, data: Dict[str, Any]) -> Batch:
+    """Service to update a batch"""
     # Validate numeric fields if provided
     if "bottle_count" in data:
         try:
@@ -389,14 +736,9 @@ def update_batch(batch_id: int, data: Dict[str, Any]) -> Optional[Batch]:
     return batch
 
 
-def delete_batch(batch_id: int) -> bool:
+def delete_batch(batch: Batch) -> None:
     """Service to delete a batch"""
-    batch = get_batch_by_id(batch_id)
-    if not batch:
-        return False
-
     batch_repository.delete(batch)
-    return True
 
 
 def get_formulas_for_batch(batch_id: int) -> List[BatchFormula]:
@@ -405,10 +747,21 @@ def get_formulas_for_batch(batch_id: int) -> List[BatchFormula]:
 
 
 def get_paginated_formulas_for_batch(
-    batch_id: int, page: int = 1, per_page: int = 10
-) -> Tuple[List[BatchFormula], int]:
+    batch_id: int,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+) -> Tuple[List[BatchFormula], Optional[int], Optional[str]]:
     """Service to get paginated formulas for a batch"""
-    return batch_formula_repository.get_paginated_for_batch(batch_id, page, per_page)
+    return batch_formula_repository.get_paginated_for_batch(
+        batch_id, page, per_page, cursor, count
+    )
+
+
+def get_formulas_validator(batch_id: int) -> Optional[Tuple[Any, ...]]:
+    """Service to get a cheap validator for a batch's formula list"""
+    return batch_formula_repository.get_validator_for_batch(batch_id)
 
 
 def create_batch_formula(
@@ -416,8 +769,7 @@ def create_batch_formula(
 ) -> Tuple[Optional[BatchFormula], Optional[str]]:
     """Service to create a new formula for a batch"""
     # First check if the batch exists
-    batch = get_batch_by_id(batch_id)
-    if not batch:
+    if not batch_repository.exists(batch_id):
         return None, "Batch not found."
 
     # Check if the ingredient exists
@@ -437,14 +789,15 @@ def get_batch_formula_by_id(formula_id: int) -> Optional[BatchFormula]:
     return batch_formula_repository.get(formula_id)
 
 
+def get_batch_formula_for_user(formula_id: int, user_id: int) -> Optional[BatchFormula]:
+    """Service to get a formula whose batch belongs to one of the user's liquors"""
+    return batch_formula_repository.get_for_user(formula_id, user_id)
+
+
 def update_batch_formula(
-    formula_id: int, data: Dict[str, Any]
+    formula: BatchFormula, data: Dict[str, Any]
 ) -> Tuple[Optional[BatchFormula], Optional[str]]:
     """Service to update a batch formula"""
-    formula = get_batch_formula_by_id(formula_id)
-    if not formula:
-        return None, "Formula not found."
-
     # Validate ingredient if provided
     if "ingredient_id" in data:
         ingredient = get_ingredient_by_id(data["ingredient_id"])
@@ -463,10 +816,6 @@ def update_batch_formula(
     return batch_formula_repository.update(formula, data)
 
 
-def delete_batch_formula(formula_id: int) -> bool:
+def delete_batch_formula(formula: BatchFormula) -> bool:
     """Service to delete a batch formula"""
-    formula = get_batch_formula_by_id(formula_id)
-    if not formula:
-        return False
-
     return batch_formula_repository.delete(formula)
@@ -0,0 +1,128 @@
+import atexit
+import datetime
+import os
+import threading
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, Optional, Tuple
+
+from flask import Flask, has_app_context
+
+
+class ApiKeyUsageTracker:
+    """
+    Write-behind accumulator for API key usage.
+
+    Authenticated requests only record the key id in memory. Pending
+    last_used timestamps and request counts are coalesced per key and written
+    in one bulk UPDATE every API_KEY_USAGE_FLUSH_INTERVAL seconds and when the
+    worker exits. An interval of 0 writes through on every request.
+    """
+
+    def __init__(self) -> None:
+        self.flush_interval: float = 0.0
+        self._app: Optional[Flask] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Tuple[datetime.datetime, int]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def init_app(self, app: Flask) -> None:
+        self._app = app
+        self.flush_interval = float(app.config.get("API_KEY_USAGE_FLUSH_INTERVAL", 0))
+        app.extensions["api_key_usage"] = self
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def record(
+        self, api_key_id: int, used_at: Optional[datetime.datetime] = None
+    ) -> None:
+        """Record one authenticated request made with an API key"""
+        used_at = used_at or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            last_used, count = self._pending.get(api_key_id, (used_at, 0))
+            self._pending[api_key_id] = (max(last_used, used_at), count + 1)
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self) -> Dict[int, Tuple[datetime.datetime, int]]:
+        """Return a snapshot of usage that has not been written yet"""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Write all pending usage in one transaction. Returns keys updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self._app is None:
+            return 0
+
+        from app.repositories import ApiKeyRepository
+
+        repository = ApiKeyRepository()
+        # Inside a request, reuse its session instead of opening a second one
+        context: ContextManager[Any] = (
+            nullcontext() if has_app_context() else self._app.app_context()
+        )
+        try:
+            with context:
+                try:
+                    repository.record_usage(
+                        [
+                            (api_key_id, last_used, count)
+                            for api_key_id, (last_used, count) in pending.items()
+                        ]
+                    )
+                except Exception:
+                    repository.rollback()
+                    raise
+        except Exception as e:
+            # Keep the usage for the next attempt instead of losing it
+            with self._lock:
+                for api_key_id, (last_used, count) in pending.items():
+                    current = self._pending.get(api_key_id, (last_used, 0))
+                    self._pending[api_key_id] = (
+                        max(current[0], last_used),
+                        current[1] + count,
+                    )
+            self._app.logger.warning(f"Failed to flush API key usage: {str(e)}")
+            return 0
+        return len(pending)
+
+    def shutdown(self) -> None:
+        """Stop the background flusher and write what is left"""
+        self._stop.set()
+        self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="api-key-usage-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _reset_after_fork(self) -> None:
+        # The parent's flusher thread does not survive fork, and its pending
+        # usage is flushed by the parent, not by every child.
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+
+api_key_usage = ApiKeyUsageTracker()
@@ -1,3 +1,12 @@
+import base64
+import json
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Dict, List, Sequence
+
+import sqlalchemy as sa
+
+
 class VolumeConverter:
     """Utility class for volume conversions"""
 
@@ -30,3 +39,76 @@ class VolumeConverter:
         elif target_unit == "tbsp":
             return value_ml / 14.7868
         return value_ml  # return ml if unknown
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for case-insensitive comparison and uniqueness"""
+    return name.strip().casefold()
+
+
+def parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO date ("2024-05-01") or datetime; raises ValueError"""
+    try:
+        return datetime.combine(date.fromisoformat(value), datetime.min.time())
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(record: Dict[str, Any]) -> str:
+    """Serialize one record as a newline-terminated JSON line"""
+    return json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+
+
+# Letters that carry no combining mark in Unicode and so survive NFKD
+_UNDECOMPOSABLE = str.maketrans({"ł": "l", "Ł": "L"})
+
+
+def fold_diacritics(text: str) -> str:
+    """Normalize a name for accent-insensitive matching ("Wiśnie" -> "wisnie")"""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_UNDECOMPOSABLE))
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+class KeysetCursor:
+    """Opaque cursor encoding for keyset (seek) pagination"""
+
+    @staticmethod
+    def encode(values: Sequence[Any]) -> str:
+        """Encode the sort key of the last row of a page into a cursor token"""
+        payload = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str, columns: Sequence[sa.ColumnElement]) -> List[Any]:
+        """Decode a cursor token back into values matching the sort columns"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except (ValueError, UnicodeError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("Invalid cursor")
+
+        values: List[Any] = []
+        for column, value in zip(columns, payload):
+            try:
+                if column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif column.type.python_type is int:
+                    value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+            values.append(value)
+        return values
@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _read_git_head(git_dir: str) -> Optional[str]:
+    head = _read(os.path.join(git_dir, "HEAD"))
+    if head is None or not head.startswith("ref: "):
+        # A detached HEAD holds the commit itself
+        return head
+    ref = head[len("ref: ") :]
+    commit = _read(os.path.join(git_dir, ref))
+    if commit:
+        return commit
+    # After "git gc" branches live in packed-refs as "<commit> <ref>" lines
+    for line in (_read(os.path.join(git_dir, "packed-refs")) or "").splitlines():
+        if line.endswith(f" {ref}"):
+            return line.split(" ", 1)[0]
+    return None
+
+
+def get_git_commit_hash(root: str = ROOT) -> Optional[str]:
+    """
+    Short hash of the deployed commit. Builds stamp it into a VERSION file
+    (git rev-parse --short HEAD > VERSION); checkouts without one read .git
+    directly, so booting a worker never runs git.
+    """
+    commit = _read(os.path.join(root, "VERSION")) or _read_git_head(
+        os.path.join(root, ".git")
+    )
+    return commit[:7] if commit else None
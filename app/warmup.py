@@ -0,0 +1,66 @@
+import logging
+from typing import Dict, List
+
+import sqlalchemy as sa
+from flask import Flask
+
+from app import db
+from app.catalog import ingredient_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def warm_caches(app: Flask) -> Dict[str, int]:
+    """
+    Fill process-wide caches before gunicorn forks its workers, so they
+    start with compiled templates and the ingredient catalog in memory
+    shared with the master. Connections opened on the way are closed again
+    so none crosses the fork. Returns what was loaded.
+    """
+    warmed = {"templates": 0, "ingredients": 0}
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+        warmed["templates"] += 1
+
+    with app.app_context():
+        try:
+            warmed["ingredients"] = len(ingredient_catalog.entries())
+        except sa.exc.SQLAlchemyError as e:
+            # A database that is not migrated yet must not stop the boot
+            logger.warning("Could not preload the ingredient catalog: %s", e)
+        finally:
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+    return warmed
+
+
+def reset_after_fork(app: Flask) -> None:
+    """
+    Drop pooled connections inherited from the master without closing them,
+    as the master's sockets must not be shared with a worker.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def warm_pool(app: Flask, connections: int) -> int:
+    """
+    Open up to ``connections`` database connections and return them to the
+    pool, so a new worker's first requests do not pay for connecting.
+    Returns how many were opened.
+    """
+    if connections <= 0:
+        return 0
+    opened: List[sa.engine.Connection] = []
+    with app.app_context():
+        try:
+            for _ in range(connections):
+                opened.append(db.engine.connect())
+        except sa.exc.SQLAlchemyError as e:
+            logger.warning("Could not open database connections: %s", e)
+        finally:
+            for connection in opened:
+                connection.close()
+    return len(opened)
@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for the repositories and the /api/v1 endpoints.
+
+    python -m benchmarks run --sizes small,medium -o benchmarks/results.json
+    python -m benchmarks compare benchmarks/baselines/sqlite.json \\
+        benchmarks/results.json
+    python -m benchmarks startup
+    python -m benchmarks memory --workers 4
+"""
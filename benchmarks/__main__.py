@@ -0,0 +1,278 @@
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TypedDict
+
+import click
+from sqlalchemy.engine import make_url
+
+from app import create_app, db
+from app.seeding import seed_scale
+from app.version import get_git_commit_hash
+from benchmarks.cases import endpoint_cases, load_sample, log_in, repository_cases
+from benchmarks.harness import compare, measure
+from benchmarks.memory import measure_gunicorn
+from benchmarks.startup import measure_startup
+from config import settings
+
+
+class DatasetSize(TypedDict):
+    """seed_scale arguments of one dataset shape"""
+
+    users: int
+    liquors_per_user: int
+    batches_per_liquor: int
+    formulas_per_batch: int
+    catalog_size: int
+
+
+# Dataset shapes, from a quick check to production-sized
+SIZES: Dict[str, DatasetSize] = {
+    "small": {
+        "users": 10,
+        "liquors_per_user": 5,
+        "batches_per_liquor": 10,
+        "formulas_per_batch": 5,
+        "catalog_size": 200,
+    },
+    "medium": {
+        "users": 100,
+        "liquors_per_user": 10,
+        "batches_per_liquor": 10,
+        "formulas_per_batch": 5,
+        "catalog_size": 1000,
+    },
+    "large": {
+        "users": 500,
+        "liquors_per_user": 10,
+        "batches_per_liquor": 20,
+        "formulas_per_batch": 5,
+        "catalog_size": 2000,
+    },
+}
+
+
+@click.group()
+def cli() -> None:
+    """Benchmark the repositories and the API against seeded datasets."""
+
+
+@cli.command()
+@click.option(
+    "--sizes",
+    default="small,medium",
+    show_default=True,
+    help=f"Comma-separated dataset sizes: {', '.join(SIZES)}.",
+)
+@click.option("--iterations", default=30, show_default=True, type=click.IntRange(1))
+@click.option("--warmup", default=3, show_default=True, type=click.IntRange(0))
+@click.option(
+    "--database-url",
+    default=None,
+    help="Database to benchmark; all its tables are dropped first. A "
+    "temporary SQLite file by default.",
+)
+@click.option(
+    "--yes-drop",
+    is_flag=True,
+    help="Allow dropping the tables of a --database-url that is not a "
+    "temporary SQLite database.",
+)
+@click.option("--filter", "name_filter", default="", help="Only cases containing this.")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write results as JSON here (default: stdout).",
+)
+def run(
+    sizes: str,
+    iterations: int,
+    warmup: int,
+    database_url: Optional[str],
+    yes_drop: bool,
+    name_filter: str,
+    output: Optional[str],
+) -> None:
+    """Seed each dataset size and time every case against it."""
+    names = [size.strip() for size in sizes.split(",") if size.strip()]
+    unknown = [size for size in names if size not in SIZES]
+    if unknown:
+        raise click.BadParameter(f"unknown sizes: {', '.join(unknown)}")
+    if database_url and not yes_drop and not _is_disposable(database_url):
+        raise click.UsageError(
+            f"{database_url} is not a temporary SQLite database and all its "
+            "tables would be dropped; pass --yes-drop to go ahead."
+        )
+
+    results: Dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": get_git_commit_hash(),
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in names:
+            url = database_url or f"sqlite:///{os.path.join(directory, size)}.db"
+            results["database"] = url.split(":", 1)[0]
+            results["sizes"][size] = _run_size(
+                size, url, iterations, warmup, name_filter
+            )
+
+    text = json.dumps(results, indent=2, sort_keys=True) + "\n"
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+        click.echo(f"Results written to {output}", err=True)
+    else:
+        click.echo(text, nl=False)
+
+
+def _is_disposable(url: str) -> bool:
+    """Whether ``url`` is an in-memory SQLite database or a file in the temp dir"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    if not parsed.database or parsed.database == ":memory:":
+        return True
+    temp_dir = os.path.realpath(tempfile.gettempdir())
+    return os.path.realpath(parsed.database).startswith(temp_dir + os.sep)
+
+
+def _run_size(
+    size: str, url: str, iterations: int, warmup: int, name_filter: str
+) -> Dict[str, Any]:
+    app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": url,
+            "TESTING": True,
+            # The test client sends no CSRF tokens
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        click.echo(f"[{size}] seeding {SIZES[size]}", err=True)
+        dataset = seed_scale(**SIZES[size], seed=1)
+        sample = load_sample("seed_0")
+
+    client = app.test_client()
+    cases = repository_cases(sample) + endpoint_cases(
+        client, sample, log_in(client, sample)
+    )
+    measured: Dict[str, Any] = {}
+    for case in cases:
+        if name_filter not in case.name:
+            continue
+        measured[case.name] = measure(app, case, iterations, warmup)
+        click.echo(
+            f"[{size}] {case.name}: p50 {measured[case.name]['p50_ms']:.2f} ms, "
+            f"{measured[case.name]['queries']:g} queries",
+            err=True,
+        )
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    return {"dataset": dataset, "results": measured}
+
+
+@cli.command("compare")
+@click.argument("baseline", type=click.File("r", encoding="utf-8"))
+@click.argument("current", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--metric",
+    type=click.Choice(["p50_ms", "p95_ms", "p99_ms", "mean_ms"]),
+    default="p50_ms",
+    show_default=True,
+)
+@click.option(
+    "--threshold",
+    default=0.25,
+    show_default=True,
+    help="Relative slowdown that counts as a regression (0.25 = 25%).",
+)
+@click.option(
+    "--min-delta-ms",
+    default=0.5,
+    show_default=True,
+    help="Ignore changes smaller than this many milliseconds.",
+)
+def compare_command(
+    baseline: Any, current: Any, metric: str, threshold: float, min_delta_ms: float
+) -> None:
+    """Compare two result files; exits with 1 when anything regressed."""
+    report = compare(
+        json.load(baseline), json.load(current), metric, threshold, min_delta_ms
+    )
+    for section in ("regressions", "improvements"):
+        changes = report[section]
+        click.echo(f"{section.capitalize()}: {len(changes)}")
+        for change in changes:
+            click.echo(
+                f"  [{change.size}] {change.name}: {change.baseline:.2f} -> "
+                f"{change.current:.2f} ms ({change.ratio:.2f}x), queries "
+                f"{change.queries_baseline:g} -> {change.queries_current:g}"
+            )
+    click.echo(f"Unchanged: {len(report['unchanged'])}")
+    for section in ("missing", "new"):
+        names: List[str] = [f"[{c.size}] {c.name}" for c in report[section]]
+        if names:
+            click.echo(f"{section.capitalize()}: {', '.join(names)}")
+    sys.exit(1 if report["regressions"] else 0)
+
+
+@cli.command()
+@click.option("--module", default="nalewka", show_default=True)
+@click.option("--runs", default=5, show_default=True, type=click.IntRange(1))
+def startup(module: str, runs: int) -> None:
+    """Time importing the app in fresh interpreters, like a worker boot."""
+    report = measure_startup(module, runs)
+    click.echo(
+        f"import {module}: median {report['median_ms']:.0f} ms, "
+        f"min {report['min_ms']:.0f} ms over {runs} runs"
+    )
+    click.echo("Slowest packages to import (last run):")
+    for entry in report["slowest_packages"]:
+        click.echo(f"  {entry['ms']:8.1f} ms  {entry['package']}")
+
+
+@cli.command()
+@click.option("--workers", default=4, show_default=True, type=click.IntRange(1))
+@click.option("--size", type=click.Choice(list(SIZES)), default="small")
+@click.option("--port", default=8765, show_default=True)
+def memory(workers: int, size: str, port: int) -> None:
+    """Memory per gunicorn worker with and without preloading (Linux)."""
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, size)}.db"
+        app = create_app({**settings.model_dump(), "SQLALCHEMY_DATABASE_URI": url})
+        with app.app_context():
+            db.create_all()
+            seed_scale(**SIZES[size], seed=1)
+            db.engine.dispose()
+
+        os.environ["DATABASE_URL"] = url
+        click.echo(
+            f"{'preload':<9}{'workers':>8}{'master PSS':>12}{'worker RSS':>12}"
+            f"{'worker PSS':>12}{'worker USS':>12}{'total PSS':>12}  (MiB)"
+        )
+        for preload in (False, True):
+            row = measure_gunicorn(workers, preload, port)
+            click.echo(
+                f"{str(preload).lower():<9}{row['workers']:>8}"
+                f"{row['master']['pss_kb'] / 1024:>12.1f}"
+                f"{row['worker_rss_kb'] / 1024:>12.1f}"
+                f"{row['worker_pss_kb'] / 1024:>12.1f}"
+                f"{row['worker_uss_kb'] / 1024:>12.1f}"
+                f"{row['total_pss_kb'] / 1024:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,548 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import sqlalchemy as sa
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app import db
+from app.models import ApiKey, Batch, BatchFormula, Ingredient, Liquor
+from app.repositories import (
+    ApiKeyRepository,
+    BatchFormulaRepository,
+    BatchRepository,
+    CacheVersionRepository,
+    IngredientRepository,
+    LiquorRepository,
+    PrimaryReadDeadlineRepository,
+    SearchRepository,
+    UserRepository,
+)
+from app.search import batch_document
+from app.seeding import SEED_PASSWORD
+from app.services import create_api_key
+from benchmarks.harness import Case
+
+# Marks rows created by write benchmarks, so teardown can remove them
+BENCH_NAME = "Benchmark"
+
+# Repository methods without a case of their own, and why
+NOT_BENCHMARKED = {
+    "BaseRepository.add": "session helper",
+    "BaseRepository.commit": "session helper",
+    "BaseRepository.rollback": "session helper",
+    "BaseRepository.flush": "session helper",
+    "LiquorRepository.with_stats": "query builder, timed through its callers",
+    "BatchRepository.with_ingredient_count": "query builder, timed through its callers",
+    # Methods that commit are timed through the endpoints that call them
+    "ApiKeyRepository.delete": "commits",
+    "ApiKeyRepository.deactivate": "commits",
+    "LiquorRepository.create": "commits",
+    "LiquorRepository.update": "commits",
+    "LiquorRepository.delete": "commits",
+    "BatchRepository.create_with_formulas": "commits",
+    "BatchRepository.create": "commits",
+    "BatchRepository.update": "commits",
+    "BatchRepository.delete": "commits",
+    "IngredientRepository.create": "commits",
+    "IngredientRepository.update": "commits",
+    "IngredientRepository.delete": "commits",
+    "BatchFormulaRepository.create": "commits",
+    "BatchFormulaRepository.update": "commits",
+    "BatchFormulaRepository.delete": "commits",
+}
+
+
+class Sample(NamedTuple):
+    """Ids of one seeded user's data, used as benchmark arguments"""
+
+    user_id: int
+    username: str
+    email: str
+    api_key_id: int
+    api_key: str
+    liquor_id: int
+    batch_id: int
+    formula_id: int
+    ingredient_id: int
+    ingredient_name: str
+    ingredient_ids: List[int]
+
+
+def load_sample(username: str) -> Sample:
+    """Pick the user's first liquor, batch and formula; needs an app context"""
+    user = UserRepository().get_by_username(username)
+    if user is None:
+        raise ValueError(f"User '{username}' not found; seed the database first")
+    api_key, error = create_api_key(user.id, f"{BENCH_NAME} sample key")
+    if api_key is None:
+        raise RuntimeError(error)
+    row = db.session.execute(
+        sa.select(Liquor.id, Batch.id, BatchFormula.id, BatchFormula.ingredient_id)
+        .join(Batch, Batch.liquor_id == Liquor.id)
+        .join(BatchFormula, BatchFormula.batch_id == Batch.id)
+        .where(Liquor.user_id == user.id)
+        .order_by(Liquor.id, Batch.id, BatchFormula.id)
+        .limit(1)
+    ).one()
+    ingredient = db.session.get(Ingredient, row[3])
+    if ingredient is None:
+        raise ValueError(f"Ingredient {row[3]} not found")
+    ingredient_ids = list(
+        db.session.scalars(sa.select(Ingredient.id).order_by(Ingredient.id).limit(10))
+    )
+    return Sample(
+        user.id,
+        user.username,
+        user.email,
+        api_key.id,
+        api_key.key,
+        row[0],
+        row[1],
+        row[2],
+        row[3],
+        ingredient.name,
+        ingredient_ids,
+    )
+
+
+def _rollback() -> None:
+    db.session.rollback()
+
+
+def _purge(model: Any, *conditions: Any) -> None:
+    # ORM deletes, so cascades and the search index stay consistent
+    for obj in db.session.scalars(sa.select(model).where(*conditions)).all():
+        if isinstance(obj, Ingredient):
+            IngredientRepository().delete(obj)
+        else:
+            db.session.delete(obj)
+    db.session.commit()
+
+
+def repository_cases(sample: Sample) -> List[Case]:
+    """One case per repository method, with the sample's ids as arguments"""
+    s = sample
+    api_keys = ApiKeyRepository()
+    liquors = LiquorRepository()
+    batches = BatchRepository()
+    users = UserRepository()
+    versions = CacheVersionRepository()
+    deadlines = PrimaryReadDeadlineRepository()
+    ingredients = IngredientRepository()
+    formulas = BatchFormulaRepository()
+    search = SearchRepository()
+    user_liquors = sa.select(Liquor).where(Liquor.user_id == s.user_id)
+    now = datetime.now(timezone.utc)
+
+    def bulk_create() -> None:
+        batches.bulk_create_with_formulas(
+            [{"liquor_id": s.liquor_id, "description": BENCH_NAME} for _ in range(10)],
+            [
+                [
+                    {"ingredient_id": ingredient_id, "quantity": 1.0, "unit": "g"}
+                    for ingredient_id in s.ingredient_ids[:3]
+                ]
+                for _ in range(10)
+            ],
+        )
+
+    document = batch_document(s.batch_id, s.user_id, s.liquor_id, BENCH_NAME, now)
+    reads = {
+        "BaseRepository.get": lambda: liquors.get(s.liquor_id),
+        "BaseRepository.count": lambda: liquors.count(user_liquors),
+        "BaseRepository.get_validator": lambda: liquors.get_validator(
+            sa.select(sa.func.count(Liquor.id)).where(Liquor.user_id == s.user_id)
+        ),
+        "BaseRepository.paginate": lambda: liquors.paginate(user_liquors, [Liquor.id]),
+        "ApiKeyRepository.get_by_key": lambda: api_keys.get_by_key(s.api_key),
+        "ApiKeyRepository.get_by_key_with_user": lambda: (
+            api_keys.get_by_key_with_user(s.api_key)
+        ),
+        "ApiKeyRepository.get_all_for_user": lambda: api_keys.get_all_for_user(
+            s.user_id
+        ),
+        "ApiKeyRepository.get_paginated_for_user": lambda: (
+            api_keys.get_paginated_for_user(s.user_id)
+        ),
+        "ApiKeyRepository.get_by_id_and_user": lambda: api_keys.get_by_id_and_user(
+            s.api_key_id, s.user_id
+        ),
+        "LiquorRepository.get_all_for_user": lambda: liquors.get_all_for_user(
+            s.user_id
+        ),
+        "LiquorRepository.get_all_with_stats_for_user": lambda: (
+            liquors.get_all_with_stats_for_user(s.user_id)
+        ),
+        "LiquorRepository.get_paginated_for_user": lambda: (
+            liquors.get_paginated_for_user(s.user_id, include_stats=True)
+        ),
+        "LiquorRepository.get_validator_for_user": lambda: (
+            liquors.get_validator_for_user(s.user_id, True)
+        ),
+        "LiquorRepository.get_validator_for_liquor": lambda: (
+            liquors.get_validator_for_liquor(s.liquor_id, s.user_id, True)
+        ),
+        "LiquorRepository.user_owns_liquor": lambda: liquors.user_owns_liquor(
+            s.liquor_id, s.user_id
+        ),
+        "LiquorRepository.stream_for_user": lambda: list(
+            liquors.stream_for_user(s.user_id)
+        ),
+        "LiquorRepository.get_owners": lambda: liquors.get_owners([s.liquor_id]),
+        "LiquorRepository.get_owned_ids": lambda: liquors.get_owned_ids(
+            [s.liquor_id], s.user_id
+        ),
+        "LiquorRepository.get_by_id_and_user": lambda: liquors.get_by_id_and_user(
+            s.liquor_id, s.user_id, include_stats=True
+        ),
+        "BatchRepository.get": lambda: batches.get(s.batch_id),
+        "BatchRepository.get_for_user": lambda: batches.get_for_user(
+            s.batch_id, s.user_id, with_formulas=True
+        ),
+        "BatchRepository.stream_for_user": lambda: list(
+            batches.stream_for_user(s.user_id)
+        ),
+        "BatchRepository.get_validator_for_liquor": lambda: (
+            batches.get_validator_for_liquor(s.liquor_id)
+        ),
+        "BatchRepository.get_validator_with_formulas": lambda: (
+            batches.get_validator_with_formulas(s.batch_id, s.user_id)
+        ),
+        "BatchRepository.get_owners": lambda: batches.get_owners([s.batch_id]),
+        "BatchRepository.exists": lambda: batches.exists(s.batch_id),
+        "BatchRepository.exists_for_user": lambda: batches.exists_for_user(
+            s.batch_id, s.user_id
+        ),
+        "BatchRepository.get_all_for_liquor": lambda: batches.get_all_for_liquor(
+            s.liquor_id
+        ),
+        "BatchRepository.get_all_with_formulas_for_liquor": lambda: (
+            batches.get_all_with_formulas_for_liquor(s.liquor_id)
+        ),
+        "BatchRepository.get_paginated_for_liquor": lambda: (
+            batches.get_paginated_for_liquor(s.liquor_id)
+        ),
+        "UserRepository.get_by_username": lambda: users.get_by_username(s.username),
+        "UserRepository.get_by_email": lambda: users.get_by_email(s.email),
+        "CacheVersionRepository.get_version": lambda: versions.get_version(
+            IngredientRepository.CATALOG_VERSION
+        ),
+        "PrimaryReadDeadlineRepository.get_until": lambda: deadlines.get_until(
+            s.user_id
+        ),
+        "IngredientRepository.get_all": ingredients.get_all,
+        "IngredientRepository.get_catalog_rows": ingredients.get_catalog_rows,
+        "IngredientRepository.get_catalog_version": ingredients.get_catalog_version,
+        "IngredientRepository.get_validator_for_ingredient": lambda: (
+            ingredients.get_validator_for_ingredient(s.ingredient_id)
+        ),
+        "IngredientRepository.get_choices": ingredients.get_choices,
+        "IngredientRepository.get_ids": ingredients.get_ids,
+        "IngredientRepository.get_by_name": lambda: ingredients.get_by_name(
+            s.ingredient_name
+        ),
+        "IngredientRepository.get": lambda: ingredients.get(s.ingredient_id),
+        "BatchFormulaRepository.get_all_for_batch": lambda: (
+            formulas.get_all_for_batch(s.batch_id)
+        ),
+        "BatchFormulaRepository.get_paginated_for_batch": lambda: (
+            formulas.get_paginated_for_batch(s.batch_id)
+        ),
+        "BatchFormulaRepository.get_validator_for_batch": lambda: (
+            formulas.get_validator_for_batch(s.batch_id)
+        ),
+        "BatchFormulaRepository.stream_for_user": lambda: list(
+            formulas.stream_for_user(s.user_id)
+        ),
+        "BatchFormulaRepository.get_for_user": lambda: formulas.get_for_user(
+            s.formula_id, s.user_id
+        ),
+        "BatchFormulaRepository.get": lambda: formulas.get(s.formula_id),
+        "SearchRepository.get_batch_rows": lambda: search.get_batch_rows([s.batch_id]),
+        "SearchRepository.search": lambda: search.search(s.user_id, ["wisniowka"]),
+    }
+    # Writes that leave committing to the caller are rolled back every time
+    writes = {
+        "ApiKeyRepository.record_usage": lambda: api_keys.record_usage(
+            [(s.api_key_id, now, 1)]
+        ),
+        "BatchRepository.bulk_create_with_formulas": bulk_create,
+        "CacheVersionRepository.bump": lambda: versions.bump(BENCH_NAME),
+        "PrimaryReadDeadlineRepository.set_until": lambda: deadlines.set_until(
+            s.user_id, now.timestamp()
+        ),
+        "SearchRepository.replace_documents": lambda: search.replace_documents(
+            [document]
+        ),
+        "SearchRepository.add_documents": lambda: search.add_documents(
+            [{**document, "object_id": 0}]
+        ),
+        "SearchRepository.delete_documents": lambda: search.delete_documents(
+            [("batch", s.batch_id)]
+        ),
+    }
+    return [Case(name, run) for name, run in reads.items()] + [
+        Case(name, run, teardown=_rollback) for name, run in writes.items()
+    ]
+
+
+def endpoint_cases(client: FlaskClient, sample: Sample, token: str) -> List[Case]:
+    """Cases named "<METHOD> <rule>" for every /api/v1 route"""
+    s = sample
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def call(method: str, path: str, payload: Optional[Any] = None) -> None:
+        response = client.open(
+            path,
+            method=method,
+            headers=headers,
+            data=json.dumps(payload) if payload is not None else None,
+            content_type="application/json",
+        )
+        response.get_data()  # Drain streamed responses such as the export
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"{method} {path} returned {response.status_code}: "
+                f"{response.get_data(as_text=True)[:200]}"
+            )
+
+    def get(path: str) -> Any:
+        return lambda: call("GET", path)
+
+    def new_api_key() -> Dict[str, Any]:
+        api_key, error = create_api_key(s.user_id, BENCH_NAME)
+        if api_key is None:
+            raise RuntimeError(error)
+        return {"api_key_id": api_key.id}
+
+    def new_liquor() -> Dict[str, Any]:
+        return {"liquor_id": LiquorRepository().create(BENCH_NAME, s.user_id).id}
+
+    def new_ingredient() -> Dict[str, Any]:
+        name = f"{BENCH_NAME} {datetime.now(timezone.utc).timestamp()}"
+        return {"ingredient_id": IngredientRepository().create(name).id}
+
+    def new_batch() -> Dict[str, Any]:
+        batch, error = BatchRepository().create(
+            {"liquor_id": s.liquor_id, "description": BENCH_NAME}
+        )
+        if batch is None:
+            raise RuntimeError(error)
+        return {"batch_id": batch.id}
+
+    def new_formula() -> Dict[str, Any]:
+        formula, error = BatchFormulaRepository().create(
+            s.batch_id, s.ingredient_id, 1.0, "g"
+        )
+        if formula is None:
+            raise RuntimeError(error)
+        return {"formula_id": formula.id}
+
+    bulk_payload = {
+        "batches": [
+            {
+                "liquor_id": s.liquor_id,
+                "description": BENCH_NAME,
+                "formulas": [
+                    {"ingredient_id": ingredient_id, "quantity": 1.0, "unit": "g"}
+                    for ingredient_id in s.ingredient_ids[:3]
+                ],
+            }
+            for _ in range(10)
+        ]
+    }
+    purge_keys = lambda: _purge(ApiKey, ApiKey.name == BENCH_NAME)  # noqa: E731
+    purge_liquors = lambda: _purge(Liquor, Liquor.name == BENCH_NAME)  # noqa: E731
+    purge_batches = lambda: _purge(Batch, Batch.description == BENCH_NAME)  # noqa: E731
+    purge_ingredients = lambda: _purge(  # noqa: E731
+        Ingredient, Ingredient.name == BENCH_NAME
+    )
+    v1 = "/api/v1"
+    cases = [
+        Case("GET /api/v1/", get(f"{v1}/")),
+        Case("GET /api/v1/docs", get(f"{v1}/docs")),
+        Case(
+            "GET /api/v1/docs/api_documentation.yaml",
+            get(f"{v1}/docs/api_documentation.yaml"),
+        ),
+        Case(
+            "POST /api/v1/auth/login",
+            lambda: call(
+                "POST",
+                f"{v1}/auth/login",
+                {"username": s.username, "password": SEED_PASSWORD},
+            ),
+        ),
+        Case(
+            "POST /api/v1/auth/api-keys",
+            lambda: call("POST", f"{v1}/auth/api-keys", {"name": BENCH_NAME}),
+            teardown=purge_keys,
+        ),
+        Case("GET /api/v1/auth/api-keys", get(f"{v1}/auth/api-keys")),
+        Case(
+            "DELETE /api/v1/auth/api-keys/<int:api_key_id>",
+            lambda api_key_id: call("DELETE", f"{v1}/auth/api-keys/{api_key_id}"),
+            setup=new_api_key,
+        ),
+        Case(
+            "POST /api/v1/auth/api-keys/<int:api_key_id>/deactivate",
+            lambda api_key_id: call(
+                "POST", f"{v1}/auth/api-keys/{api_key_id}/deactivate"
+            ),
+            setup=new_api_key,
+            teardown=purge_keys,
+        ),
+        Case("GET /api/v1/users/me", get(f"{v1}/users/me")),
+        Case(
+            "PUT /api/v1/users/me",
+            lambda: call("PUT", f"{v1}/users/me", {"username": s.username}),
+        ),
+        Case("GET /api/v1/liquors", get(f"{v1}/liquors")),
+        Case("GET /api/v1/liquors?include=stats", get(f"{v1}/liquors?include=stats")),
+        Case(
+            "POST /api/v1/liquors",
+            lambda: call("POST", f"{v1}/liquors", {"name": BENCH_NAME}),
+            teardown=purge_liquors,
+        ),
+        Case(
+            "GET /api/v1/liquors/<int:liquor_id>",
+            get(f"{v1}/liquors/{s.liquor_id}?include=stats"),
+        ),
+        Case(
+            "PUT /api/v1/liquors/<int:liquor_id>",
+            lambda: call(
+                "PUT", f"{v1}/liquors/{s.liquor_id}", {"description": BENCH_NAME}
+            ),
+        ),
+        Case(
+            "DELETE /api/v1/liquors/<int:liquor_id>",
+            lambda liquor_id: call("DELETE", f"{v1}/liquors/{liquor_id}"),
+            setup=new_liquor,
+        ),
+        Case("GET /api/v1/ingredients", get(f"{v1}/ingredients")),
+        Case("GET /api/v1/ingredients/suggest", get(f"{v1}/ingredients/suggest?q=wi")),
+        Case(
+            "POST /api/v1/ingredients",
+            lambda: call("POST", f"{v1}/ingredients", {"name": BENCH_NAME}),
+            teardown=purge_ingredients,
+        ),
+        Case(
+            "GET /api/v1/ingredients/<int:ingredient_id>",
+            get(f"{v1}/ingredients/{s.ingredient_id}"),
+        ),
+        Case(
+            "PUT /api/v1/ingredients/<int:ingredient_id>",
+            lambda: call(
+                "PUT",
+                f"{v1}/ingredients/{s.ingredient_id}",
+                {"description": BENCH_NAME},
+            ),
+        ),
+        Case(
+            "DELETE /api/v1/ingredients/<int:ingredient_id>",
+            lambda ingredient_id: call("DELETE", f"{v1}/ingredients/{ingredient_id}"),
+            setup=new_ingredient,
+        ),
+        Case(
+            "GET /api/v1/liquors/<int:liquor_id>/batches",
+            get(f"{v1}/liquors/{s.liquor_id}/batches"),
+        ),
+        Case(
+            "POST /api/v1/liquors/<int:liquor_id>/batches",
+            lambda: call(
+                "POST",
+                f"{v1}/liquors/{s.liquor_id}/batches",
+                {"description": BENCH_NAME, "bottle_count": 0, "bottle_volume": 0},
+            ),
+            teardown=purge_batches,
+        ),
+        Case(
+            "POST /api/v1/batches/bulk",
+            lambda: call("POST", f"{v1}/batches/bulk", bulk_payload),
+            teardown=purge_batches,
+        ),
+        Case("GET /api/v1/batches/<int:batch_id>", get(f"{v1}/batches/{s.batch_id}")),
+        Case(
+            "PUT /api/v1/batches/<int:batch_id>",
+            lambda: call("PUT", f"{v1}/batches/{s.batch_id}", {"bottle_count": 12}),
+        ),
+        Case(
+            "DELETE /api/v1/batches/<int:batch_id>",
+            lambda batch_id: call("DELETE", f"{v1}/batches/{batch_id}"),
+            setup=new_batch,
+        ),
+        Case(
+            "PUT /api/v1/batches/<int:batch_id>/bottles",
+            lambda: call(
+                "PUT",
+                f"{v1}/batches/{s.batch_id}/bottles",
+                {"bottle_count": 12, "bottle_volume": 500},
+            ),
+        ),
+        Case(
+            "GET /api/v1/batches/<int:batch_id>/formulas",
+            get(f"{v1}/batches/{s.batch_id}/formulas"),
+        ),
+        Case(
+            "POST /api/v1/batches/<int:batch_id>/formulas",
+            lambda batch_id: call(
+                "POST",
+                f"{v1}/batches/{batch_id}/formulas",
+                {"ingredient_id": s.ingredient_id, "quantity": 1.0, "unit": "g"},
+            ),
+            setup=new_batch,
+            teardown=purge_batches,
+        ),
+        Case(
+            "PUT /api/v1/formulas/<int:formula_id>",
+            lambda: call("PUT", f"{v1}/formulas/{s.formula_id}", {"quantity": 2.0}),
+        ),
+        Case(
+            "DELETE /api/v1/formulas/<int:formula_id>",
+            lambda formula_id: call("DELETE", f"{v1}/formulas/{formula_id}"),
+            setup=new_formula,
+        ),
+        Case("GET /api/v1/export", get(f"{v1}/export")),
+        Case("GET /api/v1/search", get(f"{v1}/search?q=wisniowka")),
+    ]
+    return [case._replace(in_app_context=False) for case in cases]
+
+
+def log_in(client: FlaskClient, sample: Sample) -> str:
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": sample.username, "password": SEED_PASSWORD}),
+        content_type="application/json",
+    )
+    token: str = json.loads(response.data)["auth_token"]
+    return token
+
+
+def api_rules(app: Flask) -> List[str]:
+    """ "<METHOD> <rule>" for every /api/v1 route, as endpoint cases name them"""
+    return sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules()
+        if rule.rule.startswith("/api/v1/")
+        for method in rule.methods or ()
+        if method not in ("HEAD", "OPTIONS")
+    )
+
+
+def repository_methods() -> List[str]:
+    """ "<Class>.<method>" for every public method of every repository"""
+    from app import repositories
+
+    names: List[str] = []
+    for cls in vars(repositories).values():
+        if isinstance(cls, type) and issubclass(cls, repositories.BaseRepository):
+            names.extend(
+                f"{cls.__name__}.{name}"
+                for name, value in vars(cls).items()
+                if not name.startswith("_")
+                and callable(getattr(cls, name))
+                and not isinstance(value, (str, int))
+            )
+    return sorted(names)
@@ -0,0 +1,161 @@
+import math
+import statistics
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import sqlalchemy as sa
+from flask import Flask
+
+
+class Case(NamedTuple):
+    """
+    One benchmarked operation. ``setup`` runs before every iteration,
+    untimed, and returns the keyword arguments of ``run``; ``teardown``
+    undoes what ``run`` wrote. Repository cases run inside a fresh app
+    context per iteration, like a request; endpoint cases go through the
+    test client, which pushes its own.
+    """
+
+    name: str
+    run: Callable[..., Any]
+    setup: Optional[Callable[[], Dict[str, Any]]] = None
+    teardown: Optional[Callable[[], None]] = None
+    in_app_context: bool = True
+
+
+def percentile(values: List[float], q: float) -> float:
+    """The q-th percentile (0-100) of values, interpolating between ranks"""
+    if not values:
+        raise ValueError("percentile of an empty list")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class _StatementCounter:
+    def __init__(self) -> None:
+        self.active = False
+        self.count = 0
+
+    def __call__(self, *args: Any) -> None:
+        if self.active:
+            self.count += 1
+
+
+def measure(
+    app: Flask, case: Case, iterations: int = 30, warmup: int = 3
+) -> Dict[str, float]:
+    """Time ``iterations`` runs of a case; warmup runs are not recorded"""
+    counter = _StatementCounter()
+    sa.event.listen(sa.engine.Engine, "before_cursor_execute", counter)
+    timings: List[float] = []
+    statements: List[int] = []
+    try:
+        for iteration in range(warmup + iterations):
+            with app.app_context():
+                kwargs = case.setup() if case.setup else {}
+            counter.count = 0
+            if case.in_app_context:
+                with app.app_context():
+                    counter.active = True
+                    started = time.perf_counter()
+                    case.run(**kwargs)
+                    elapsed = time.perf_counter() - started
+                    counter.active = False
+                    if case.teardown:
+                        case.teardown()
+            else:
+                counter.active = True
+                started = time.perf_counter()
+                case.run(**kwargs)
+                elapsed = time.perf_counter() - started
+                counter.active = False
+                if case.teardown:
+                    with app.app_context():
+                        case.teardown()
+            if iteration >= warmup:
+                timings.append(elapsed * 1000)
+                statements.append(counter.count)
+    finally:
+        counter.active = False
+        sa.event.remove(sa.engine.Engine, "before_cursor_execute", counter)
+
+    return {
+        "p50_ms": round(percentile(timings, 50), 4),
+        "p95_ms": round(percentile(timings, 95), 4),
+        "p99_ms": round(percentile(timings, 99), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "queries": round(statistics.fmean(statements), 2),
+    }
+
+
+class Change(NamedTuple):
+    size: str
+    name: str
+    baseline: float
+    current: float
+    queries_baseline: float
+    queries_current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else math.inf
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    metric: str = "p50_ms",
+    threshold: float = 0.25,
+    min_delta_ms: float = 0.5,
+) -> Dict[str, List[Change]]:
+    """
+    Compare two result files. A case regresses when ``metric`` grew by more
+    than ``threshold`` (0.25 = 25%) and by at least ``min_delta_ms``, which
+    keeps sub-millisecond noise out, or when it runs more SQL statements.
+    Improvements are the mirror image. Only sizes present in both files are
+    compared; cases in only one of them are listed under "missing" and "new".
+    """
+    report: Dict[str, List[Change]] = {
+        "regressions": [],
+        "improvements": [],
+        "unchanged": [],
+        "missing": [],
+        "new": [],
+    }
+    sizes = set(baseline.get("sizes", {})) & set(current.get("sizes", {}))
+    for size in sorted(sizes):
+        before = baseline.get("sizes", {}).get(size, {}).get("results", {})
+        after = current.get("sizes", {}).get(size, {}).get("results", {})
+        for name in sorted(set(before) | set(after)):
+            if name not in after:
+                report["missing"].append(
+                    Change(size, name, before[name][metric], 0.0, 0.0, 0.0)
+                )
+                continue
+            if name not in before:
+                report["new"].append(
+                    Change(size, name, 0.0, after[name][metric], 0.0, 0.0)
+                )
+                continue
+            change = Change(
+                size,
+                name,
+                before[name][metric],
+                after[name][metric],
+                before[name]["queries"],
+                after[name]["queries"],
+            )
+            delta = change.current - change.baseline
+            if change.queries_current > change.queries_baseline or (
+                change.ratio > 1 + threshold and delta >= min_delta_ms
+            ):
+                report["regressions"].append(change)
+            elif change.queries_current < change.queries_baseline or (
+                change.ratio < 1 - threshold and -delta >= min_delta_ms
+            ):
+                report["improvements"].append(change)
+            else:
+                report["unchanged"].append(change)
+    return report
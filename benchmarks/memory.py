@@ -0,0 +1,122 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List
+
+# Pages every worker should have served before it is measured
+PATHS = ("/login", "/register", "/api/v1/", "/healthz/db")
+
+
+def parse_smaps_rollup(text: str) -> Dict[str, int]:
+    """
+    RSS, PSS and USS in kB from /proc/<pid>/smaps_rollup. USS, the private
+    pages, is what stopping the process would free; PSS also charges it its
+    share of the pages it shares with other processes.
+    """
+    fields: Dict[str, int] = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(":")
+        if value.strip().endswith("kB"):
+            fields[name] = int(value.split()[0])
+    return {
+        "rss_kb": fields["Rss"],
+        "pss_kb": fields["Pss"],
+        "uss_kb": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def read_memory(pid: int) -> Dict[str, int]:
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        return parse_smaps_rollup(f.read())
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii") as f:
+                # The command name may contain spaces; fields resume after ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            status: int = response.status
+            return status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def measure_gunicorn(
+    workers: int,
+    preload: bool,
+    port: int,
+    requests: int = 200,
+    settle: float = 3.0,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    """
+    Start gunicorn with gunicorn.conf.py, let every worker serve some
+    requests and report the memory of the master and of each worker.
+    The database is whatever DATABASE_URL points at.
+    """
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_PRELOAD": str(preload).lower(),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "nalewka:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("gunicorn exited; run it by hand to see why")
+            try:
+                if _get(base_url + "/api/v1/") == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("gunicorn did not start in time")
+            time.sleep(0.2)
+        # Workers without preload load the app after they are forked
+        time.sleep(settle)
+        for n in range(requests):
+            _get(base_url + PATHS[n % len(PATHS)])
+        time.sleep(0.5)
+
+        master = read_memory(server.pid)
+        pids = child_pids(server.pid)
+        per_worker = [read_memory(pid) for pid in pids]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "workers": len(pids),
+        "preload": preload,
+        "master": master,
+        "worker_rss_kb": statistics.mean(m["rss_kb"] for m in per_worker),
+        "worker_pss_kb": statistics.mean(m["pss_kb"] for m in per_worker),
+        "worker_uss_kb": statistics.mean(m["uss_kb"] for m in per_worker),
+        "total_pss_kb": master["pss_kb"] + sum(m["pss_kb"] for m in per_worker),
+    }
@@ -0,0 +1,74 @@
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, NamedTuple
+
+# Runs in a fresh interpreter: the wall time of importing the module that
+# builds the app, which is what a worker pays before serving its first request
+_SNIPPET = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+class ImportTime(NamedTuple):
+    """One line of ``python -X importtime``, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    """Parse the ``-X importtime`` report written to stderr"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        stripped = name.lstrip(" ")
+        entries.append(
+            ImportTime(
+                stripped.strip(),
+                int(self_us),
+                int(cumulative_us),
+                (len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return entries
+
+
+def measure_startup(module: str = "nalewka", runs: int = 5) -> Dict[str, Any]:
+    """
+    Import ``module`` in ``runs`` fresh interpreters and report the median
+    wall time plus the packages that took longest to import in the last run.
+    """
+    timings: List[float] = []
+    entries: List[ImportTime] = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _SNIPPET.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+        entries = parse_importtime(completed.stderr)
+    # Self times add up, so summing them per top-level package attributes
+    # the whole import cost
+    packages: Dict[str, int] = {}
+    for entry in entries:
+        package = entry.module.split(".")[0]
+        packages[package] = packages.get(package, 0) + entry.self_us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "slowest_packages": [
+            {"package": package, "ms": self_us / 1000}
+            for package, self_us in slowest[:15]
+        ],
+    }
@@ -1,4 +1,5 @@
 import os
+from typing import Literal, Optional
 
 from pydantic import EmailStr, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,12 +19,124 @@ class Settings(BaseSettings):
         description="Secret key for session management and security.",
     )
 
+    # Version shown in the page footer (see app/version.py)
+    GIT_COMMIT_HASH: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("RENDER_GIT_COMMIT", "")[:7] or None,
+        description=(
+            "Commit the deployment was built from; defaults to Render's "
+            "RENDER_GIT_COMMIT, then the VERSION file or the .git directory."
+        ),
+    )
+
     # Database configuration - use environment-specific defaults
     SQLALCHEMY_DATABASE_URI: str = Field(
         default_factory=lambda: _get_database_uri(),
         description="Database connection URI. Supports SQLite and PostgreSQL.",
     )
 
+    # Read replica (see app/replica.py)
+    SQLALCHEMY_REPLICA_URI: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("DATABASE_REPLICA_URL") or None,
+        description=(
+            "Read-only replica URI. GET requests read from it through "
+            "repository read methods; unset to read from the primary."
+        ),
+    )
+    REPLICA_STICKY_SECONDS: float = Field(
+        5.0,
+        ge=0,
+        description=(
+            "Seconds a client keeps reading from the primary after it writes, "
+            "so it sees its own changes despite replication lag."
+        ),
+    )
+
+    # Connection pool (see app/pool.py)
+    DB_POOL_SIZE: int = Field(
+        5, ge=1, description="Connections kept open per worker process."
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        10,
+        ge=0,
+        description="Extra connections a worker may open above DB_POOL_SIZE.",
+    )
+    DB_POOL_TIMEOUT: float = Field(
+        30.0, gt=0, description="Seconds to wait for a free connection."
+    )
+    DB_POOL_RECYCLE: int = Field(
+        1800,
+        ge=-1,
+        description=(
+            "Seconds after which a connection is replaced; -1 never recycles."
+        ),
+    )
+    DB_POOL_PRE_PING: bool = Field(
+        True, description="Test connections for liveness on checkout."
+    )
+    DB_POOL_DISABLED: bool = Field(
+        False,
+        description=(
+            "Open a new connection per checkout (NullPool), for PgBouncer in "
+            "transaction pooling mode."
+        ),
+    )
+
+    # Gunicorn (see gunicorn.conf.py)
+    GUNICORN_WORKERS: int = Field(
+        default_factory=lambda: int(os.environ.get("WEB_CONCURRENCY", 2)),
+        ge=1,
+        description="Worker processes; defaults to WEB_CONCURRENCY, then 2.",
+    )
+    GUNICORN_WORKER_CLASS: Literal["sync", "gthread"] = Field(
+        "sync",
+        description=(
+            "sync serves one request per worker at a time; gthread serves "
+            "GUNICORN_THREADS at once."
+        ),
+    )
+    GUNICORN_THREADS: int = Field(1, ge=1, description="Threads per gthread worker.")
+    GUNICORN_PRELOAD: bool = Field(
+        True,
+        description=(
+            "Load the app once in the master and fork workers from it, so "
+            "they share its memory pages."
+        ),
+    )
+    GUNICORN_WARM_CONNECTIONS: int = Field(
+        1,
+        ge=0,
+        description=(
+            "Database connections each worker opens when it starts; 0 "
+            "connects on the first request."
+        ),
+    )
+
+    # SQLite production mode (ignored for other databases)
+    SQLITE_WAL: bool = Field(
+        True,
+        description=(
+            "Use write-ahead logging with synchronous=NORMAL so readers do not "
+            "block the writer."
+        ),
+    )
+    SQLITE_BUSY_TIMEOUT: int = Field(
+        5000,
+        ge=0,
+        description="Milliseconds a connection waits for a locked database.",
+    )
+    SQLITE_MMAP_SIZE: int = Field(
+        64 * 1024 * 1024,
+        ge=0,
+        description="Bytes of the database file to memory-map; 0 disables.",
+    )
+    SQLITE_SERIALIZE_WRITES: bool = Field(
+        False,
+        description=(
+            "Queue writes within a worker process instead of letting threads "
+            "race for the SQLite write lock."
+        ),
+    )
+
     # Mail server settings (made optional for deployment)
     MAIL_SERVER: str = Field(
         "smtp.googlemail.com", min_length=1, description="SMTP server address."
@@ -76,6 +189,122 @@ class Settings(BaseSettings):
         ),
     )
 
+    # API key usage tracking
+    API_KEY_USAGE_FLUSH_INTERVAL: float = Field(
+        10.0,
+        ge=0,
+        description=(
+            "Seconds between bulk writes of API key last_used and request "
+            "counts. 0 writes on every request."
+        ),
+    )
+
+    # Authentication identity cache
+    IDENTITY_CACHE_TTL: float = Field(
+        60.0,
+        ge=0,
+        description=(
+            "Seconds a resolved JWT or API key identity is cached per worker. "
+            "0 disables the cache."
+        ),
+    )
+    IDENTITY_CACHE_SIZE: int = Field(
+        1024, ge=1, description="Maximum number of cached identities per worker."
+    )
+
+    # Response cache (see app/response_cache.py)
+    RESPONSE_CACHE_BACKEND: Literal["none", "memory", "filesystem", "shared"] = Field(
+        "none",
+        description=(
+            "Where cached API GET responses are kept: none (disabled), memory "
+            "(per worker), filesystem (per host) or shared (Redis)."
+        ),
+    )
+    RESPONSE_CACHE_TTL: float = Field(
+        60.0, gt=0, description="Seconds a cached response is served at most."
+    )
+    RESPONSE_CACHE_SIZE: int = Field(
+        1024,
+        ge=1,
+        description="Maximum entries in the memory and filesystem backends.",
+    )
+    RESPONSE_CACHE_DIR: Optional[str] = Field(
+        None,
+        description="Directory of the filesystem backend; instance/response-cache.",
+    )
+    RESPONSE_CACHE_URL: Optional[str] = Field(
+        None,
+        description=(
+            "Redis URL of the shared backend; local:// uses an in-process "
+            "stand-in for development."
+        ),
+    )
+
+    # Request metrics
+    METRICS_ENABLED: bool = Field(
+        True,
+        description="Record request latency and SQL counts for /metrics.",
+    )
+    METRICS_TOKEN: Optional[str] = Field(
+        None,
+        description=(
+            "Bearer token a scraper must send to read /metrics; unset hides "
+            "the endpoint."
+        ),
+    )
+    METRICS_DIR: Optional[str] = Field(
+        None,
+        description=(
+            "Directory where each worker writes its metrics so /metrics covers "
+            "all gunicorn workers; unset keeps them per process."
+        ),
+    )
+    METRICS_FLUSH_INTERVAL: float = Field(
+        5.0, ge=0, description="Seconds between writes of a worker's metrics file."
+    )
+    METRICS_SERVER_TIMING: bool = Field(
+        False,
+        description="Add a Server-Timing header with SQL and total request time.",
+    )
+
+    # N+1 detection (development and tests)
+    QUERY_BUDGET: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Maximum SQL statements per request before it is reported.",
+    )
+    LAZY_LOAD_LIMIT: Optional[int] = Field(
+        None,
+        ge=1,
+        description=(
+            "Maximum lazy loads of one relationship per request before it is "
+            "reported as an N+1 query."
+        ),
+    )
+    QUERY_BUDGET_RAISE: bool = Field(
+        False,
+        description="Raise instead of logging when a request exceeds its budget.",
+    )
+
+    # On-demand profiling
+    PROFILE_USERS: str = Field(
+        "",
+        description=(
+            "Comma-separated usernames allowed to profile a request with an "
+            "X-Profile: 1 header; empty disables profiling."
+        ),
+    )
+    PROFILE_DIR: Optional[str] = Field(
+        None, description="Where request profiles are written; instance/profiles."
+    )
+
+    # Bulk import
+    BULK_IMPORT_MAX_BATCHES: int = Field(
+        1000,
+        ge=1,
+        description="Maximum number of batches accepted by one bulk import request.",
+    )
+
     # Testing settings
     WTF_CSRF_ENABLED: bool = Field(
         True,
@@ -0,0 +1,60 @@
+"""
+Gunicorn settings; gunicorn reads this file from the working directory, so
+"gunicorn nalewka:app" picks it up. Values come from the GUNICORN_* settings
+in config.py.
+
+With GUNICORN_PRELOAD the app is imported once in the master and workers are
+forked from it. Garbage collection stays off in the master and everything it
+allocated is frozen before each fork, so the collector in a worker never
+writes to those objects and their pages stay shared with the master.
+"""
+
+import gc
+import os
+from typing import Any
+
+from config import settings
+
+wsgi_app = "nalewka:app"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = settings.GUNICORN_WORKERS
+worker_class = settings.GUNICORN_WORKER_CLASS
+threads = settings.GUNICORN_THREADS
+preload_app = settings.GUNICORN_PRELOAD
+
+if preload_app:
+    # Freed objects would leave holes in the master's pages that workers
+    # fill in later, copying the page
+    gc.disable()
+
+
+def when_ready(server: Any) -> None:
+    if preload_app:
+        from app.warmup import warm_caches
+
+        warmed = warm_caches(server.app.wsgi())
+        server.log.info(
+            "Preloaded %(templates)d templates and %(ingredients)d ingredients",
+            warmed,
+        )
+
+
+def pre_fork(server: Any, worker: Any) -> None:
+    if preload_app:
+        # Moves every tracked object into the permanent generation; cheap,
+        # and covers what the master allocated since the last fork
+        gc.freeze()
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    if preload_app:
+        from app.warmup import reset_after_fork
+
+        gc.enable()
+        reset_after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker: Any) -> None:
+    from app.warmup import warm_pool
+
+    warm_pool(worker.wsgi, settings.GUNICORN_WARM_CONNECTIONS)
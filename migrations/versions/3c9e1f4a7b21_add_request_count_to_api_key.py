@@ -0,0 +1,28 @@
+"""Add request_count to api_key for write-behind usage tracking
+
+Revision ID: 3c9e1f4a7b21
+Revises: 079bc57431b3
+Create Date: 2026-10-17 09:20:41.512307
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c9e1f4a7b21"
+down_revision = "079bc57431b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("api_key", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("request_count", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("api_key", schema=None) as batch_op:
+        batch_op.drop_column("request_count")
@@ -0,0 +1,30 @@
+"""Add cache_version table for process-local cache invalidation
+
+Revision ID: 8d41b6c2e9f0
+Revises: 3c9e1f4a7b21
+Create Date: 2026-10-17 10:02:13.884120
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8d41b6c2e9f0"
+down_revision = "3c9e1f4a7b21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table(
+        "cache_version",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(cache_version, [{"name": "ingredients", "version": 0}])
+
+
+def downgrade():
+    op.drop_table("cache_version")
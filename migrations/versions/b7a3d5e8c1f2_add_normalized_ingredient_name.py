@@ -0,0 +1,67 @@
+"""Enforce case-insensitive ingredient names with a normalized unique index
+
+Revision ID: b7a3d5e8c1f2
+Revises: 8d41b6c2e9f0
+Create Date: 2026-10-17 10:41:52.209774
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7a3d5e8c1f2"
+down_revision = "8d41b6c2e9f0"
+branch_labels = None
+depends_on = None
+
+
+def _normalize(name):
+    # Must match app.utils.normalize_name. SQLite's lower() only folds ASCII,
+    # so the value is computed in Python rather than with an expression index.
+    return name.strip().casefold()
+
+
+def upgrade():
+    with op.batch_alter_table("ingredient", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("name_normalized", sa.String(length=128), nullable=True)
+        )
+
+    conn = op.get_bind()
+    ingredient = sa.table(
+        "ingredient",
+        sa.column("id", sa.Integer()),
+        sa.column("name", sa.String()),
+        sa.column("name_normalized", sa.String()),
+    )
+    seen = {}
+    for row in conn.execute(sa.select(ingredient.c.id, ingredient.c.name)):
+        normalized = _normalize(row.name)
+        if normalized in seen:
+            raise RuntimeError(
+                f"Ingredients {seen[normalized]} and {row.id} differ only by case; "
+                "merge them before upgrading."
+            )
+        seen[normalized] = row.id
+        conn.execute(
+            ingredient.update()
+            .where(ingredient.c.id == row.id)
+            .values(name_normalized=normalized)
+        )
+
+    with op.batch_alter_table("ingredient", schema=None) as batch_op:
+        batch_op.alter_column(
+            "name_normalized", existing_type=sa.String(length=128), nullable=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_ingredient_name_normalized"),
+            ["name_normalized"],
+            unique=True,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("ingredient", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_ingredient_name_normalized"))
+        batch_op.drop_column("name_normalized")
@@ -0,0 +1,134 @@
+"""Add search_document table with FTS5 (SQLite) or tsvector GIN (PostgreSQL)
+
+Revision ID: c4e8a2f6d913
+Revises: b7a3d5e8c1f2
+Create Date: 2026-10-17 13:22:40.518306
+
+"""
+
+import unicodedata
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4e8a2f6d913"
+down_revision = "b7a3d5e8c1f2"
+branch_labels = None
+depends_on = None
+
+_UNDECOMPOSABLE = str.maketrans({"ł": "l", "Ł": "L"})
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE search_document_fts USING fts5("
+    "body, content='search_document', content_rowid='id')",
+    "CREATE TRIGGER search_document_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER search_document_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER search_document_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); "
+    "INSERT INTO search_document_fts(rowid, body) VALUES (new.id, new.body); END",
+)
+
+
+def _fold(text):
+    # Must match app.utils.fold_diacritics
+    decomposed = unicodedata.normalize("NFKD", text.translate(_UNDECOMPOSABLE))
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+def _title(text):
+    return " ".join((text or "").split())[:255]
+
+
+def _documents(conn):
+    for row in conn.execute(
+        sa.text("SELECT id, user_id, name, description FROM liquor")
+    ):
+        yield {
+            "kind": "liquor",
+            "object_id": row.id,
+            "user_id": row.user_id,
+            "liquor_id": row.id,
+            "title": _title(row.name),
+            "body": _fold(f"{row.name} {row.description or ''}"),
+        }
+    for row in conn.execute(
+        sa.text(
+            "SELECT batch.id, batch.liquor_id, batch.description, batch.date, "
+            "liquor.user_id FROM batch JOIN liquor ON liquor.id = batch.liquor_id"
+        )
+    ):
+        year = str(row.date)[:4] if row.date is not None else ""
+        yield {
+            "kind": "batch",
+            "object_id": row.id,
+            "user_id": row.user_id,
+            "liquor_id": row.liquor_id,
+            "title": _title(row.description),
+            "body": _fold(f"{row.description or ''} {year}"),
+        }
+    for row in conn.execute(sa.text("SELECT id, name FROM ingredient")):
+        yield {
+            "kind": "ingredient",
+            "object_id": row.id,
+            "user_id": None,
+            "liquor_id": None,
+            "title": _title(row.name),
+            "body": _fold(row.name),
+        }
+
+
+def upgrade():
+    search_document = op.create_table(
+        "search_document",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("liquor_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("search_document", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_search_document_kind_object", ["kind", "object_id"], unique=True
+        )
+        batch_op.create_index(
+            batch_op.f("ix_search_document_user_id"), ["user_id"], unique=False
+        )
+
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+    elif conn.dialect.name == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_search_document_tsv ON search_document "
+            "USING gin (to_tsvector('simple', body))"
+        )
+
+    documents = list(_documents(conn))
+    if documents:
+        op.bulk_insert(search_document, documents)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        for name in ("search_document_ai", "search_document_ad", "search_document_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS search_document_fts")
+    elif conn.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_search_document_tsv")
+
+    with op.batch_alter_table("search_document", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_search_document_user_id"))
+        batch_op.drop_index("ix_search_document_kind_object")
+    op.drop_table("search_document")
@@ -0,0 +1,44 @@
+"""Add updated_at to liquor, batch, batch_formula and ingredient
+
+Revision ID: d1f5b9c3a7e4
+Revises: c4e8a2f6d913
+Create Date: 2026-10-17 14:05:11.402917
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d1f5b9c3a7e4"
+down_revision = "c4e8a2f6d913"
+branch_labels = None
+depends_on = None
+
+# Existing rows start from their creation time where the table records one
+BACKFILL = {
+    "liquor": "created",
+    "batch": None,
+    "batch_formula": None,
+    "ingredient": "created_at",
+}
+
+
+def upgrade():
+    for table, created_column in BACKFILL.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+        source = created_column or "CURRENT_TIMESTAMP"
+        op.execute(f"UPDATE {table} SET updated_at = {source}")
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                "updated_at", existing_type=sa.DateTime(), nullable=False
+            )
+
+
+def downgrade():
+    for table in reversed(list(BACKFILL)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column("updated_at")
@@ -0,0 +1,29 @@
+"""Add primary_read_deadline table for read-your-writes across workers
+
+Revision ID: e6c2a9f4b815
+Revises: d1f5b9c3a7e4
+Create Date: 2026-10-17 16:41:52.310274
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e6c2a9f4b815"
+down_revision = "d1f5b9c3a7e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "primary_read_deadline",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("until", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("primary_read_deadline")
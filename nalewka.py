@@ -1,10 +1,17 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import click
 from dotenv import load_dotenv
 
 from app import create_app, db
 from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+from app.repositories import (
+    CacheVersionRepository,
+    IngredientRepository,
+    UserRepository,
+)
+from app.services import export_user_data
+from app.utils import to_ndjson
 
 load_dotenv()
 
@@ -46,6 +53,8 @@ def create_sample_data() -> None:
     ]
     ingredients = [Ingredient(**data) for data in ingredients_data]
     db.session.add_all(ingredients)
+    # Let running workers know the ingredient catalog changed
+    CacheVersionRepository().bump(IngredientRepository.CATALOG_VERSION)
     db.session.flush()
 
     # Create sample batches
@@ -148,3 +157,187 @@ def seed_data_command() -> None:
         # This now calls the function defined inside this file
         create_sample_data()
     click.echo("🌱 Sample data seeded successfully.")
+
+
+@app.cli.command("seed-scale")
+@click.option("--users", default=100, show_default=True, type=click.IntRange(0))
+@click.option(
+    "--liquors-per-user", default=10, show_default=True, type=click.IntRange(0)
+)
+@click.option(
+    "--batches-per-liquor", default=10, show_default=True, type=click.IntRange(0)
+)
+@click.option(
+    "--formulas-per-batch", default=5, show_default=True, type=click.IntRange(0)
+)
+@click.option("--catalog-size", default=500, show_default=True, type=click.IntRange(0))
+@click.option("--seed", default=0, show_default=True, help="Random seed.")
+@click.option(
+    "--prefix",
+    default="seed",
+    show_default=True,
+    help="Prefix of generated usernames and ingredient names.",
+)
+def seed_scale_command(
+    users: int,
+    liquors_per_user: int,
+    batches_per_liquor: int,
+    formulas_per_batch: int,
+    catalog_size: int,
+    seed: int,
+    prefix: str,
+) -> None:
+    """Generate a large, reproducible dataset for benchmarking."""
+    # CLI-only modules are imported here to keep them out of web workers
+    import time
+
+    from app.seeding import SEED_PASSWORD, seed_scale
+
+    started = time.perf_counter()
+    try:
+        created = seed_scale(
+            users,
+            liquors_per_user,
+            batches_per_liquor,
+            formulas_per_batch,
+            catalog_size,
+            seed=seed,
+            prefix=prefix,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException(f"Seeding failed: {e}")
+    summary = ", ".join(f"{count} {table}" for table, count in created.items())
+    click.echo(f"🌱 Created {summary} in {time.perf_counter() - started:.1f}s.")
+    click.echo(f"👤 Users: {prefix}_0 ... / {SEED_PASSWORD}")
+
+
+@app.cli.command("loadtest")
+@click.option(
+    "--url",
+    default=None,
+    help="Base URL of a running server, e.g. http://localhost:8000. "
+    "Without it requests go through the test client in this process.",
+)
+@click.option("--workers", default=8, show_default=True, type=click.IntRange(1))
+@click.option("--duration", default=30.0, show_default=True, help="Seconds to run for.")
+@click.option(
+    "--requests",
+    "max_requests",
+    default=None,
+    type=click.IntRange(1),
+    help="Stop after this many requests in total.",
+)
+@click.option(
+    "--mix",
+    default=None,
+    help="Weighted operations to replay, e.g. 'list_liquors=3,get_batch=1' "
+    "(default: login=1, list_liquors=30, list_batches=25, get_batch=30, "
+    "create_batch=5, update_bottles=9).",
+)
+@click.option(
+    "--user-template",
+    default="seed_{n}",
+    show_default=True,
+    help="Username of worker n, see flask seed-scale.",
+)
+@click.option(
+    "--user-pool",
+    default=100,
+    show_default=True,
+    type=click.IntRange(1),
+    help="Number of distinct users; worker n logs in as user n modulo this.",
+)
+@click.option(
+    "--password", default=None, help="Password (default: the seed-scale one)."
+)
+@click.option(
+    "--token", default=None, help="Bearer token shared by all workers instead."
+)
+@click.option("--seed", default=0, show_default=True, help="Random seed.")
+@click.option(
+    "--output",
+    "-o",
+    type=click.File("w", encoding="utf-8"),
+    default=None,
+    help="Also write the full report, with histograms, as JSON here.",
+)
+def loadtest_command(
+    url: Optional[str],
+    workers: int,
+    duration: float,
+    max_requests: Optional[int],
+    mix: Optional[str],
+    user_template: str,
+    user_pool: int,
+    password: Optional[str],
+    token: Optional[str],
+    seed: int,
+    output: Any,
+) -> None:
+    """Replay a weighted mix of API calls with concurrent workers."""
+    import json
+
+    from app.loadtest import (
+        ClientTransport,
+        HTTPTransport,
+        format_report,
+        parse_mix,
+        run_load,
+    )
+    from app.seeding import SEED_PASSWORD
+
+    try:
+        weights = parse_mix(mix) if mix else None
+        if url:
+            HTTPTransport(url)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    def make_transport() -> Any:
+        return HTTPTransport(url) if url else ClientTransport(app)
+
+    users = None
+    if token is None:
+        users = [
+            (user_template.format(n=n), password or SEED_PASSWORD)
+            for n in range(min(workers, user_pool))
+        ]
+    click.echo(
+        f"🚀 {workers} workers for {duration:g}s against {url or 'the test client'}",
+        err=True,
+    )
+    report = run_load(
+        make_transport,
+        workers,
+        duration,
+        weights,
+        max_requests=max_requests,
+        users=users,
+        token=token,
+        seed=seed,
+    )
+    click.echo(format_report(report))
+    if output:
+        json.dump(report, output, indent=2)
+        output.write("\n")
+
+
+@app.cli.command("export-data")
+@click.argument("username")
+@click.option(
+    "--output",
+    "-o",
+    type=click.File("w", encoding="utf-8"),
+    default="-",
+    help="File to write to (default: stdout).",
+)
+def export_data_command(username: str, output: Any) -> None:
+    """Export a user's liquors, batches and formulas as NDJSON."""
+    user = UserRepository().get_by_username(username)
+    if user is None:
+        raise click.ClickException(f"User '{username}' not found")
+    for record in export_user_data(user.id):
+        output.write(to_ndjson(record))
@@ -1,9 +1,15 @@
 import os
+from contextlib import contextmanager
 
 import pytest
+from sqlalchemy import event
 
 from app import create_app
 from app import db as _db
+from app.catalog import ingredient_catalog
+from app.identity import identity_cache
+from app.models import User
+from app.query_budget import query_budget
 
 
 @pytest.fixture(scope="session")
@@ -18,6 +24,10 @@ def app():
     app.config["TESTING"] = True
     app.config["WTF_CSRF_ENABLED"] = False  # Disable CSRF for testing
     app.config["SERVER_NAME"] = "localhost.localdomain"  # For URL generation in tests
+    # Any request lazy-loading one relationship in a loop fails its test
+    app.config["LAZY_LOAD_LIMIT"] = 3
+    app.config["QUERY_BUDGET_RAISE"] = True
+    query_budget.init_app(app)
 
     # Establish an application context before running the tests
     with app.app_context():
@@ -52,6 +62,9 @@ def session(db):
     for table in reversed(db.metadata.sorted_tables):
         db.session.execute(table.delete())
     db.session.commit()
+    # Cached identities would point at users that no longer exist
+    identity_cache.clear()
+    ingredient_catalog.invalidate()
 
     yield db.session
 
@@ -63,3 +76,55 @@ def client(app):
     """A test client for the app."""
     with app.test_request_context():
         yield app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client, session):
+    """
+    Create a user, log it in through the API and return it with the bearer
+    token headers:
+
+        user, headers = auth_headers("owner")
+    """
+
+    def login(username="api_user"):
+        user = User(username=username, email=f"{username}@example.com")
+        user.set_password("password123")
+        session.add(user)
+        session.commit()
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"username": username, "password": "password123"},
+        )
+        return user, {"Authorization": f"Bearer {response.get_json()['auth_token']}"}
+
+    return login
+
+
+@pytest.fixture
+def assert_max_queries(db):
+    """
+    Fail when a block runs more than ``limit`` SQL statements:
+
+        with assert_max_queries(3):
+            client.get("/api/v1/liquors", headers=headers)
+    """
+
+    @contextmanager
+    def check(limit):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        assert len(statements) <= limit, (
+            f"{len(statements)} SQL statements, expected at most {limit}:\n"
+            + "\n".join(statements)
+        )
+
+    return check
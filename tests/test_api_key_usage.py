@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+from flask import jsonify
+
+from app.auth_utils import api_key_required
+from app.models import ApiKey, User
+from app.usage import api_key_usage
+
+
+@pytest.fixture
+def tracker(app):
+    """The app's usage tracker with background flushing pushed far out."""
+    interval = api_key_usage.flush_interval
+    api_key_usage.flush_interval = 3600
+    yield api_key_usage
+    api_key_usage.flush()
+    api_key_usage.flush_interval = interval
+
+
+def _create_api_key(session, username="usage_user"):
+    user = User(username=username, email=f"{username}@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    api_key = ApiKey(user_id=user.id, key=f"{username}-key", name="Usage key")
+    session.add(api_key)
+    session.commit()
+    return api_key
+
+
+def test_usage_is_coalesced_until_flush(tracker, session):
+    """Test that recorded usage is written in one flush per interval."""
+    api_key = _create_api_key(session)
+
+    first = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    last = datetime.datetime(2024, 5, 1, 12, 5, 0)
+    tracker.record(api_key.id, last)
+    tracker.record(api_key.id, first)
+    tracker.record(api_key.id, first)
+
+    session.refresh(api_key)
+    assert api_key.last_used is None
+    assert api_key.request_count == 0
+    assert tracker.pending() == {api_key.id: (last, 3)}
+
+    assert tracker.flush() == 1
+    session.refresh(api_key)
+    assert api_key.last_used == last
+    assert api_key.request_count == 3
+    assert tracker.pending() == {}
+
+    # An older timestamp from another worker never moves last_used back
+    tracker.record(api_key.id, first)
+    tracker.flush()
+    session.refresh(api_key)
+    assert api_key.last_used == last
+    assert api_key.request_count == 4
+
+
+def test_api_key_required_records_usage(app, tracker, session):
+    """Test that API key authentication no longer commits per request."""
+    api_key = _create_api_key(session, "usage_user2")
+    key, api_key_id = api_key.key, api_key.id
+
+    @api_key_required
+    def protected(current_user):
+        return jsonify({"username": current_user.username})
+
+    with app.test_request_context(headers={"Authorization": f"ApiKey {key}"}):
+        response = protected()
+    assert response.get_json() == {"username": "usage_user2"}
+    assert tracker.pending()[api_key_id][1] == 1
+
+    tracker.flush()
+
+    session.expire_all()
+    assert session.get(ApiKey, api_key_id).request_count == 1
+
+
+def test_write_through_reuses_the_request_context(app, session, monkeypatch):
+    """Test flushing inside a request does not push a second app context."""
+    api_key = _create_api_key(session, "usage_user3")
+    api_key_id = api_key.id
+    monkeypatch.setattr(api_key_usage, "flush_interval", 0)
+
+    def app_context():
+        raise AssertionError("flush pushed a new app context")
+
+    with app.test_request_context():
+        monkeypatch.setattr(app, "app_context", app_context)
+        api_key_usage.record(api_key_id)
+        monkeypatch.undo()
+
+    session.expire_all()
+    api_key = session.get(ApiKey, api_key_id)
+    assert api_key.request_count == 1
+    assert api_key.last_used is not None
@@ -0,0 +1,73 @@
+import json
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+
+
+def _create_liquor_with_batches(session, batch_count):
+    user = User(username="listing_user", email="listing@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    liquor = Liquor(name="Listing Liquor", user_id=user.id)
+    session.add(liquor)
+    ingredients = [Ingredient(name=f"Listing ingredient {i}") for i in range(3)]
+    session.add_all(ingredients)
+    session.commit()
+
+    for i in range(batch_count):
+        batch = Batch(description=f"Listing batch {i}", liquor_id=liquor.id)
+        batch.formulas = [
+            BatchFormula(ingredient_id=ingredient.id, quantity=10.0, unit="g")
+            for ingredient in ingredients[: i % 3 + 1]
+        ]
+        session.add(batch)
+    session.commit()
+    user_id, liquor_id = user.id, liquor.id
+    # Start the request with an empty identity map, like a fresh worker
+    session.expunge_all()
+    return user_id, liquor_id
+
+
+def test_liquor_batches_page_query_count(client, session, assert_max_queries):
+    """Test the batches page runs the same number of queries for any batch count."""
+    user_id, liquor_id = _create_liquor_with_batches(session, 30)
+
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+    # user, liquor, batches and one selectin load of formulas with ingredients
+    with assert_max_queries(5):
+        response = client.get(f"/liquor/{liquor_id}/batches")
+
+    assert response.status_code == 200
+    assert b"Listing ingredient 2: 10.0 g" in response.data
+
+
+def test_batches_api_ingredient_count(client, session, assert_max_queries):
+    """Test ingredient_count in the batch list comes from a single query."""
+    user_id, liquor_id = _create_liquor_with_batches(session, 12)
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": "listing_user", "password": "password123"}),
+        content_type="application/json",
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+    # Resolve the token once, so only a warm worker's queries are counted
+    client.get("/api/v1/users/me", headers=headers)
+
+    # identity version, liquor ownership, ETag validator, count and page; no
+    # per-batch loads
+    with assert_max_queries(5):
+        response = client.get(
+            f"/api/v1/liquors/{liquor_id}/batches?per_page=12", headers=headers
+        )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    counts = {batch["description"]: batch["ingredient_count"] for batch in data["data"]}
+    assert counts["Listing batch 0"] == 1
+    assert counts["Listing batch 4"] == 2
+    assert counts["Listing batch 11"] == 3
@@ -0,0 +1,88 @@
+import json
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor
+
+
+def _create_batch(session, user):
+    liquor = Liquor(name=f"{user.username} liquor", user_id=user.id)
+    ingredient = Ingredient(name=f"{user.username} ingredient")
+    session.add_all([liquor, ingredient])
+    session.commit()
+
+    batch = Batch(description="Ownership batch", liquor_id=liquor.id)
+    batch.formulas = [
+        BatchFormula(ingredient_id=ingredient.id, quantity=10.0, unit="g")
+    ]
+    session.add(batch)
+    session.commit()
+    return batch.id, batch.formulas[0].id
+
+
+def test_foreign_batches_and_formulas_are_not_found(client, session, auth_headers):
+    """Test every batch and formula endpoint hides other users' rows."""
+    owner, _ = auth_headers("owner")
+    intruder, headers = auth_headers("intruder")
+    batch_id, formula_id = _create_batch(session, owner)
+    _create_batch(session, intruder)
+
+    requests = [
+        ("get", f"/api/v1/batches/{batch_id}", None),
+        ("put", f"/api/v1/batches/{batch_id}", {"description": "Taken over"}),
+        ("put", f"/api/v1/batches/{batch_id}/bottles", {"bottle_count": 3}),
+        ("get", f"/api/v1/batches/{batch_id}/formulas", None),
+        (
+            "post",
+            f"/api/v1/batches/{batch_id}/formulas",
+            {"ingredient_id": 1, "quantity": 1, "unit": "g"},
+        ),
+        ("put", f"/api/v1/formulas/{formula_id}", {"quantity": 2}),
+        ("delete", f"/api/v1/formulas/{formula_id}", None),
+        ("delete", f"/api/v1/batches/{batch_id}", None),
+    ]
+    for method, url, body in requests:
+        response = getattr(client, method)(
+            url,
+            data=json.dumps(body) if body is not None else None,
+            content_type="application/json",
+            headers=headers,
+        )
+        assert response.status_code == 404, (method, url)
+
+    assert session.get(Batch, batch_id).description == "Ownership batch"
+    assert session.get(BatchFormula, formula_id) is not None
+
+
+def test_batch_endpoints_resolve_ownership_in_one_query(
+    client, session, auth_headers, assert_max_queries
+):
+    """Test reading a batch or a formula checks ownership in the same statement."""
+    owner, headers = auth_headers("owner")
+    batch_id, formula_id = _create_batch(session, owner)
+    # Warm the identity cache so only the endpoint's own queries are counted
+    client.get(f"/api/v1/batches/{batch_id}", headers=headers)
+    session.expunge_all()
+
+    with assert_max_queries(3) as statements:
+        response = client.get(f"/api/v1/batches/{batch_id}", headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)["formulas"][0]["ingredient_name"] == (
+        "owner ingredient"
+    )
+    # After the identity version probe, the ETag validator and the load are
+    # each scoped to the owner
+    assert len(statements) == 3
+    assert "cache_version" in statements[0]
+    assert all("liquor.user_id = ?" in statement for statement in statements[1:])
+
+    with assert_max_queries(4) as statements:
+        response = client.put(
+            f"/api/v1/batches/{batch_id}/bottles",
+            data=json.dumps({"bottle_count": 4, "bottle_volume": 500}),
+            content_type="application/json",
+            headers=headers,
+        )
+    assert response.status_code == 200
+    assert json.loads(response.data)["bottle_count"] == 4
+    # identity version, scoped load, update, and the post-commit refresh; no
+    # separate liquor lookup
+    assert len(statements) == 4
@@ -0,0 +1,138 @@
+import pytest
+from click.testing import CliRunner
+
+from app.seeding import seed_scale
+from benchmarks.__main__ import _is_disposable, cli
+from benchmarks.cases import (
+    NOT_BENCHMARKED,
+    api_rules,
+    endpoint_cases,
+    load_sample,
+    log_in,
+    repository_cases,
+    repository_methods,
+)
+from benchmarks.harness import compare, measure, percentile
+from benchmarks.memory import parse_smaps_rollup
+from benchmarks.startup import ImportTime, parse_importtime
+
+
+def _results(**cases):
+    return {"sizes": {"small": {"results": cases}}}
+
+
+def _timing(p50, queries=2):
+    return {"p50_ms": p50, "queries": queries}
+
+
+def test_percentile_interpolates():
+    """Test percentiles interpolate between the nearest ranks."""
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+
+
+def test_compare_flags_slowdowns_and_extra_queries():
+    """Test compare reports regressions beyond the threshold or noise floor."""
+    baseline = _results(
+        slower=_timing(10.0),
+        noisy=_timing(0.2),
+        more_queries=_timing(5.0, queries=2),
+        faster=_timing(10.0),
+        same=_timing(10.0),
+        removed=_timing(1.0),
+    )
+    current = _results(
+        slower=_timing(13.0),
+        noisy=_timing(0.4),
+        more_queries=_timing(5.0, queries=3),
+        faster=_timing(5.0),
+        same=_timing(11.0),
+        added=_timing(1.0),
+    )
+
+    report = compare(baseline, current, threshold=0.25, min_delta_ms=0.5)
+    assert [c.name for c in report["regressions"]] == ["more_queries", "slower"]
+    assert [c.name for c in report["improvements"]] == ["faster"]
+    assert [c.name for c in report["unchanged"]] == ["noisy", "same"]
+    assert [c.name for c in report["missing"]] == ["removed"]
+    assert [c.name for c in report["new"]] == ["added"]
+
+
+def test_every_api_route_and_repository_method_is_benchmarked(app, client, session):
+    """Test new endpoints and repository methods get a benchmark case."""
+    seed_scale(1, 1, 1, 1, catalog_size=3, prefix="bench")
+    sample = load_sample("bench_0")
+
+    endpoint_names = {
+        case.name.split("?")[0] for case in endpoint_cases(client, sample, "")
+    }
+    assert set(api_rules(app)) - endpoint_names == set()
+
+    repository_names = {case.name for case in repository_cases(sample)}
+    uncovered = set(repository_methods()) - repository_names - set(NOT_BENCHMARKED)
+    assert uncovered == set()
+
+
+@pytest.mark.parametrize("kind", ["repository", "endpoint"])
+def test_cases_run_against_a_seeded_database(app, client, session, kind):
+    """Test every case runs cleanly once on a tiny dataset."""
+    seed_scale(2, 2, 2, 2, catalog_size=5, prefix="bench")
+    sample = load_sample("bench_0")
+    if kind == "repository":
+        cases = repository_cases(sample)
+    else:
+        cases = endpoint_cases(client, sample, log_in(client, sample))
+
+    for case in cases:
+        result = measure(app, case, iterations=1, warmup=0)
+        assert result["p50_ms"] >= 0
+        assert result["queries"] >= 0
+
+
+def test_parse_importtime():
+    """Test the -X importtime report is parsed with nesting depth."""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     jwt.utils\n"
+        "import time:       300 |        420 |   jwt\n"
+        "import time:      1000 |       1420 | app\n"
+    )
+    assert parse_importtime(output) == [
+        ImportTime("jwt.utils", 120, 120, 2),
+        ImportTime("jwt", 300, 420, 1),
+        ImportTime("app", 1000, 1420, 0),
+    ]
+
+
+def test_parse_smaps_rollup():
+    """Test USS adds up private pages and PSS is read as is."""
+    text = (
+        "55d0a000-7ffd1000 ---p 00000000 00:00 0    [rollup]\n"
+        "Rss:               64000 kB\n"
+        "Pss:               22000 kB\n"
+        "Shared_Clean:      40000 kB\n"
+        "Shared_Dirty:       4000 kB\n"
+        "Private_Clean:       500 kB\n"
+        "Private_Dirty:     11500 kB\n"
+    )
+    assert parse_smaps_rollup(text) == {
+        "rss_kb": 64000,
+        "pss_kb": 22000,
+        "uss_kb": 12000,
+    }
+
+
+def test_run_refuses_to_drop_a_real_database(tmp_path):
+    """Test run only empties temporary SQLite databases without --yes-drop."""
+    assert _is_disposable("sqlite://")
+    assert _is_disposable(f"sqlite:///{tmp_path / 'bench.db'}")
+    assert not _is_disposable("sqlite:///site.db")
+    assert not _is_disposable("postgresql://user@localhost/nalewka")
+
+    result = CliRunner().invoke(
+        cli, ["run", "--database-url", "postgresql://user@localhost/nalewka"]
+    )
+    assert result.exit_code == 2
+    assert "--yes-drop" in result.output
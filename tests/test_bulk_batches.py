@@ -0,0 +1,139 @@
+import json
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+
+
+def _setup(client, session):
+    user = User(username="bulk_user", email="bulk@example.com")
+    user.set_password("password123")
+    other = User(username="bulk_other", email="bulk_other@example.com")
+    other.set_password("password123")
+    session.add_all([user, other])
+    session.commit()
+
+    liquor = Liquor(name="Bulk Liquor", user_id=user.id)
+    foreign = Liquor(name="Foreign Liquor", user_id=other.id)
+    ingredient = Ingredient(name="Bulk ingredient")
+    session.add_all([liquor, foreign, ingredient])
+    session.commit()
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": "bulk_user", "password": "password123"}),
+        content_type="application/json",
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+    return headers, liquor.id, foreign.id, ingredient.id
+
+
+def _batch(liquor_id, ingredient_id, description="Bulk batch", **extra):
+    return {
+        "liquor_id": liquor_id,
+        "description": description,
+        "date": "2024-05-01",
+        "bottle_count": 2,
+        "bottle_volume": 500,
+        "formulas": [{"ingredient_id": ingredient_id, "quantity": 100, "unit": "g"}],
+        **extra,
+    }
+
+
+def _post(client, headers, payload):
+    return client.post(
+        "/api/v1/batches/bulk",
+        data=json.dumps(payload),
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def test_bulk_import_uses_multi_row_inserts(client, session, assert_max_queries):
+    """Test a bulk import writes all batches and formulas in two INSERTs."""
+    headers, liquor_id, _, ingredient_id = _setup(client, session)
+    batches = [_batch(liquor_id, ingredient_id, f"Bulk batch {i}") for i in range(50)]
+
+    # The same handful of statements for 50 batches as for one
+    with assert_max_queries(10) as statements:
+        response = _post(client, headers, {"batches": batches})
+
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data["created"] == 50 and data["failed"] == 0
+    ids = [result["id"] for result in data["results"]]
+    assert [result["index"] for result in data["results"]] == list(range(50))
+
+    created = {batch.id: batch for batch in session.query(Batch).all()}
+    assert [created[batch_id].description for batch_id in ids] == [
+        f"Bulk batch {i}" for i in range(50)
+    ]
+    assert session.query(BatchFormula).count() == 50
+    inserts = [s for s in statements if s.startswith("INSERT INTO batch")]
+    assert len(inserts) == 2
+    # The new batches are added to the search index in one more statement
+    assert len([s for s in statements if s.startswith("INSERT INTO search")]) == 1
+
+
+def test_bulk_import_all_or_nothing(client, session):
+    """Test one invalid batch rejects the whole import by default."""
+    headers, liquor_id, foreign_id, ingredient_id = _setup(client, session)
+    batches = [
+        _batch(liquor_id, ingredient_id),
+        _batch(foreign_id, ingredient_id),
+        _batch(liquor_id, ingredient_id, bottle_count=-1),
+    ]
+
+    response = _post(client, headers, {"batches": batches})
+
+    assert response.status_code == 400
+    errors = json.loads(response.data)["details"]["results"]
+    assert [error["index"] for error in errors] == [1, 2]
+    assert errors[0]["errors"] == ["Liquor not found"]
+    assert session.query(Batch).count() == 0
+
+
+def test_bulk_import_best_effort(client, session):
+    """Test best_effort mode creates the valid batches and reports the rest."""
+    headers, liquor_id, _, ingredient_id = _setup(client, session)
+    batches = [
+        _batch(liquor_id, ingredient_id),
+        _batch(liquor_id, ingredient_id + 100),
+        _batch(liquor_id, ingredient_id, date="yesterday"),
+    ]
+
+    response = _post(client, headers, {"batches": batches, "mode": "best_effort"})
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["created"] == 1 and data["failed"] == 2
+    assert data["results"][0]["status"] == "created"
+    assert data["results"][1]["errors"] == ["formulas[0]: Ingredient not found"]
+    assert data["results"][2]["errors"] == ["Invalid date format"]
+    assert session.query(Batch).count() == 1
+
+    response = _post(client, headers, {"batches": batches, "mode": "sometimes"})
+    assert response.status_code == 400
+
+
+def test_bulk_import_rejects_invalid_units_and_quantities(client, session):
+    """Test malformed values are reported per item instead of failing the insert."""
+    headers, liquor_id, _, ingredient_id = _setup(client, session)
+    batches = [
+        _batch(liquor_id, ingredient_id, bottle_volume_unit=["x"]),
+        _batch(liquor_id, ingredient_id, bottle_volume_unit="x" * 11),
+        _batch(
+            liquor_id,
+            ingredient_id,
+            formulas=[{"ingredient_id": ingredient_id, "unit": "g"}],
+        ),
+        _batch(liquor_id, ingredient_id),
+    ]
+
+    response = _post(client, headers, {"batches": batches, "mode": "best_effort"})
+
+    assert response.status_code == 200
+    results = json.loads(response.data)["results"]
+    assert results[0]["errors"] == ["bottle_volume_unit is invalid"]
+    assert results[1]["errors"] == ["bottle_volume_unit is invalid"]
+    assert results[2]["errors"] == ["formulas[0]: Quantity must be a valid number"]
+    assert results[3]["status"] == "created"
+    assert session.query(Batch).one().bottle_volume_unit == "ml"
@@ -0,0 +1,144 @@
+import json
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+
+
+def test_liquor_list_not_modified(client, session, auth_headers, assert_max_queries):
+    """Test If-None-Match returns 304 until the data changes."""
+    user, headers = auth_headers("etag_user")
+    liquor = Liquor(name="Śliwowica", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+    created = liquor.updated_at
+    assert created is not None
+
+    response = client.get("/api/v1/liquors", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    conditional = {**headers, "If-None-Match": etag}
+    # The identity version probe and the validator
+    with assert_max_queries(2) as statements:
+        response = client.get("/api/v1/liquors", headers=conditional)
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    # Only the validator runs: no COUNT(*) and no page query
+    assert len([s for s in statements if "FROM liquor" in s]) == 1
+
+    client.put(
+        f"/api/v1/liquors/{liquor.id}",
+        data=json.dumps({"name": "Śliwowica łącka"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert liquor.updated_at > created
+    response = client.get("/api/v1/liquors", headers=conditional)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # A different representation has its own ETag
+    conditional["If-None-Match"] = response.headers["ETag"]
+    response = client.get("/api/v1/liquors?include=stats", headers=conditional)
+    assert response.status_code == 200
+
+
+def test_batch_etag_follows_formulas_and_ingredients(client, session, auth_headers):
+    """Test a batch's ETag changes when its formulas or ingredients change."""
+    user, headers = auth_headers("etag_user")
+    liquor = Liquor(name="Pigwówka", user_id=user.id)
+    ingredient = Ingredient(name="Pigwa")
+    session.add_all([liquor, ingredient])
+    session.commit()
+    batch = Batch(liquor_id=liquor.id, description="Pigwa 2024")
+    session.add(batch)
+    session.commit()
+    formula = BatchFormula(
+        batch_id=batch.id, ingredient_id=ingredient.id, quantity=1, unit="kg"
+    )
+    session.add(formula)
+    session.commit()
+
+    etags = []
+    for _ in range(2):
+        response = client.get(f"/api/v1/batches/{batch.id}", headers=headers)
+        assert response.status_code == 200
+        etags.append(response.headers["ETag"])
+        ingredient.name = "Pigwowiec"
+        session.commit()
+    assert etags[0] != etags[1]
+
+    response = client.get(
+        f"/api/v1/batches/{batch.id}/formulas",
+        headers={**headers, "If-None-Match": '"unknown"'},
+    )
+    assert response.status_code == 200
+    response = client.get(
+        f"/api/v1/batches/{batch.id}/formulas",
+        headers={**headers, "If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+    session.delete(formula)
+    session.commit()
+    response = client.get(
+        f"/api/v1/batches/{batch.id}/formulas",
+        headers={**headers, "If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 200
+
+    # Someone else's batch is still a 404, whatever the client sends
+    other = User(username="etag_other", email="etag_other@example.com")
+    session.add(other)
+    session.commit()
+    batch.liquor.user_id = other.id
+    session.commit()
+    response = client.get(
+        f"/api/v1/batches/{batch.id}",
+        headers={**headers, "If-None-Match": etags[1]},
+    )
+    assert response.status_code == 404
+
+
+def test_batch_list_etag_follows_formula_moves(client, session, auth_headers):
+    """Test the batch list ETag changes when a formula moves between batches."""
+    user, headers = auth_headers("etag_user")
+    liquor = Liquor(name="Wiśniówka", user_id=user.id)
+    ingredient = Ingredient(name="Wiśnia")
+    session.add_all([liquor, ingredient])
+    session.commit()
+    first = Batch(liquor_id=liquor.id, description="Wiśnie 2023")
+    second = Batch(liquor_id=liquor.id, description="Wiśnie 2024")
+    first.formulas = [
+        BatchFormula(ingredient_id=ingredient.id, quantity=1, unit="kg"),
+        BatchFormula(ingredient_id=ingredient.id, quantity=2, unit="kg"),
+    ]
+    session.add_all([first, second])
+    session.commit()
+
+    url = f"/api/v1/liquors/{liquor.id}/batches"
+    response = client.get(url, headers=headers)
+    etag = response.headers["ETag"]
+
+    # Batch and formula totals stay the same, only the per-batch counts change
+    first.formulas[0].batch_id = second.id
+    session.commit()
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    counts = {
+        batch["description"]: batch["ingredient_count"]
+        for batch in json.loads(response.data)["data"]
+    }
+    assert counts == {"Wiśnie 2023": 1, "Wiśnie 2024": 1}
+
+
+def test_ingredient_catalog_etag(client, session):
+    """Test the ingredient list is validated from the in-memory catalog."""
+    session.add(Ingredient(name="Miód"))
+    session.commit()
+
+    response = client.get("/api/v1/ingredients")
+    etag = response.headers["ETag"]
+    response = client.get("/api/v1/ingredients", headers={"If-None-Match": etag})
+    assert response.status_code == 304
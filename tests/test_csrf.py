@@ -0,0 +1,67 @@
+import pytest
+
+from app import create_app
+from app import db as _db
+from app.identity import identity_cache
+from app.models import User
+from app.query_budget import query_budget
+from app.replica import replica_router
+from app.usage import api_key_usage
+from config import settings
+
+
+@pytest.fixture
+def csrf_app(app, tmp_path):
+    """An app with CSRF protection on, as in production."""
+    csrf_app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'csrf.db'}",
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": True,
+        }
+    )
+    with csrf_app.app_context():
+        _db.create_all()
+        user = User(username="csrf_user", email="csrf_user@example.com")
+        user.set_password("password123")
+        _db.session.add(user)
+        _db.session.commit()
+
+    yield csrf_app
+
+    with csrf_app.app_context():
+        _db.engine.dispose()
+
+    # Point the process-wide helpers back at the shared test app
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def test_api_posts_need_no_csrf_token(csrf_app):
+    """Test that bearer token clients can POST to the API without a CSRF token."""
+    client = csrf_app.test_client()
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"username": "csrf_user", "password": "password123"},
+    )
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.get_json()['auth_token']}"}
+
+    response = client.post(
+        "/api/v1/liquors", json={"name": "Wiśniówka"}, headers=headers
+    )
+    assert response.status_code == 201
+
+
+def test_form_posts_still_need_a_csrf_token(csrf_app):
+    """Test that the exemption does not reach the session-based pages."""
+    client = csrf_app.test_client()
+    response = client.post(
+        "/login", data={"username": "csrf_user", "password": "password123"}
+    )
+    assert response.status_code == 400
+    with client.session_transaction() as session:
+        assert "_user_id" not in session
@@ -0,0 +1,46 @@
+import json
+
+from sqlalchemy.pool import NullPool
+
+from app.pool import build_engine_options
+
+
+def test_healthz_db_reports_pool(client):
+    """Test the database health endpoint reports pool usage and timings."""
+    response = client.get("/healthz/db")
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["status"] == "ok"
+    assert data["acquire_ms"] >= 0 and data["query_ms"] >= 0
+    assert "pool" in data
+
+
+def test_build_engine_options():
+    """Test pool settings map onto SQLAlchemy engine options."""
+    postgres = {
+        "SQLALCHEMY_DATABASE_URI": "postgresql://db/nalewka",
+        "DB_POOL_SIZE": 3,
+        "DB_MAX_OVERFLOW": 0,
+        "DB_POOL_TIMEOUT": 5.0,
+        "DB_POOL_RECYCLE": 300,
+        "DB_POOL_PRE_PING": True,
+    }
+    assert build_engine_options(postgres) == {
+        "pool_pre_ping": True,
+        "pool_size": 3,
+        "max_overflow": 0,
+        "pool_timeout": 5.0,
+        "pool_recycle": 300,
+    }
+
+    pgbouncer = {**postgres, "DB_POOL_DISABLED": True}
+    assert build_engine_options(pgbouncer) == {
+        "pool_pre_ping": True,
+        "poolclass": NullPool,
+    }
+
+    # SQLite keeps the pool SQLAlchemy chooses for it
+    assert build_engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite://"}) == {
+        "pool_pre_ping": True
+    }
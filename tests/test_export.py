@@ -0,0 +1,70 @@
+import json
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+from app.repositories import BatchRepository
+
+
+def _create_user_data(session, username, liquor_count=2):
+    user = User(username=username, email=f"{username}@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    ingredient = Ingredient(name=f"{username} wiśnie")
+    session.add(ingredient)
+    for i in range(liquor_count):
+        liquor = Liquor(name=f"{username} liquor {i}", user_id=user.id)
+        batch = Batch(description=f"{username} batch {i}")
+        batch.formulas = [BatchFormula(ingredient=ingredient, quantity=1.5, unit="kg")]
+        liquor.batches = [batch]
+        session.add(liquor)
+    session.commit()
+    return user.id
+
+
+def test_export_streams_only_own_data(client, session):
+    """Test the NDJSON export streams the caller's records and nothing else."""
+    user_id = _create_user_data(session, "exporter")
+    _create_user_data(session, "bystander")
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": "exporter", "password": "password123"}),
+        content_type="application/json",
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+
+    response = client.get("/api/v1/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+
+    records = [
+        json.loads(line) for line in response.get_data(as_text=True).splitlines()
+    ]
+    assert [record["type"] for record in records] == [
+        "user",
+        "liquor",
+        "liquor",
+        "batch",
+        "batch",
+        "formula",
+        "formula",
+    ]
+    assert records[0]["id"] == user_id
+    assert all("bystander" not in json.dumps(record) for record in records)
+    assert records[-1]["ingredient_name"] == "exporter wiśnie"
+
+    response = client.get("/api/v1/export?format=csv", headers=headers)
+    assert response.status_code == 400
+
+
+def test_stream_for_user_reads_in_chunks(session):
+    """Test streaming yields every row when the chunk is smaller than the result."""
+    user_id = _create_user_data(session, "chunked", liquor_count=7)
+
+    rows = list(BatchRepository().stream_for_user(user_id, yield_per=3))
+
+    assert [row["description"] for row in rows] == [
+        f"chunked batch {i}" for i in range(7)
+    ]
@@ -7,6 +7,7 @@ from werkzeug.datastructures import MultiDict
 from app.forms import (
     BatchFormulaForm,
     EditBottlesForm,
+    IngredientEntryForm,
     LiquorForm,
     RegistrationForm,
 )
@@ -301,3 +302,20 @@ def test_edit_bottles_form_invalid_range(app: Any) -> None:
         assert form.validate() is False
         assert "bottle_count" in form.errors
         assert "bottle_volume" in form.errors
+
+
+def test_ingredient_entry_form_validates_against_id_set(app: Any) -> None:
+    """
+    GIVEN an IngredientEntryForm given a set of valid ingredient ids
+    WHEN an id is submitted
+    THEN only ids in the set pass, without consulting the choices list
+    """
+    with app.test_request_context():
+        for ingredient_id, expected in [("7", True), ("8", False)]:
+            form = IngredientEntryForm(
+                formdata=MultiDict(
+                    {"ingredient": ingredient_id, "quantity": "1", "unit": "g"}
+                ),
+                ingredient_ids={7},
+            )
+            assert form.validate() is expected
@@ -0,0 +1,119 @@
+import json
+
+from app.identity import IdentityCache, UserIdentity, identity_cache
+from app.models import ApiKey, User
+
+
+def test_identity_cache_lru_and_ttl():
+    """Test that the cache evicts the least recently used entry and expires."""
+    cache = IdentityCache(max_size=2, ttl=60)
+    identities = [UserIdentity(i, f"user{i}", f"u{i}@x.com", None) for i in range(3)]
+
+    cache.set("token", "a", identities[0])
+    cache.set("token", "b", identities[1])
+    assert cache.get("token", "a").identity == identities[0]  # a is now recent
+    cache.set("token", "c", identities[2])
+
+    assert cache.get("token", "b") is None
+    assert cache.get("token", "a") is not None
+    assert cache.get("token", "c") is not None
+
+    # Entries never outlive the credential's own expiry
+    cache.set("token", "expired", identities[0], expires_at=0)
+    assert cache.get("token", "expired") is None
+
+    cache.invalidate_user(0)
+    assert cache.get("token", "a") is None
+    assert len(cache) == 1
+
+
+def test_token_identity_is_cached_and_invalidated(client, session, auth_headers):
+    """Test that repeated token requests hit the cache until the user changes."""
+    user, headers = auth_headers("identity_user")
+
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert len(identity_cache) == 1
+
+    # Changing the row behind the cache's back is not visible until invalidation
+    session.get(User, user.id).username = "renamed_directly"
+    session.commit()
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert json.loads(response.data)["username"] == "identity_user"
+
+    response = client.put(
+        "/api/v1/users/me",
+        data=json.dumps({"username": "identity_user2"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert len(identity_cache) == 0
+
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert json.loads(response.data)["username"] == "identity_user2"
+
+
+def test_api_key_cache_invalidated_on_deactivate(app, client, session, auth_headers):
+    """Test that deactivating or deleting an API key evicts its identity."""
+    from flask import jsonify
+
+    from app.auth_utils import api_key_required
+
+    user, headers = auth_headers("identity_key_user")
+    api_key = ApiKey(user_id=user.id, key="identity-key", name="Identity key")
+    session.add(api_key)
+    session.commit()
+    api_key_id = api_key.id
+
+    @api_key_required
+    def protected(current_user):
+        return jsonify({"id": current_user.id})
+
+    api_headers = {"Authorization": "ApiKey identity-key"}
+    with app.test_request_context(headers=api_headers):
+        assert protected().status_code == 200
+    assert identity_cache.get("api_key", "identity-key") is not None
+
+    response = client.post(
+        f"/api/v1/auth/api-keys/{api_key_id}/deactivate", headers=headers
+    )
+    assert response.status_code == 200
+    assert json.loads(response.data)["is_active"] is False
+    assert identity_cache.get("api_key", "identity-key") is None
+
+    with app.test_request_context(headers=api_headers):
+        response, status_code = protected()
+    assert status_code == 401
+
+
+def test_identity_cache_dropped_when_another_worker_revokes(
+    app, client, session, auth_headers
+):
+    """Test that a bumped identity version clears the cache of other workers."""
+    from app.repositories import CacheVersionRepository
+
+    user, headers = auth_headers("identity_worker_user")
+    api_key = ApiKey(user_id=user.id, key="worker-key", name="Worker key")
+    session.add(api_key)
+    session.commit()
+
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert len(identity_cache) == 1
+
+    # Another worker deactivates the key: its row and the version change, but
+    # nothing in this process is invalidated directly
+    session.get(ApiKey, api_key.id).is_active = False
+    CacheVersionRepository().bump(IdentityCache.VERSION)
+    session.commit()
+
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    # The stale entries were dropped and only this request's token re-cached
+    assert len(identity_cache) == 1
+    session.get(User, user.id).username = "renamed_elsewhere"
+    CacheVersionRepository().bump(IdentityCache.VERSION)
+    session.commit()
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert json.loads(response.data)["username"] == "renamed_elsewhere"
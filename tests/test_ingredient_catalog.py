@@ -0,0 +1,101 @@
+import json
+
+from app.catalog import IngredientCatalog
+from app.models import Ingredient
+from app.repositories import CacheVersionRepository
+
+
+def test_catalog_reloads_only_when_version_changes(session):
+    """Test that a catalog reloads when another worker bumps the version."""
+    session.add(Ingredient(name="Wiśnie"))
+    session.commit()
+
+    catalog = IngredientCatalog()
+    assert [entry.name for entry in catalog.entries()] == ["Wiśnie"]
+    loaded_version = catalog.version
+
+    # A direct insert without a version bump is not picked up...
+    session.add(Ingredient(name="Cukier"))
+    session.commit()
+    assert len(catalog.entries()) == 1
+
+    # ...until some worker bumps the shared version
+    CacheVersionRepository().bump("ingredients")
+    session.commit()
+    assert catalog.entries()[1].name_lower == "cukier"
+    assert catalog.version == loaded_version + 1
+    assert catalog.find_by_name("  WIŚNIE ").name == "Wiśnie"
+
+
+def test_ingredient_api_uses_catalog(client, session, auth_headers):
+    """Test that ingredient writes through the API are visible immediately."""
+    _, headers = auth_headers("catalog_user")
+
+    response = client.get("/api/v1/ingredients")
+    assert json.loads(response.data) == []
+
+    response = client.post(
+        "/api/v1/ingredients",
+        data=json.dumps({"name": "Maliny", "description": "Fresh raspberries"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 201
+    ingredient_id = json.loads(response.data)["id"]
+
+    response = client.post(
+        "/api/v1/ingredients",
+        data=json.dumps({"name": "MALINY"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 409
+
+    response = client.put(
+        f"/api/v1/ingredients/{ingredient_id}",
+        data=json.dumps({"name": "Maliny leśne"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/ingredients")
+    data = json.loads(response.data)
+    assert [item["name"] for item in data] == ["Maliny leśne"]
+    assert data[0]["description"] == "Fresh raspberries"
+
+    response = client.delete(f"/api/v1/ingredients/{ingredient_id}", headers=headers)
+    assert response.status_code == 204
+    assert json.loads(client.get("/api/v1/ingredients").data) == []
+
+
+def test_suggest_ignores_case_and_diacritics(client, session):
+    """Test that suggestions match name and word prefixes without accents."""
+    for name in ["Wiśnie", "Wino białe", "Maliny leśne", "Łyżka miodu", "Cukier"]:
+        session.add(Ingredient(name=name))
+    session.commit()
+
+    response = client.get("/api/v1/ingredients/suggest?q=wi")
+    assert [item["name"] for item in json.loads(response.data)] == [
+        "Wino białe",
+        "Wiśnie",
+    ]
+
+    response = client.get("/api/v1/ingredients/suggest?q=WIŚ")
+    assert [item["name"] for item in json.loads(response.data)] == ["Wiśnie"]
+
+    response = client.get("/api/v1/ingredients/suggest?q=lesn")
+    assert [item["name"] for item in json.loads(response.data)] == ["Maliny leśne"]
+
+    # Whole-name matches rank ahead of later-word matches
+    response = client.get("/api/v1/ingredients/suggest?q=l")
+    assert [item["name"] for item in json.loads(response.data)] == [
+        "Łyżka miodu",
+        "Maliny leśne",
+    ]
+
+    response = client.get("/api/v1/ingredients/suggest?q=l&limit=1")
+    assert len(json.loads(response.data)) == 1
+
+    response = client.get("/api/v1/ingredients/suggest?q=")
+    assert json.loads(response.data) == []
@@ -0,0 +1,87 @@
+import json
+
+from app.models import Batch, Liquor, User
+from app.repositories import LiquorRepository
+
+
+def _create_liquors(session):
+    user = User(username="stats_user", email="stats@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    full = Liquor(name="Wiśniówka", user_id=user.id)
+    empty = Liquor(name="Cytrynówka", user_id=user.id)
+    session.add_all([full, empty])
+    session.commit()
+
+    session.add_all(
+        [
+            Batch(
+                description="Batch 1",
+                liquor_id=full.id,
+                bottle_count=4,
+                bottle_volume=500.0,
+            ),
+            Batch(
+                description="Batch 2",
+                liquor_id=full.id,
+                bottle_count=2,
+                bottle_volume=700.0,
+            ),
+            Batch(description="Batch 3", liquor_id=full.id, bottle_count=None),
+        ]
+    )
+    session.commit()
+    return user, full, empty
+
+
+def test_liquors_with_stats_repository(session):
+    """Test that aggregates are computed in SQL and match the Python fallback."""
+    user, full, empty = _create_liquors(session)
+    session.expire_all()
+
+    liquors = LiquorRepository().get_all_with_stats_for_user(user.id)
+    by_id = {liquor.id: liquor for liquor in liquors}
+
+    assert by_id[full.id].batch_count == 3
+    assert by_id[full.id].total_bottles_produced == 6
+    assert by_id[full.id].total_volume_produced == 3400.0
+    assert by_id[empty.id].batch_count == 0
+    assert by_id[empty.id].total_bottles_produced == 0
+    assert by_id[empty.id].total_volume_produced == 0.0
+
+    # The batches relationship was never loaded
+    assert "batches" not in by_id[full.id].__dict__
+
+
+def test_liquor_stats_api(client, session):
+    """Test the include=stats option on the liquor endpoints."""
+    user, full, empty = _create_liquors(session)
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": "stats_user", "password": "password123"}),
+        content_type="application/json",
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+
+    response = client.get("/api/v1/liquors", headers=headers)
+    data = json.loads(response.data)
+    assert "stats" not in data["data"][0]
+
+    response = client.get("/api/v1/liquors?include=stats", headers=headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    stats = {item["id"]: item["stats"] for item in data["data"]}
+    assert stats[full.id] == {
+        "batch_count": 3,
+        "total_bottles": 6,
+        "total_volume": 3400.0,
+    }
+    assert stats[empty.id]["batch_count"] == 0
+
+    response = client.get(f"/api/v1/liquors/{full.id}?include=stats", headers=headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["stats"]["batch_count"] == 3
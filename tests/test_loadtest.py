@@ -0,0 +1,124 @@
+import pytest
+
+from app import create_app
+from app import db as _db
+from app.identity import identity_cache
+from app.loadtest import (
+    ClientTransport,
+    HTTPTransport,
+    Sample,
+    parse_mix,
+    run_load,
+    summarize,
+)
+from app.query_budget import query_budget
+from app.replica import replica_router
+from app.seeding import SEED_PASSWORD, seed_scale
+from app.usage import api_key_usage
+from config import settings
+
+
+@pytest.fixture
+def target_app(app, tmp_path):
+    """A file-backed app with seeded users, as workers run in threads."""
+    target_app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'load.db'}",
+            "TESTING": True,
+            # The API must work without CSRF tokens, like a real client
+            "WTF_CSRF_ENABLED": True,
+        }
+    )
+    with target_app.app_context():
+        _db.create_all()
+        seed_scale(2, 2, 3, 2, catalog_size=10, prefix="load")
+
+    yield target_app
+
+    with target_app.app_context():
+        _db.engine.dispose()
+
+    # Point the process-wide helpers back at the shared test app
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def test_parse_mix():
+    """Test parsing weights and rejecting unknown or empty mixes."""
+    assert parse_mix("list_liquors=3, get_batch=1") == {
+        "list_liquors": 3,
+        "get_batch": 1,
+    }
+    for text in ("unknown=1", "get_batch=x", "get_batch=-1", "get_batch=0"):
+        with pytest.raises(ValueError):
+            parse_mix(text)
+
+
+def test_http_transport_rejects_other_schemes():
+    """Test only http(s) URLs are accepted."""
+    with pytest.raises(ValueError):
+        HTTPTransport("ftp://example.com")
+
+
+def test_summarize_counts_errors_and_buckets_latencies():
+    """Test throughput, error rates and the cumulative histogram."""
+    samples = [
+        Sample("get_batch", 200, 0.004),
+        Sample("get_batch", 404, 0.02),
+        Sample("login", 0, 0.3),
+        Sample("login", 200, 0.2),
+    ]
+
+    report = summarize(samples, seconds=2.0)
+    total = report["total"]
+    assert total["requests"] == 4
+    assert total["throughput"] == 2.0
+    assert total["errors"] == 2
+    assert total["statuses"] == {"0": 1, "200": 2, "404": 1}
+    assert total["histogram"]["0.005"] == 1
+    assert total["histogram"]["0.25"] == 3
+    assert total["histogram"]["10.0"] == 4
+    assert report["operations"]["get_batch"]["error_rate"] == 0.5
+    assert report["operations"]["login"]["p50_ms"] == pytest.approx(200)
+
+
+def test_run_load_replays_the_mix(target_app):
+    """Test concurrent workers log in and run every operation without errors."""
+    report = run_load(
+        lambda: ClientTransport(target_app),
+        workers=2,
+        duration=30,
+        max_requests=60,
+        users=[("load_0", SEED_PASSWORD), ("load_1", SEED_PASSWORD)],
+        seed=1,
+    )
+
+    assert report["total"]["requests"] >= 60
+    assert report["total"]["errors"] == 0
+    assert {"login", "list_liquors", "list_batches", "get_batch"} <= set(
+        report["operations"]
+    )
+
+
+def test_run_load_with_a_shared_token(target_app):
+    """Test a bearer token replaces logging in."""
+    client = target_app.test_client()
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"username": "load_0", "password": SEED_PASSWORD},
+    ).get_json()["auth_token"]
+
+    report = run_load(
+        lambda: ClientTransport(target_app),
+        workers=1,
+        duration=30,
+        mix={"login": 5, "list_liquors": 1},
+        max_requests=5,
+        token=token,
+    )
+
+    assert set(report["operations"]) == {"list_liquors"}
+    assert report["total"]["errors"] == 0
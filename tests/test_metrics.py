@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from app.metrics import (
+    STATEMENT_BUCKETS,
+    MetricsRegistry,
+    merge_snapshots,
+    render_prometheus,
+    request_metrics,
+)
+from app.models import Liquor
+
+METRICS_HEADERS = {"Authorization": "Bearer metrics-token"}
+
+
+@pytest.fixture
+def metrics(app):
+    """Start every test from empty metrics in this process."""
+    request_metrics.registry.clear()
+    app.config["METRICS_TOKEN"] = "metrics-token"
+    yield request_metrics
+    app.config["METRICS_TOKEN"] = None
+    request_metrics.directory = None
+    request_metrics.server_timing = False
+    request_metrics.registry.clear()
+
+
+def test_metrics_count_requests_and_sql_per_endpoint(
+    client, session, metrics, auth_headers
+):
+    """Test /metrics reports latency, request and SQL counts by endpoint."""
+    user, headers = auth_headers("metrics_user")
+    session.add(Liquor(name="Wiśniówka", user_id=user.id))
+    session.commit()
+
+    for _ in range(2):
+        assert client.get("/api/v1/liquors", headers=headers).status_code == 200
+
+    response = client.get("/metrics", headers=METRICS_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    endpoint = 'endpoint="api.api_v1.get_liquors"'
+    assert "# TYPE nalewka_http_request_duration_seconds histogram" in text
+    assert (
+        f'nalewka_http_requests_total{{{endpoint},method="GET",status="200"}} 2' in text
+    )
+    assert f"nalewka_http_request_duration_seconds_count{{{endpoint}}} 2" in text
+    assert f'nalewka_sql_statements_per_request_bucket{{{endpoint},le="+Inf"}} 2' in (
+        text
+    )
+    (statements,) = [
+        line
+        for line in text.splitlines()
+        if line.startswith(f"nalewka_sql_statements_total{{{endpoint}}}")
+    ]
+    assert float(statements.split()[-1]) >= 2
+
+
+def test_metrics_need_the_token(app, client, metrics):
+    """Test /metrics is hidden without a token and refuses a wrong one."""
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+
+    app.config["METRICS_TOKEN"] = None
+    assert client.get("/metrics", headers=METRICS_HEADERS).status_code == 404
+
+
+def test_server_timing_header(client, session, metrics, auth_headers):
+    """Test the optional Server-Timing header carries SQL and total time."""
+    _, headers = auth_headers("timing_user")
+    metrics.server_timing = True
+
+    response = client.get("/api/v1/liquors", headers=headers)
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("sql;dur=")
+    assert "statements" in timing
+    assert "app;dur=" in timing
+
+
+def test_worker_snapshots_are_added_up(client, metrics, tmp_path):
+    """Test /metrics merges the files written by other workers."""
+    other = MetricsRegistry()
+    other.inc("nalewka_sql_statements_total", {"endpoint": "main.index"}, 7)
+    other.observe(
+        "nalewka_sql_statements_per_request",
+        {"endpoint": "main.index"},
+        7,
+        STATEMENT_BUCKETS,
+    )
+    (tmp_path / "worker-1.json").write_text(json.dumps(other.snapshot()))
+    metrics.registry.inc("nalewka_sql_statements_total", {"endpoint": "main.index"}, 3)
+    metrics.directory = str(tmp_path)
+
+    text = client.get("/metrics", headers=METRICS_HEADERS).get_data(as_text=True)
+    assert 'nalewka_sql_statements_total{endpoint="main.index"} 10' in text
+    assert (
+        'nalewka_sql_statements_per_request_bucket{endpoint="main.index",le="5"} 0'
+        in text
+    )
+    assert (
+        'nalewka_sql_statements_per_request_bucket{endpoint="main.index",le="10"} 1'
+        in text
+    )
+
+
+def test_merge_snapshots_renders_cumulative_buckets():
+    """Test histogram buckets are cumulative after merging."""
+    first, second = MetricsRegistry(), MetricsRegistry()
+    first.observe("h", {}, 0.5, (1, 2))
+    second.observe("h", {}, 1.5, (1, 2))
+    second.observe("h", {}, 3, (1, 2))
+
+    text = render_prometheus(merge_snapshots([first.snapshot(), second.snapshot()]))
+    assert 'h_bucket{le="1"} 1' in text
+    assert 'h_bucket{le="2"} 2' in text
+    assert 'h_bucket{le="+Inf"} 3' in text
+    assert "h_sum 5" in text
+    assert "h_count 3" in text
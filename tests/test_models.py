@@ -1,6 +1,10 @@
 from typing import Any
 
-from app.models import Liquor, User
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Ingredient, Liquor, User
+from app.repositories import IngredientRepository
 
 
 def test_new_user_password_hashing(session: Any) -> None:
@@ -29,3 +33,20 @@ def test_new_user_password_hashing(session: Any) -> None:
     assert user.password_hash != "password123"
     assert user.check_password("password123")
     assert not user.check_password("wrongpassword")
+
+
+def test_ingredient_names_unique_ignoring_case(session: Any) -> None:
+    """
+    GIVEN an existing Ingredient
+    WHEN another Ingredient differing only by case or whitespace is inserted
+    THEN the unique index on the normalized name rejects it
+    """
+    session.add(Ingredient(name="Wiśnie"))
+    session.commit()
+
+    session.add(Ingredient(name=" WIŚNIE"))
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+    assert IngredientRepository().get_by_name("wiśnie ").name == "Wiśnie"
@@ -87,3 +87,107 @@ def test_batch_formulas_pagination(client, session):
     assert data["pagination"]["per_page"] == 5
     assert data["pagination"]["total"] == 15
     assert data["pagination"]["pages"] == 3
+
+
+def _login(client, username, password="password123"):
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": username, "password": password}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    return json.loads(response.data)["auth_token"]
+
+
+def test_batches_cursor_pagination(client, session):
+    """Test walking the batches list with next_cursor returns every batch once."""
+    from datetime import datetime, timedelta
+
+    user = User(username="cursor_user", email="cursor@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    liquor = Liquor(name="Cursor Liquor", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+
+    # Several batches share a date so the id tie-breaker is exercised
+    start = datetime(2024, 1, 1)
+    for i in range(12):
+        session.add(
+            Batch(
+                description=f"Batch {i}",
+                liquor_id=liquor.id,
+                date=start + timedelta(days=i // 3),
+            )
+        )
+    session.commit()
+
+    headers = {"Authorization": f"Bearer {_login(client, 'cursor_user')}"}
+
+    response = client.get(
+        f"/api/v1/liquors/{liquor.id}/batches?per_page=5", headers=headers
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["pagination"]["total"] == 12
+    seen = [batch["id"] for batch in data["data"]]
+    cursor = data["pagination"]["next_cursor"]
+    assert cursor
+
+    while cursor:
+        response = client.get(
+            f"/api/v1/liquors/{liquor.id}/batches?per_page=5&cursor={cursor}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        # Cursor mode skips the count unless asked for
+        assert data["pagination"]["total"] is None
+        assert data["pagination"]["count"] == "none"
+        seen.extend(batch["id"] for batch in data["data"])
+        cursor = data["pagination"]["next_cursor"]
+
+    assert len(seen) == 12
+    assert len(set(seen)) == 12
+
+    # Same order as plain offset pagination
+    response = client.get(
+        f"/api/v1/liquors/{liquor.id}/batches?per_page=12", headers=headers
+    )
+    data = json.loads(response.data)
+    assert [batch["id"] for batch in data["data"]] == seen
+    assert data["pagination"]["next_cursor"] is None
+
+
+def test_pagination_count_modes(client, session):
+    """Test the count query parameter and invalid cursor handling."""
+    user = User(username="count_user", email="count@example.com")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+
+    for i in range(3):
+        session.add(Liquor(name=f"Liquor {i}", user_id=user.id))
+    session.commit()
+
+    headers = {"Authorization": f"Bearer {_login(client, 'count_user')}"}
+
+    response = client.get("/api/v1/liquors?count=none", headers=headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data["data"]) == 3
+    assert data["pagination"]["total"] is None
+    assert data["pagination"]["pages"] is None
+
+    response = client.get("/api/v1/liquors?count=estimate", headers=headers)
+    data = json.loads(response.data)
+    assert data["pagination"]["total"] == 3
+    assert data["pagination"]["count"] == "estimate"
+
+    response = client.get("/api/v1/liquors?count=bogus", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/liquors?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
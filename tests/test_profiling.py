@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from app import create_app, profiling
+from app import db as _db
+from app.identity import identity_cache
+from app.models import Batch, Liquor, User
+from app.query_budget import query_budget
+from app.replica import replica_router
+from app.usage import api_key_usage
+from config import settings
+
+
+@pytest.fixture
+def profiled_app(app, tmp_path):
+    """An app where the user "profiler" may profile requests."""
+    profiled_app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'profiled.db'}",
+            "PROFILE_USERS": "profiler, someone_else",
+            "PROFILE_DIR": str(tmp_path / "profiles"),
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+    with profiled_app.app_context():
+        _db.create_all()
+        users = [
+            User(username=username, email=f"{username}@example.com")
+            for username in ("profiler", "visitor")
+        ]
+        for user in users:
+            user.set_password("password123")
+        _db.session.add_all(users)
+        _db.session.commit()
+        liquor = Liquor(name="Slow liquor", user_id=users[0].id)
+        _db.session.add(liquor)
+        _db.session.commit()
+        _db.session.add(Batch(description="Slow batch", liquor_id=liquor.id))
+        _db.session.commit()
+
+    yield profiled_app
+
+    with profiled_app.app_context():
+        _db.engine.dispose()
+
+    # Point the process-wide helpers back at the shared test app
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def _log_in(client, username):
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": username, "password": "password123"}),
+        content_type="application/json",
+    )
+    return {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+
+
+def test_profiled_request_writes_pstats_and_breakdown(profiled_app, tmp_path):
+    """Test X-Profile from an allowed user writes a profile and a breakdown."""
+    client = profiled_app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = "1"
+        sess["_fresh"] = True
+
+    response = client.get("/liquor/1/batches", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    name = response.headers["X-Profile"]
+    assert "template;dur=" in response.headers["Server-Timing"]
+
+    profiles = tmp_path / "profiles"
+    assert (profiles / f"{name}.pstats").stat().st_size > 0
+    summary = json.loads((profiles / f"{name}.json").read_text())
+    assert summary["path"] == "/liquor/1/batches"
+    assert summary["sql_statements"] > 0
+    assert summary["template_ms"] > 0
+    assert summary["sql_ms"] + summary["template_ms"] + summary[
+        "python_ms"
+    ] == pytest.approx(summary["total_ms"], abs=0.01)
+
+
+def test_profile_flag_ignored_for_other_users(profiled_app, tmp_path, monkeypatch):
+    """Test only PROFILE_USERS get profiles, and only when they ask."""
+    started = []
+    profile_class = profiling.cProfile.Profile
+    monkeypatch.setattr(
+        profiling.cProfile,
+        "Profile",
+        lambda: started.append(True) or profile_class(),
+    )
+    client = profiled_app.test_client()
+    visitor = _log_in(client, "visitor")
+    profiler = _log_in(client, "profiler")
+
+    response = client.get("/api/v1/liquors?_profile=1", headers=visitor)
+    assert response.status_code == 200
+    assert "X-Profile" not in response.headers
+    response = client.get("/api/v1/ingredients", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile" not in response.headers
+    # Neither the other user nor an anonymous caller ran under the profiler
+    assert started == []
+
+    response = client.get("/api/v1/liquors", headers=profiler)
+    assert "X-Profile" not in response.headers
+    assert not (tmp_path / "profiles").exists()
+
+    response = client.get("/api/v1/liquors?_profile=1", headers=profiler)
+    assert response.headers["X-Profile"].endswith("api.api_v1.get_liquors")
+    assert started == [True]
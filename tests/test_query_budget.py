@@ -0,0 +1,114 @@
+import pytest
+import sqlalchemy as sa
+from flask import g
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, User
+from app.query_budget import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def budget():
+    """Restore the suite's query budget limits after each test."""
+    limits = (
+        query_budget.max_statements,
+        query_budget.lazy_load_limit,
+        query_budget.raise_on_violation,
+    )
+    yield query_budget
+    (
+        query_budget.max_statements,
+        query_budget.lazy_load_limit,
+        query_budget.raise_on_violation,
+    ) = limits
+
+
+def _create_user_with_batches(client, session, auth_headers, batch_count=3):
+    user, headers = auth_headers("budget_user")
+    liquor = Liquor(name="Budget Liquor", user_id=user.id)
+    ingredient = Ingredient(name="Budget ingredient")
+    session.add_all([liquor, ingredient])
+    session.commit()
+    for i in range(batch_count):
+        batch = Batch(description=f"Budget batch {i}", liquor_id=liquor.id)
+        batch.formulas = [
+            BatchFormula(ingredient_id=ingredient.id, quantity=1.0, unit="g")
+        ]
+        session.add(batch)
+    session.commit()
+    # Resolve the token once, so budgets count a request from a warm worker
+    client.get("/api/v1/users/me", headers=headers)
+    liquor_id = liquor.id
+    session.expunge_all()
+    return liquor_id, headers
+
+
+def test_lazy_loads_in_a_loop_are_reported(client, session, budget, auth_headers):
+    """Test lazy-loading one relationship per row is reported as N+1."""
+    _create_user_with_batches(client, session, auth_headers)
+    budget.lazy_load_limit = 2
+    budget._start_request()
+
+    for batch in session.scalars(sa.select(Batch)):
+        for formula in batch.formulas:
+            assert formula.ingredient is not None
+
+    problems = budget.violations(g._budget_statements, g._budget_lazy_loads)
+    assert problems == ["Batch.formulas lazy-loaded 3 times (limit 2)"]
+
+
+def test_request_over_budget_raises(client, session, budget, auth_headers):
+    """Test a request over QUERY_BUDGET raises when configured to."""
+    liquor_id, headers = _create_user_with_batches(client, session, auth_headers)
+    budget.max_statements = 1
+    budget.raise_on_violation = True
+
+    with pytest.raises(QueryBudgetExceeded, match="SQL statements"):
+        client.get(f"/api/v1/liquors/{liquor_id}/batches", headers=headers)
+
+
+def test_request_over_budget_logs(client, session, budget, caplog, auth_headers):
+    """Test a request over QUERY_BUDGET is logged by default."""
+    liquor_id, headers = _create_user_with_batches(client, session, auth_headers)
+    budget.max_statements = 1
+    budget.raise_on_violation = False
+
+    path = f"/api/v1/liquors/{liquor_id}/batches"
+    assert client.get(path, headers=headers).status_code == 200
+    assert f"Query budget exceeded: GET {path}" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "path, limit",
+    [
+        ("/api/v1/liquors", 4),
+        ("/api/v1/liquors/{liquor_id}", 3),
+        ("/api/v1/liquors/{liquor_id}/batches", 5),
+        ("/api/v1/ingredients", 2),
+    ],
+)
+def test_api_query_budgets(
+    client, session, assert_max_queries, path, limit, auth_headers
+):
+    """Test API listings stay within their query budgets."""
+    liquor_id, headers = _create_user_with_batches(
+        client, session, auth_headers, batch_count=10
+    )
+
+    with assert_max_queries(limit):
+        response = client.get(path.format(liquor_id=liquor_id), headers=headers)
+    assert response.status_code == 200
+
+
+def test_batches_page_query_budget(client, session, assert_max_queries, auth_headers):
+    """Test the HTML batches page stays within its query budget."""
+    liquor_id, _ = _create_user_with_batches(
+        client, session, auth_headers, batch_count=10
+    )
+    user_id = session.scalar(sa.select(User.id))
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+    with assert_max_queries(4):
+        response = client.get(f"/liquor/{liquor_id}/batches")
+    assert response.status_code == 200
@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+
+from app import create_app
+from app import db as _db
+from app.identity import identity_cache
+from app.models import Liquor, PrimaryReadDeadline, User
+from app.query_budget import query_budget
+from app.replica import REPLICA_BIND, replica_router
+from app.usage import api_key_usage
+from config import settings
+
+
+@pytest.fixture
+def replica_app(app, tmp_path):
+    """An app whose replica bind is a second SQLite file."""
+    replica_app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "SQLALCHEMY_REPLICA_URI": f"sqlite:///{tmp_path / 'replica.db'}",
+            "REPLICA_STICKY_SECONDS": 0.5,
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+        }
+    )
+    with replica_app.app_context():
+        _db.create_all()
+        _db.metadata.create_all(_db.engines[REPLICA_BIND])
+
+    # Requests push their own app context, and so get a fresh session each
+    yield replica_app
+
+    with replica_app.app_context():
+        for engine in _db.engines.values():
+            engine.dispose()
+
+    # Point the process-wide helpers back at the shared test app
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def test_writes_without_replica_set_no_cookie(client, auth_headers):
+    """Test API writes do not touch the session when no replica is configured."""
+    _, headers = auth_headers("no_replica_user")
+
+    response = client.post(
+        "/api/v1/liquors",
+        data=json.dumps({"name": "Cookieless"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert "Set-Cookie" not in response.headers
+    assert "Cookie" not in response.headers.get("Vary", "")
+
+
+def _liquor_names(client, headers):
+    response = client.get("/api/v1/liquors", headers=headers)
+    return [liquor["name"] for liquor in json.loads(response.data)["data"]]
+
+
+def test_reads_go_to_replica_until_the_client_writes(replica_app):
+    """Test GETs use the replica, and the primary right after a write."""
+    with replica_app.app_context():
+        user = User(username="replica_user", email="replica@example.com")
+        user.set_password("password123")
+        _db.session.add(user)
+        _db.session.commit()
+        liquor = Liquor(name="Primary name", user_id=user.id)
+        _db.session.add(liquor)
+        _db.session.commit()
+        liquor_id = liquor.id
+
+        # The replica lags behind: it only has an older copy of the liquor
+        with _db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(
+                Liquor.__table__.insert(),
+                {"id": liquor_id, "name": "Replica name", "user_id": user.id},
+            )
+
+    client = replica_app.test_client()
+    response = client.post(
+        "/api/v1/auth/login",
+        data=json.dumps({"username": "replica_user", "password": "password123"}),
+        content_type="application/json",
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.data)['auth_token']}"}
+
+    assert _liquor_names(client, headers) == ["Replica name"]
+
+    response = client.put(
+        f"/api/v1/liquors/{liquor_id}",
+        data=json.dumps({"name": "Renamed"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert "Set-Cookie" not in response.headers
+
+    # The deadline is kept per user in the primary, where every worker reads it
+    with replica_app.app_context():
+        deadline = _db.session.get(PrimaryReadDeadline, user.id)
+        assert deadline is not None and deadline.until > time.time()
+    assert _liquor_names(client, headers) == ["Renamed"]
+    assert _liquor_names(replica_app.test_client(), headers) == ["Renamed"]
+
+    time.sleep(0.6)
+    assert _liquor_names(client, headers) == ["Replica name"]
@@ -0,0 +1,183 @@
+import json
+import os
+
+import pytest
+
+from app.models import Batch, Ingredient, Liquor
+from app.response_cache import (
+    FileSystemBackend,
+    MemoryBackend,
+    NullBackend,
+    SharedBackend,
+    response_cache,
+)
+
+
+@pytest.fixture(params=["memory", "filesystem", "shared"])
+def cache(request, tmp_path):
+    """Enable the response cache with each backend for one test."""
+    response_cache.backend = {
+        "memory": lambda: MemoryBackend(),
+        "filesystem": lambda: FileSystemBackend(str(tmp_path / "cache")),
+        "shared": lambda: SharedBackend.from_url("local://"),
+    }[request.param]()
+    yield response_cache
+    response_cache.backend = NullBackend()
+
+
+def test_ingredients_served_from_cache_until_a_write(
+    client, session, cache, auth_headers, assert_max_queries
+):
+    """Test a cached ingredient list needs no queries and drops on writes."""
+    _, headers = auth_headers("cache_user")
+    session.add(Ingredient(name="Wanilia"))
+    session.commit()
+
+    response = client.get("/api/v1/ingredients")
+    assert response.headers["X-Cache"] == "MISS"
+    etag = response.headers["ETag"]
+
+    with assert_max_queries(0):
+        response = client.get("/api/v1/ingredients")
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["ETag"] == etag
+    assert [item["name"] for item in json.loads(response.data)] == ["Wanilia"]
+
+    response = client.get("/api/v1/ingredients", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.post(
+        "/api/v1/ingredients",
+        data=json.dumps({"name": "Goździki"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 201
+    response = client.get("/api/v1/ingredients")
+    assert response.headers["X-Cache"] == "MISS"
+    assert len(json.loads(response.data)) == 2
+
+
+def test_user_lists_are_cached_per_user(client, session, cache, auth_headers):
+    """Test entries are per user and batch writes refresh liquor stats."""
+    user, headers = auth_headers("cache_owner")
+    _, other_headers = auth_headers("cache_other")
+    liquor = Liquor(name="Miodówka", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+
+    url = "/api/v1/liquors?include=stats"
+    assert client.get(url, headers=headers).headers["X-Cache"] == "MISS"
+    assert client.get(url, headers=headers).headers["X-Cache"] == "HIT"
+    response = client.get(url, headers=other_headers)
+    assert response.headers["X-Cache"] == "MISS"
+    assert json.loads(response.data)["data"] == []
+
+    # Any committed ORM write invalidates the owner's tags
+    session.add(Batch(liquor_id=liquor.id, description="Miód", bottle_count=3))
+    session.commit()
+    response = client.get(url, headers=headers)
+    assert response.headers["X-Cache"] == "MISS"
+    assert json.loads(response.data)["data"][0]["stats"]["total_bottles"] == 3
+    assert client.get(url, headers=other_headers).headers["X-Cache"] == "HIT"
+
+    # Bulk imports bypass the ORM and invalidate explicitly
+    response = client.post(
+        "/api/v1/batches/bulk",
+        data=json.dumps(
+            {
+                "batches": [
+                    {
+                        "liquor_id": liquor.id,
+                        "description": "Miód 2",
+                        "bottle_count": 2,
+                        "formulas": [],
+                    }
+                ]
+            }
+        ),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 201
+    response = client.get(url, headers=headers)
+    assert json.loads(response.data)["data"][0]["stats"]["total_bottles"] == 5
+
+
+def test_rolled_back_writes_do_not_invalidate(session, cache):
+    """Test tags are only invalidated once a transaction commits."""
+    cache.invalidate("ingredients")
+    (token,) = cache.backend.get_many(["tag:ingredients"])
+
+    session.add(Ingredient(name="Anyż"))
+    session.flush()
+    session.rollback()
+    assert cache.backend.get_many(["tag:ingredients"]) == [token]
+
+    session.add(Ingredient(name="Anyż"))
+    session.commit()
+    assert cache.backend.get_many(["tag:ingredients"]) != [token]
+
+
+def test_write_during_a_view_is_not_stored_as_fresh(app, cache):
+    """Test a tag invalidated while the view runs makes its entry miss."""
+    from flask import jsonify
+
+    calls = []
+
+    @cache.cached("ingredients")
+    def view():
+        if not calls:
+            # A write commits, in this or another worker, while the view reads
+            cache.invalidate("ingredients")
+        calls.append(True)
+        return jsonify(len(calls))
+
+    for expected in ("MISS", "MISS", "HIT"):
+        with app.test_request_context("/api/v1/ingredients"):
+            assert view().headers["X-Cache"] == expected
+    assert len(calls) == 2
+
+
+def test_filesystem_backend_evicts_expired_and_oldest_files(tmp_path, monkeypatch):
+    """Test the filesystem backend stays bounded instead of growing forever."""
+    directory = tmp_path / "cache"
+    backend = FileSystemBackend(str(directory), max_entries=3, sweep_interval=6)
+    now = [1000.0]
+    monkeypatch.setattr("app.response_cache.time.time", lambda: now[0])
+
+    backend.set("expiring", "value", ttl=1)
+    now[0] += 2
+    assert backend.get_many(["expiring"]) == [None]
+    assert list(directory.iterdir()) == []
+
+    backend.set("expired", "value", ttl=1)
+    for n in range(4):
+        now[0] += 2
+        backend.set(f"key{n}", str(n))
+        # Sweeping picks the oldest by modification time
+        os.utime(backend._path(f"key{n}"), (now[0], now[0]))
+
+    # The sixth write swept: the expired file and then the oldest one went
+    assert len(list(directory.iterdir())) == 3
+    assert backend.get_many(["expired", "key0", "key1", "key3"]) == [
+        None,
+        None,
+        "1",
+        "3",
+    ]
+
+
+def test_shared_backend_rounds_short_ttls_up():
+    """Test sub-second TTLs are sent to Redis as one second, not zero."""
+    calls = []
+
+    class Client:
+        def set(self, key, value, ex=None):
+            calls.append(ex)
+
+    backend = SharedBackend(Client())
+    backend.set("key", "value", ttl=0.5)
+    backend.set("key", "value", ttl=2.5)
+    backend.set("key", "value")
+    assert calls == [1, 3, None]
@@ -0,0 +1,157 @@
+import json
+from datetime import datetime
+
+from app.models import Batch, Ingredient, Liquor, SearchDocument
+
+
+def _search(client, headers, query, **params):
+    response = client.get(
+        "/api/v1/search", query_string={"q": query, **params}, headers=headers
+    )
+    return response.status_code, json.loads(response.data)
+
+
+def test_search_ranks_across_liquors_batches_and_ingredients(
+    client, session, auth_headers
+):
+    """Test search folds diacritics, matches prefixes and scopes to the user."""
+    user, headers = auth_headers("search_user")
+    other, _ = auth_headers("search_other")
+
+    liquor = Liquor(name="Wiśniówka", description="Nalewka z wiśni", user_id=user.id)
+    foreign = Liquor(name="Wiśniówka sąsiada", user_id=other.id)
+    session.add_all([liquor, foreign, Ingredient(name="Wiśnie")])
+    session.commit()
+    session.add_all(
+        [
+            Batch(
+                liquor_id=liquor.id,
+                description="Wiśnie z ogrodu, mało cukru",
+                date=datetime(2023, 7, 1),
+            ),
+            Batch(
+                liquor_id=liquor.id,
+                description="Wiśnie z targu",
+                date=datetime(2024, 7, 1),
+            ),
+        ]
+    )
+    session.commit()
+
+    status, data = _search(client, headers, "WISNI")
+    assert status == 200
+    assert sorted(result["type"] for result in data["data"]) == [
+        "batch",
+        "batch",
+        "ingredient",
+        "liquor",
+    ]
+    assert all(result["title"] != "Wiśniówka sąsiada" for result in data["data"])
+
+    # Every word must match; the batch year is searchable too
+    _, data = _search(client, headers, "wiśnie 2023")
+    assert [result["title"] for result in data["data"]] == [
+        "Wiśnie z ogrodu, mało cukru"
+    ]
+    _, data = _search(client, headers, "malo cukr")
+    assert len(data["data"]) == 1
+
+    status, data = _search(client, headers, " ?! ")
+    assert status == 400
+
+
+def test_search_index_follows_writes(client, session, auth_headers):
+    """Test renames and deletes update the index, and other edits skip it."""
+    user, headers = auth_headers("search_user")
+    liquor = Liquor(name="Cytrynówka", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+    batch = Batch(liquor_id=liquor.id, description="Cytryny")
+    session.add(batch)
+    session.commit()
+    document_id = session.query(SearchDocument.id).filter_by(kind="batch").scalar()
+
+    # Bottle counts are not indexed, so the document is left alone
+    batch.bottle_count = 12
+    session.commit()
+    assert (
+        session.query(SearchDocument.id).filter_by(kind="batch").scalar() == document_id
+    )
+
+    response = client.put(
+        f"/api/v1/liquors/{liquor.id}",
+        data=json.dumps({"name": "Pomarańczówka"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert response.status_code == 200
+    _, data = _search(client, headers, "cytrynowka")
+    assert data["data"] == []
+    _, data = _search(client, headers, "pomaranczowka")
+    assert [result["id"] for result in data["data"]] == [liquor.id]
+
+    response = client.delete(f"/api/v1/liquors/{liquor.id}", headers=headers)
+    assert response.status_code == 204
+    assert session.query(SearchDocument).count() == 0
+    _, data = _search(client, headers, "cytryny")
+    assert data["data"] == []
+
+
+def test_search_keyset_pagination(client, session, auth_headers):
+    """Test following next_cursor visits every match exactly once."""
+    user, headers = auth_headers("search_user")
+    liquor = Liquor(name="Malinówka", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+    session.add_all(
+        [Batch(liquor_id=liquor.id, description=f"Maliny {i}") for i in range(7)]
+    )
+    session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"per_page": 3, **({"cursor": cursor} if cursor else {})}
+        _, data = _search(client, headers, "maliny", **params)
+        seen += [result["id"] for result in data["data"]]
+        cursor = data["pagination"]["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+
+def test_batches_without_an_owner_are_not_indexed(client, session, auth_headers):
+    """Test a batch whose liquor cannot be found is not shown to every user."""
+    _, headers = auth_headers("search_user")
+    session.add(Batch(liquor_id=9999, description="Bez właściciela"))
+    session.commit()
+
+    assert session.query(SearchDocument).filter_by(kind="batch").count() == 0
+    _, data = _search(client, headers, "wlasciciela")
+    assert data["data"] == []
+
+
+def test_search_page_pagination(client, session, auth_headers):
+    """Test search pages by number and counts matches like the other lists."""
+    user, headers = auth_headers("search_user")
+    liquor = Liquor(name="Porzeczkówka", user_id=user.id)
+    session.add(liquor)
+    session.commit()
+    session.add_all(
+        [Batch(liquor_id=liquor.id, description=f"Porzeczki {i}") for i in range(5)]
+    )
+    session.commit()
+
+    status, first = _search(client, headers, "porzeczki", per_page=2)
+    assert status == 200
+    assert first["pagination"]["total"] == 5
+    assert first["pagination"]["page"] == 1
+    _, third = _search(client, headers, "porzeczki", per_page=2, page=3)
+    assert third["pagination"]["page"] == 3
+    assert len(third["data"]) == 1
+    assert not {r["id"] for r in third["data"]} & {r["id"] for r in first["data"]}
+
+    _, data = _search(client, headers, "porzeczki", count="none")
+    assert data["pagination"]["total"] is None
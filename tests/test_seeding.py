@@ -0,0 +1,81 @@
+import pytest
+import sqlalchemy as sa
+
+from app.models import Batch, BatchFormula, Ingredient, Liquor, SearchDocument, User
+from app.response_cache import MemoryBackend, NullBackend, response_cache
+from app.seeding import seed_scale
+
+
+def _formula_rows(session):
+    return session.execute(
+        sa.select(BatchFormula.quantity, BatchFormula.unit).order_by(BatchFormula.id)
+    ).all()
+
+
+def test_seed_scale_creates_the_requested_shape(session):
+    """Test seed_scale creates users, liquors, batches and formulas as asked."""
+    created = seed_scale(3, 2, 4, 3, catalog_size=10, seed=7, prefix="shape")
+
+    assert created == {
+        "users": 3,
+        "liquors": 6,
+        "batches": 24,
+        "formulas": 72,
+        "ingredients": 10,
+    }
+    for model, count in (
+        (User, 3),
+        (Liquor, 6),
+        (Batch, 24),
+        (BatchFormula, 72),
+        (Ingredient, 10),
+        (SearchDocument, 40),
+    ):
+        assert session.scalar(sa.select(sa.func.count()).select_from(model)) == count
+
+    user = session.scalar(sa.select(User).where(User.username == "shape_0"))
+    assert user.check_password("password123")
+    ingredient = session.scalar(sa.select(Ingredient).order_by(Ingredient.id))
+    assert ingredient.name_normalized == ingredient.name.casefold()
+    # Every batch gets distinct ingredients
+    assert (
+        session.scalar(
+            sa.select(sa.func.count(sa.distinct(BatchFormula.ingredient_id))).where(
+                BatchFormula.batch_id == sa.select(sa.func.min(Batch.id))
+            )
+        )
+        == 3
+    )
+
+
+def test_seed_scale_is_deterministic(session, db):
+    """Test the same seed produces the same data, and another seed does not."""
+    seed_scale(2, 2, 3, 2, catalog_size=5, seed=42, prefix="first")
+    first = _formula_rows(session)
+
+    for table in reversed(db.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    seed_scale(2, 2, 3, 2, catalog_size=5, seed=42, prefix="second")
+    assert _formula_rows(session) == first
+
+    seed_scale(2, 2, 3, 2, catalog_size=5, seed=43, prefix="third")
+    assert _formula_rows(session)[len(first) :] != first
+
+
+def test_seed_scale_needs_a_catalog_for_formulas(session):
+    """Test formulas cannot be generated without ingredients."""
+    with pytest.raises(ValueError, match="catalog size"):
+        seed_scale(1, 1, 1, 1, catalog_size=0)
+
+
+def test_seed_scale_invalidates_cached_ingredients(session):
+    """Test cached ingredient lists drop once the seeded catalog is committed."""
+    response_cache.backend = MemoryBackend()
+    try:
+        response_cache.invalidate("ingredients")
+        (token,) = response_cache.backend.get_many(["tag:ingredients"])
+        seed_scale(1, 1, 1, 1, catalog_size=3, prefix="cached")
+        assert response_cache.backend.get_many(["tag:ingredients"]) != [token]
+    finally:
+        response_cache.backend = NullBackend()
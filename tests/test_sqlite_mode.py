@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from app.pool import configure_sqlite
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    """Test the SQLite settings become pragmas on every new connection."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    configure_sqlite(engine, {"SQLITE_BUSY_TIMEOUT": 1234, "SQLITE_MMAP_SIZE": 1 << 20})
+
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(  # noqa: E731
+            f"PRAGMA {name}"
+        ).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 1234
+        assert pragma("mmap_size") == 1 << 20
+    engine.dispose()
+
+
+def test_write_serializer_queues_concurrent_writers(tmp_path):
+    """Test threads writing at once all succeed when writes are serialized."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    serializer = configure_sqlite(
+        engine, {"SQLITE_BUSY_TIMEOUT": 0, "SQLITE_SERIALIZE_WRITES": True}
+    )
+    # With busy_timeout 0 any contention would fail; only the queue may wait
+    serializer.timeout = 10
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE log (worker INTEGER, n INTEGER)")
+
+    errors = []
+
+    def write(worker):
+        try:
+            for n in range(20):
+                with engine.begin() as connection:
+                    connection.exec_driver_sql("SELECT count(*) FROM log").scalar()
+                    connection.exec_driver_sql(
+                        "INSERT INTO log VALUES (?, ?)", (worker, n)
+                    )
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM log").scalar() == 160
+    assert not serializer._lock.locked()
+    engine.dispose()
+
+
+def test_write_serializer_hands_over_after_commit(tmp_path):
+    """Test a thread holding the write lock can write on a second connection."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'nested.db'}")
+    serializer = configure_sqlite(
+        engine, {"SQLITE_BUSY_TIMEOUT": 5000, "SQLITE_SERIALIZE_WRITES": True}
+    )
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE log (n INTEGER)")
+
+    started = time.perf_counter()
+    with engine.connect() as outer:
+        outer.exec_driver_sql("INSERT INTO log VALUES (1)")
+        outer.commit()
+        # The outer connection is still checked out and holds the lock
+        with engine.begin() as inner:
+            inner.exec_driver_sql("INSERT INTO log VALUES (2)")
+        # The inner connection took the lock over and gave it back on checkin
+        assert not serializer._lock.locked()
+        outer.exec_driver_sql("INSERT INTO log VALUES (3)")
+        outer.commit()
+    assert time.perf_counter() - started < serializer.timeout
+
+    assert not serializer._lock.locked()
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM log").scalar() == 3
+    engine.dispose()
+
+
+def test_write_serializer_rejects_nested_uncommitted_writes(tmp_path):
+    """Test a second connection fails at once behind its own thread's write."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'deadlock.db'}")
+    serializer = configure_sqlite(
+        engine, {"SQLITE_BUSY_TIMEOUT": 5000, "SQLITE_SERIALIZE_WRITES": True}
+    )
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE log (n INTEGER)")
+
+    started = time.perf_counter()
+    with engine.connect() as outer:
+        outer.exec_driver_sql("INSERT INTO log VALUES (1)")
+        with pytest.raises(sa.exc.OperationalError, match="uncommitted write"):
+            with engine.begin() as inner:
+                inner.exec_driver_sql("INSERT INTO log VALUES (2)")
+        outer.commit()
+    assert time.perf_counter() - started < serializer.timeout
+    assert not serializer._lock.locked()
+    engine.dispose()
+
+
+def test_write_serializer_timeout_and_release_from_another_thread(tmp_path):
+    """Test a write fails after the timeout and any thread can check in."""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'timeout.db'}")
+    serializer = configure_sqlite(
+        engine, {"SQLITE_BUSY_TIMEOUT": 0, "SQLITE_SERIALIZE_WRITES": True}
+    )
+    serializer.timeout = 0.1
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE log (n INTEGER)")
+
+    holder = engine.connect()
+    holder.exec_driver_sql("INSERT INTO log VALUES (1)")
+    holder.commit()
+
+    errors = []
+
+    def write():
+        try:
+            with engine.begin() as connection:
+                connection.exec_driver_sql("INSERT INTO log VALUES (2)")
+        except sa.exc.OperationalError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1 and "write serializer" in str(errors[0])
+
+    # Checked in by another thread, as when an abandoned connection is collected
+    thread = threading.Thread(target=holder.close)
+    thread.start()
+    thread.join()
+    assert not serializer._lock.locked()
+    engine.dispose()
@@ -0,0 +1,74 @@
+import click
+import pytest
+
+from app import create_app
+from app.identity import identity_cache
+from app.query_budget import query_budget
+from app.replica import replica_router
+from app.usage import api_key_usage
+from app.version import get_git_commit_hash
+from config import settings
+
+COMMIT = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.fixture
+def make_app(app):
+    """Build extra apps, pointing the shared helpers back at the test app."""
+    yield lambda **config: create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "TESTING": True,
+            **config,
+        }
+    )
+
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def test_version_file_wins(tmp_path):
+    """Test a VERSION file stamped at build time is used first."""
+    (tmp_path / "VERSION").write_text(f"{COMMIT}\n")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("f" * 40)
+    assert get_git_commit_hash(str(tmp_path)) == "0123456"
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_branch_head_is_read_from_git_directory(tmp_path, packed):
+    """Test loose and packed branch refs are resolved without running git."""
+    git_dir = tmp_path / ".git"
+    (git_dir / "refs" / "heads").mkdir(parents=True)
+    (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+    if packed:
+        (git_dir / "packed-refs").write_text(
+            f"# pack-refs with: peeled\n{COMMIT} refs/heads/main\n"
+        )
+    else:
+        (git_dir / "refs" / "heads" / "main").write_text(f"{COMMIT}\n")
+    assert get_git_commit_hash(str(tmp_path)) == "0123456"
+
+
+def test_detached_head_and_missing_repository(tmp_path):
+    """Test a detached HEAD holds the commit and no repository gives None."""
+    assert get_git_commit_hash(str(tmp_path)) is None
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text(f"{COMMIT}\n")
+    assert get_git_commit_hash(str(tmp_path)) == "0123456"
+
+
+def test_configured_commit_hash_is_used(make_app):
+    """Test GIT_COMMIT_HASH from the environment skips the lookup."""
+    assert make_app(GIT_COMMIT_HASH="abc1234").config["GIT_COMMIT_HASH"] == "abc1234"
+
+
+def test_migrations_are_only_set_up_for_the_cli(make_app):
+    """Test Flask-Migrate is registered under a click command only."""
+    assert "migrate" not in make_app().extensions
+
+    with click.Context(click.Command("db")):
+        assert "migrate" in make_app().extensions
@@ -0,0 +1,112 @@
+import gc
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app
+from app import db as _db
+from app.catalog import ingredient_catalog
+from app.identity import identity_cache
+from app.models import Ingredient
+from app.query_budget import query_budget
+from app.replica import replica_router
+from app.usage import api_key_usage
+from app.warmup import reset_after_fork, warm_caches, warm_pool
+from config import settings
+
+GUNICORN_CONF = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+
+@pytest.fixture
+def file_app(app, tmp_path):
+    """A file-backed app, whose pool survives being disposed."""
+    file_app = create_app(
+        {
+            **settings.model_dump(),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'warm.db'}",
+            "TESTING": True,
+        }
+    )
+    with file_app.app_context():
+        # db.create_all() would also expect binds set up by other tests' apps
+        _db.metadata.create_all(_db.engine)
+        _db.session.add_all([Ingredient(name="Wiśnie"), Ingredient(name="Cukier")])
+        _db.session.commit()
+
+    yield file_app
+
+    with file_app.app_context():
+        _db.engine.dispose()
+    ingredient_catalog.invalidate()
+
+    # Point the process-wide helpers back at the shared test app
+    api_key_usage.init_app(app)
+    identity_cache.init_app(app)
+    replica_router.init_app(app)
+    query_budget.init_app(app)
+
+
+def _pooled_connections(app):
+    with app.app_context():
+        return _db.engine.pool.checkedin()
+
+
+def test_warm_caches_loads_templates_and_catalog(file_app):
+    """Test templates and ingredients are loaded and no connection is kept."""
+    ingredient_catalog.invalidate()
+
+    warmed = warm_caches(file_app)
+
+    assert warmed == {
+        "templates": len(file_app.jinja_env.list_templates()),
+        "ingredients": 2,
+    }
+    assert ingredient_catalog.version is not None
+    assert _pooled_connections(file_app) == 0
+
+
+def test_warm_caches_survives_a_database_without_tables(file_app):
+    """Test an unmigrated database only skips the catalog."""
+    with file_app.app_context():
+        _db.metadata.drop_all(_db.engine)
+    ingredient_catalog.invalidate()
+
+    assert warm_caches(file_app)["ingredients"] == 0
+
+
+def test_warm_pool_and_reset_after_fork(file_app):
+    """Test workers open connections up front and drop inherited ones."""
+    assert warm_pool(file_app, 0) == 0
+    assert warm_pool(file_app, 2) == 2
+    assert _pooled_connections(file_app) == 2
+
+    reset_after_fork(file_app)
+    assert _pooled_connections(file_app) == 0
+
+
+def test_gunicorn_config_hooks(file_app):
+    """Test the config follows the settings and re-enables GC in workers."""
+    try:
+        config = runpy.run_path(GUNICORN_CONF)
+        assert config["wsgi_app"] == "nalewka:app"
+        assert config["workers"] == settings.GUNICORN_WORKERS
+        assert config["worker_class"] == settings.GUNICORN_WORKER_CLASS
+        assert config["preload_app"] is settings.GUNICORN_PRELOAD
+
+        server = SimpleNamespace(
+            app=SimpleNamespace(wsgi=lambda: file_app), log=SimpleNamespace()
+        )
+        server.log.info = lambda *args: None
+        config["when_ready"](server)
+        assert not gc.isenabled()
+        config["pre_fork"](server, None)
+        assert gc.get_freeze_count() > 0
+        config["post_fork"](server, None)
+        assert gc.isenabled()
+        config["post_worker_init"](SimpleNamespace(wsgi=file_app))
+        assert _pooled_connections(file_app) == settings.GUNICORN_WARM_CONNECTIONS
+    finally:
+        gc.unfreeze()
+        gc.enable()